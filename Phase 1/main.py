@@ -1,44 +1,144 @@
+import argparse
 import collections
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import cache as result_cache
+from common import stats as search_stats
+from common.map_io import parse_map, read_map, stream_rows, to_grid
+from common.path_io import PathWriter
+from common import path_io
+from common.rules import apply_cell
+from common.stats import timed
 
 # Increase recursion depth for potentially deep paths, though BFS isn't recursive
 # sys.setrecursionlimit(2000) # Usually not needed for iterative BFS
 
 
-def parse_input():
-    """Reads the grid configuration from standard input."""
+def parse_input(data=None):
+    """Reads the grid configuration (text or binary map) from standard input."""
+    values, thief_mask = parse_arrays(data)
+    return values.shape[0], to_grid(values, thief_mask)
+
+
+def parse_arrays(data=None):
+    """
+    (values, thief_mask) of the map on standard input, or in data when the
+    input was already read. Exits on invalid input.
+    """
     try:
-        n = int(sys.stdin.readline().strip())
-        if n <= 0:
-            raise ValueError("Grid size must be positive.")
-        grid_repr = [sys.stdin.readline().split() for _ in range(n)]
-
-        grid = []
-        for r in range(n):
-            row_data = []
-            if len(grid_repr[r]) != n:
-                raise ValueError(f"Row {r} does not have {n} elements.")
-            for cell_repr in grid_repr[r]:
-                if cell_repr == "!":
-                    row_data.append("!")
-                else:
-                    try:
-                        row_data.append(int(cell_repr))
-                    except ValueError:
-                        raise ValueError(f"Invalid cell value: {cell_repr}")
-            grid.append(row_data)
-        return n, grid
+        return read_map(sys.stdin.buffer) if data is None else parse_map(data)
     except Exception as e:
         print(f"Error reading input: {e}", file=sys.stderr)
         sys.exit(1)
 
 
-def solve_objective1(n, grid):
+def solve_objective1_streaming(stream=None, stats=None, output="text", progress=None):
+    """
+    Streams the grid (text or binary map) row by row and emits the path as
+    it goes. With Down/Right moves and no blocked cells a path always exists;
+    this follows the same route BFS finds (Down along column 0, then Right
+    along the last row), so only the current row is ever held in memory.
+    Parsing and output are interleaved, so stats records a single "stream"
+    phase and counts each path cell as one node popped.
+    output is a format of common.path_io.
+    With a file as progress, the running coins/stolen totals are written to
+    it after every row; stdout keeps the usual output.
+    """
+    try:
+        with timed(stats, "stream"):
+            _stream_path(stream, stats, output, progress)
+    except Exception as e:
+        print(f"Error reading input: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _stream_path(stream, stats, output, progress=None):
+    """Body of solve_objective1_streaming."""
+    n, rows = stream_rows(stream or sys.stdin.buffer)
+
+    print("Path for Objective 1 (BFS - First Found Path):")
+    writer = PathWriter(output)
+    current_coins = 0
+    total_stolen = 0
+    with_thief = False
+    step = 0
+
+    for r, (row_values, row_thief) in enumerate(rows):
+        cells = ["!" if row_thief[0] else int(row_values[0])]
+        if r == n - 1:
+            cells += ["!" if t else v for v, t in zip(row_values[1:].tolist(), row_thief[1:])]
+
+        if r == 0:
+            # Process start cell (0, 0); it is never reported as a move.
+            start_val = cells[0]
+            if start_val == "!":
+                with_thief = True
+            else:
+                current_coins += start_val
+            moves = []
+        else:
+            moves = [("Down", cells[0])]
+        if r == n - 1:
+            moves += [("Right", cell_value) for cell_value in cells[1:]]
+
+        for move, cell_value in moves:
+            coins_delta, stolen_delta, with_thief = apply_cell(with_thief, cell_value)
+            current_coins += coins_delta
+            total_stolen += stolen_delta
+            step += 1
+        writer.add([move == "Down" for move, _ in moves], [cell_value for _, cell_value in moves])
+        if progress is not None:
+            print(f"Row {r}: Coins {current_coins}, Stolen {total_stolen}", file=progress)
+
+    writer.close()
+    if stats is not None:
+        stats.nodes_popped += step + 1
+    print(f"\nFinal Coins: {current_coins}")
+    print(f"Total Stolen: {total_stolen}")
+
+
+def solve_objective1(n, grid, stats=None, output="text"):
     """
     Finds a path from (0, 0) to (n-1, n-1) using BFS.
     The search itself ignores costs/thieves, just finds reachability.
     Then, calculates the outcome for the found path.
+    Pass a common.stats.SearchStats as stats to record search counters.
+    output is a format of common.path_io.
     """
+    with timed(stats, "search"):
+        path_found = _bfs(n, stats)
+    with timed(stats, "outcome"):
+        _report_path(grid, path_found, output)
+    return path_found
+
+
+def solve_objective1_cached(cache, stats=None, output="text"):
+    """
+    solve_objective1 on standard input through the result cache: a map seen
+    before is answered from the cache, keyed by its raw bytes first, without
+    parsing or searching.
+    """
+    with timed(stats, "parse"):
+        data = sys.stdin.buffer.read()
+
+    def load():
+        with timed(stats, "parse"):
+            return parse_arrays(data)
+
+    def solve(values, thief_mask):
+        return solve_objective1(values.shape[0], to_grid(values, thief_mask), stats, output)
+
+    entry, hit = result_cache.solve_cached(cache, result_cache.bytes_alias(data), "1", "bfs", load, solve)
+    if hit:
+        with timed(stats, "outcome"):
+            _report_path(entry.grid(), entry.path, output)
+
+
+def _bfs(n, stats):
+    """Returns the first path BFS finds to (n-1, n-1), or None."""
     start_node = (0, 0)
     end_node = (n - 1, n - 1)
 
@@ -47,9 +147,16 @@ def solve_objective1(n, grid):
     visited = {start_node}
 
     path_found = None
+    counting = stats is not None
+    if counting:
+        stats.nodes_pushed += 1
+        stats.peak_open_set = max(stats.peak_open_set, 1)
+        stats.peak_visited = max(stats.peak_visited, 1)
 
     while queue:
         (r, c), path_coords = queue.popleft()
+        if counting:
+            stats.nodes_popped += 1
 
         # Goal check
         if (r, c) == end_node:
@@ -68,7 +175,16 @@ def solve_objective1(n, grid):
                     visited.add(neighbor_coord)
                     new_path_coords = path_coords + [neighbor_coord]
                     queue.append((neighbor_coord, new_path_coords))
+                    if counting:
+                        stats.nodes_pushed += 1
+                        stats.peak_open_set = max(stats.peak_open_set, len(queue))
+                        stats.peak_visited = max(stats.peak_visited, len(visited))
+
+    return path_found
 
+
+def _report_path(grid, path_found, output="text"):
+    """Calculates the outcome of the found path and prints it."""
     # --- Path Found - Now Calculate Outcome and Format Output ---
     if path_found:
         print("Path for Objective 1 (BFS - First Found Path):")
@@ -76,7 +192,6 @@ def solve_objective1(n, grid):
         current_coins = 0
         total_stolen = 0
         with_thief = False
-        path_description = []
 
         # Process start cell (0, 0)
         start_val = grid[0][0]
@@ -88,53 +203,19 @@ def solve_objective1(n, grid):
             # print(f"Debug: Start at (0,0), value {start_val}, coins={current_coins}")
 
         # Process the rest of the path
-        for i in range(1, len(path_found)):
-            prev_r, prev_c = path_found[i - 1]
-            curr_r, curr_c = path_found[i]
+        for curr_r, curr_c in path_found[1:]:
             cell_value = grid[curr_r][curr_c]
-
-            move = ""
-            if curr_r > prev_r:
-                move = "Down"
-            elif curr_c > prev_c:
-                move = "Right"
-
-            # Format cell value for description, handle '!'
-            value_str = str(cell_value) if cell_value != "!" else "!"
-            path_description.append(f"{move} ({value_str})")
-            # print(f"Debug: Moved {move} to ({curr_r},{curr_c}), value={cell_value}, thief_present={with_thief}")
+            # print(f"Debug: Moved to ({curr_r},{curr_c}), value={cell_value}, thief_present={with_thief}")
 
             # --- Apply Thief/Coin Logic ---
-            if with_thief:
-                if cell_value == "!":
-                    # Thief fight! Thief leaves.
-                    with_thief = False
-                    # print(f"Debug: Thief fight at ({curr_r},{curr_c}), thief leaves.")
-                elif isinstance(cell_value, int):
-                    if cell_value > 0:  # Treasure cell
-                        total_stolen += cell_value
-                        # print(f"Debug: Thief steals {cell_value} treasure at ({curr_r},{curr_c}). Stolen={total_stolen}")
-                    else:  # Normal cell (cost <= 0)
-                        # Cost is negative, amount stolen is positive abs(value)
-                        total_stolen += abs(cell_value)
-                        # print(f"Debug: Thief steals {-cell_value} cost at ({curr_r},{curr_c}). Stolen={total_stolen}")
-                    # Thief always leaves after stealing or encountering a non-thief cell
-                    with_thief = False
-                    # print(f"Debug: Thief leaves after action at ({curr_r},{curr_c}).")
-
-            else:  # Not currently with a thief
-                if cell_value == "!":
-                    # Pick up a new thief
-                    with_thief = True
-                    # print(f"Debug: Picked up thief at ({curr_r},{curr_c}).")
-                elif isinstance(cell_value, int):
-                    # Add treasure or apply cost
-                    current_coins += cell_value
-                    # print(f"Debug: Applied value {cell_value} at ({curr_r},{curr_c}). Coins={current_coins}")
-
-        # Print the formatted path description
-        for i, step in enumerate(path_description):
-            print(f"{i+1}. {step}")
+            coins_delta, stolen_delta, with_thief = apply_cell(with_thief, cell_value)
+            current_coins += coins_delta
+            total_stolen += stolen_delta
+
+        # Print the path description (or its encoded moves)
+        writer = PathWriter(output)
+        writer.add_path(path_found, grid)
+        writer.close()
 
         # Print the final results
         print(f"\nFinal Coins: {current_coins}")
@@ -144,6 +225,46 @@ def solve_objective1(n, grid):
         print("Objective 1: No path found from start to end.")
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(description="Objective 1: find a valid path.")
+    parser.add_argument(
+        "--solver",
+        choices=["stream", "bfs"],
+        default="stream",
+        help="stream rows in O(n) memory, or load the grid and run BFS "
+        "(needed once blocked cells exist; default: stream)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="with the stream solver, print the running coins/stolen totals "
+        "after each row on stderr",
+    )
+    search_stats.add_arguments(parser)
+    result_cache.add_arguments(parser)
+    path_io.add_arguments(parser)
+    return parser
+
+
+def main(args=None):
+    """Runs the phase; args are parsed from the command line unless given."""
+    if args is None:
+        args = build_parser().parse_args()
+    stats = search_stats.from_arguments(args)
+    cache = result_cache.from_arguments(args)
+
+    if args.solver == "bfs" and cache is not None:
+        solve_objective1_cached(cache, stats, args.output)
+    elif args.solver == "bfs":
+        with timed(stats, "parse"):
+            n_size, grid_data = parse_input()
+        solve_objective1(n_size, grid_data, stats, args.output)
+    else:
+        progress = sys.stderr if args.progress else None
+        solve_objective1_streaming(stats=stats, output=args.output, progress=progress)
+    if stats is not None:
+        stats.report()
+
+
 if __name__ == "__main__":
-    n_size, grid_data = parse_input()
-    solve_objective1(n_size, grid_data)
+    main()
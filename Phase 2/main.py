@@ -1,30 +1,36 @@
+import argparse
 import sys
 import heapq
+from pathlib import Path
 
+import numpy as np
 
-def parse_input():
-    """Reads the grid configuration from standard input."""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.anytime import DEFAULT_WEIGHT
+from common.heuristics import KINDS, resolve
+from common import cache as result_cache
+from common import stats as search_stats
+from common.map_io import parse_map, read_map, to_grid
+from common import path_io
+from common.path_io import PathWriter, encode_moves, path_moves
+from common.rules import apply_cell, score_cells
+from common.stats import timed
+
+
+def parse_input(data=None):
+    """Reads the grid configuration (text or binary map) from standard input."""
+    values, thief_mask = parse_arrays(data)
+    return values.shape[0], to_grid(values, thief_mask)
+
+
+def parse_arrays(data=None):
+    """
+    (values, thief_mask) of the map on standard input, or in data when the
+    input was already read. Exits on invalid input.
+    """
     try:
-        n = int(sys.stdin.readline().strip())
-        if n <= 0:
-            raise ValueError("Grid size must be positive.")
-        grid_repr = [sys.stdin.readline().split() for _ in range(n)]
-
-        grid = []
-        for r in range(n):
-            row_data = []
-            if len(grid_repr[r]) != n:
-                raise ValueError(f"Row {r} does not have {n} elements.")
-            for cell_repr in grid_repr[r]:
-                if cell_repr == "!":
-                    row_data.append("!")
-                else:
-                    try:
-                        row_data.append(int(cell_repr))
-                    except ValueError:
-                        raise ValueError(f"Invalid cell value: {cell_repr}")
-            grid.append(row_data)
-        return n, grid
+        return read_map(sys.stdin.buffer) if data is None else parse_map(data)
     except Exception as e:
         print(f"Error reading input: {e}", file=sys.stderr)
         sys.exit(1)
@@ -39,18 +45,12 @@ def calculate_path_outcome(n, grid, path_coords):
     if not path_coords:
         return 0, 0, []
 
-    current_coins = 0
     total_stolen = 0
-    with_thief = False
     path_description = []
 
     # Process start cell (0, 0)
     start_r, start_c = path_coords[0]
-    start_val = grid[start_r][start_c]
-    if start_val == "!":
-        with_thief = True
-    elif isinstance(start_val, int):
-        current_coins += start_val
+    current_coins, _, with_thief = apply_cell(False, grid[start_r][start_c])
 
     # Process the rest of the path
     for i in range(1, len(path_coords)):
@@ -67,138 +67,447 @@ def calculate_path_outcome(n, grid, path_coords):
         path_description.append(f"{move} ({value_str})")
 
         # --- Apply Thief/Coin Logic ---
-        if with_thief:
-            if cell_value == "!":
-                with_thief = False
-            elif isinstance(cell_value, int):
-                if cell_value > 0:
-                    total_stolen += cell_value
-                else:
-                    total_stolen += abs(cell_value)
-                with_thief = False
-        else:
-            if cell_value == "!":
-                with_thief = True
-            elif isinstance(cell_value, int):
-                current_coins += cell_value
+        coins_delta, stolen_delta, with_thief = apply_cell(with_thief, cell_value)
+        current_coins += coins_delta
+        total_stolen += stolen_delta
 
     return current_coins, total_stolen, path_description
 
 
-# --- Helper Function to Precompute an Optimistic Heuristic ---
-def compute_future_max(n, grid):
+# --- Helper Function to Rebuild a Path from the Predecessor Table ---
+def rebuild_path(n, parent, state_id):
     """
-    Compute an optimistic maximum coins reachable from each cell to the destination,
-    ignoring thief-related effects (treating thief cells as 0).
-    Allowed moves: Down and Right.
+    Follows predecessor links from state_id back to the start state.
+    Returns the list of (row, col) coordinates from (0, 0) to the given state.
     """
-
-    # Initialize a 2D array to store the maximum coins reachable from each cell to the destination.
-    dp = [[-float("inf")] * n for _ in range(n)]
-    for r in range(n - 1, -1, -1):
-        for c in range(n - 1, -1, -1):
-            # For heuristic purposes, treat "!" as 0 coin contribution.
-            cell_val = grid[r][c] if grid[r][c] != "!" else 0
-            if r == n - 1 and c == n - 1:
-                dp[r][c] = cell_val
-            else:
-                best_next = -float("inf")
-                if r + 1 < n:
-                    best_next = max(best_next, dp[r + 1][c])
-                if c + 1 < n:
-                    best_next = max(best_next, dp[r][c + 1])
-                dp[r][c] = cell_val + best_next
-    return dp
+    path = []
+    while state_id >= 0:
+        cell = state_id >> 1
+        path.append(divmod(cell, n))
+        state_id = parent[state_id]
+    path.reverse()
+    return path
 
 
 # --- Objective 2 Implementation with Informed Search (A*) ---
-def solve_objective2_informed(n, grid):
+def solve_objective2_informed(
+    values, thief_mask, heuristic="relaxed", stats=None, output="text"
+):
     """
     Finds the path that maximizes the final coin count using an informed A* search
+    over the (values, thief_mask) arrays of the map.
+    heuristic is a kind from common.heuristics.KINDS or a precomputed table of
+    future-cost lower bounds (negated future-coin upper bounds) per state.
+    With an admissible bound the search stops at the first goal pop; with
+    "zero" (not a bound, since future cells can add coins) it runs to exhaustion.
+    Pass a common.stats.SearchStats as stats to record search counters.
+    output is a format of common.path_io.
     """
     print("--- Objective 2: Maximize Final Coins (Informed A* Search) ---")
-    future_max = compute_future_max(n, grid)
-    start_node = (0, 0)
-    end_node = (n - 1, n - 1)
-
-    # Initial State: (row, col, has_thief)
-    start_val = grid[0][0]
-    initial_coins = 0
-    initial_thief = False
-    if start_val == "!":
-        initial_thief = True
-    elif isinstance(start_val, int):
-        initial_coins = start_val
-
-    initial_state = (0, 0, initial_thief)
-    # Priority Queue stores: (f, coins_so_far, row, col, thief_status, path_list)
-    # f = -(coins_so_far + future_max[r][c])
-    pq = []
-    initial_f = -(initial_coins + future_max[0][0])
-    heapq.heappush(pq, (initial_f, initial_coins, 0, 0, initial_thief, [start_node]))
-
-    # Dictionary to record the best coin count obtained for a given state:
-    best_state = {}
-    best_path = None
-    best_coins = -float("inf")
-
-    while pq:
-        f, coins, r, c, thief, path = heapq.heappop(pq)
-        state = (r, c, thief)
-        if coins < best_state.get(state, -float("inf")):
-            continue  # We already found a better way to this state
-
-        # Goal check: reached destination
-        if (r, c) == end_node:
-            if coins > best_coins:
-                best_coins = coins
-                best_path = path
-
-        # Expand Neighbors (Down and Right moves):
-        for move, nr, nc in [("Down", r + 1, c), ("Right", r, c + 1)]:
-            if nr < n and nc < n:
-                neighbor_value = grid[nr][nc]
-                new_coins = coins
-                new_thief = thief
-                # Transition logic according to thief/coin rules:
-                if thief:  # Arriving with a thief in the car:
-                    if neighbor_value == "!":
-                        new_thief = False  # Thief fight, thief leaves; coins unchanged.
-                    elif isinstance(neighbor_value, int):
-                        new_thief = (
-                            False  # Thief steals the coin value; coins remain the same.
-                        )
-                else:  # No thief in the car:
-                    if neighbor_value == "!":
+    n = values.shape[0]
+    # future_cost[state_id] <= -(coins still obtainable from that state)
+    with timed(stats, "heuristic"):
+        future_cost = resolve(heuristic, values, thief_mask, "coins")
+    stop_at_goal = not (isinstance(heuristic, str) and heuristic == "zero")
+    with timed(stats, "search"):
+        end_node = (n - 1, n - 1)
+        # Flat per-cell lookups, indexed by row * n + col.
+        cell_values = values.ravel().tolist()
+        cell_thief = thief_mask.ravel().tolist()
+
+        # Initial State: (row, col, has_thief)
+        initial_coins = 0
+        initial_thief = cell_thief[0]
+        if not initial_thief:
+            initial_coins = cell_values[0]
+
+        # Dense predecessor table indexed by state id = (row * n + col) * 2 + thief.
+        # Each entry holds the state id we arrived from (-1 for the start), so the
+        # route is rebuilt once at the goal instead of being copied on every push.
+        parent = [-1] * (n * n * 2)
+
+        # Priority Queue stores: (f, coins_so_far, row, col, thief_status)
+        # f = -coins_so_far + future_cost[state_id]; ties fall to the later
+        # fields, in the original order
+        pq = []
+        initial_f = -initial_coins + future_cost[initial_thief]
+        heapq.heappush(pq, (initial_f, initial_coins, 0, 0, initial_thief))
+
+        # Dictionary to record the best coin count obtained for a given state:
+        best_state = {(0, 0, initial_thief): initial_coins}
+        best_goal = -1
+        best_coins = -float("inf")
+        counting = stats is not None
+        if counting:
+            stats.nodes_pushed += 1
+            stats.peak_open_set = max(stats.peak_open_set, 1)
+            stats.peak_visited = max(stats.peak_visited, 1)
+
+        while pq:
+            f, coins, r, c, thief = heapq.heappop(pq)
+            state = (r, c, thief)
+            if counting:
+                stats.nodes_popped += 1
+            if coins < best_state.get(state, -float("inf")):
+                if counting:
+                    stats.stale_pops += 1
+                continue  # We already found a better way to this state
+            state_id = (r * n + c) * 2 + thief
+
+            # Goal check: reached destination
+            if (r, c) == end_node:
+                if coins > best_coins:
+                    best_coins = coins
+                    best_goal = state_id
+                if stop_at_goal:
+                    break  # No open state can still beat an admissible bound.
+
+            # Expand Neighbors (Down and Right moves):
+            for move, nr, nc in [("Down", r + 1, c), ("Right", r, c + 1)]:
+                if nr < n and nc < n:
+                    neighbor = nr * n + nc
+                    new_coins = coins
+                    # Transition logic according to thief/coin rules:
+                    if thief:  # Arriving with a thief in the car:
+                        # A thief fight or a theft; coins unchanged, thief leaves.
+                        new_thief = False
+                    elif cell_thief[neighbor]:  # No thief in the car:
                         new_thief = True  # Pick up thief.
-                    elif isinstance(neighbor_value, int):
-                        new_coins += neighbor_value  # Add coin value.
+                    else:
+                        new_coins += cell_values[neighbor]  # Add coin value.
                         new_thief = False
-                new_state = (nr, nc, new_thief)
-                if new_coins > best_state.get(new_state, -float("inf")):
-                    best_state[new_state] = new_coins
-                    new_path = path + [(nr, nc)]
-                    # f = -(new_coins + heuristic from neighbor)
-                    new_f = -(new_coins + future_max[nr][nc])
-                    heapq.heappush(pq, (new_f, new_coins, nr, nc, new_thief, new_path))
+                    new_state = (nr, nc, new_thief)
+                    if new_coins > best_state.get(new_state, -float("inf")):
+                        best_state[new_state] = new_coins
+                        new_state_id = (nr * n + nc) * 2 + new_thief
+                        parent[new_state_id] = state_id
+                        # f = -new_coins + heuristic from neighbor
+                        new_f = -new_coins + future_cost[new_state_id]
+                        heapq.heappush(pq, (new_f, new_coins, nr, nc, new_thief))
+                        if counting:
+                            stats.nodes_pushed += 1
+                            stats.peak_open_set = max(stats.peak_open_set, len(pq))
+                            stats.peak_visited = max(
+                                stats.peak_visited, len(best_state)
+                            )
+
+        best_path = rebuild_path(n, parent, best_goal) if best_goal >= 0 else None
+    with timed(stats, "outcome"):
+        grid = _path_grid(values, thief_mask, best_path)
+        _report_path(n, grid, best_path, "Informed", output=output)
+    return best_path
+
 
+# --- Objective 2 with a Budget: Anytime Weighted A* ---
+def solve_objective2_anytime(
+    values,
+    thief_mask,
+    heuristic="relaxed",
+    time_budget=None,
+    node_budget=None,
+    weight=DEFAULT_WEIGHT,
+    stats=None,
+    output="text",
+):
+    """
+    Finds the best path it can within a wall-clock (seconds) and/or node
+    budget (common.anytime). Each better path is announced as it is found,
+    with a bound on how many coins it may still be short of the optimum;
+    the last one is reported in full.
+    """
+    from common.anytime import anytime_search
+
+    print("--- Objective 2: Maximize Final Coins (Anytime A* Search) ---")
+    with timed(stats, "search"):
+        for result in anytime_search(
+            values,
+            thief_mask,
+            "coins",
+            heuristic,
+            weight=weight,
+            time_limit=time_budget,
+            node_limit=node_budget,
+            stats=stats,
+        ):
+            print(
+                f"[{result.seconds:.3f}s, {result.expanded} expanded] "
+                f"Final Coins: {result.coins}, at most {result.gap} below the optimum"
+            )
+    if result.optimal:
+        note = "The path is optimal."
+    else:
+        note = f"Budget spent: the optimum has at most {result.gap} more coins."
+    with timed(stats, "outcome"):
+        grid = _path_grid(values, thief_mask, result.path)
+        _report_path(values.shape[0], grid, result.path, "Anytime", note, output)
+    return result.path
+
+
+def _path_grid(values, thief_mask, path):
+    """
+    The cells of path as a sparse grid: grid[r][c], "!" for thieves (like
+    common.cache.Entry.grid); all that reporting a path needs.
+    """
+    grid = {}
+    if path:
+        rows, cols = np.array(path).T
+        cells = zip(
+            rows.tolist(),
+            cols.tolist(),
+            values[rows, cols].tolist(),
+            thief_mask[rows, cols].tolist(),
+        )
+        for r, c, value, thief in cells:
+            grid.setdefault(r, {})[c] = "!" if thief else value
+    return grid
+
+
+def _report_path(n, grid, best_path, label, note=None, output="text"):
+    """
+    Simulates the chosen path and prints it with its final outcome (and
+    note); grid[r][c] is only read along the path. output is a format of
+    common.path_io.
+    """
     if best_path:
         # Recalculate the final outcome for the best path found using full simulation.
-        final_coins, total_stolen, path_desc = calculate_path_outcome(
-            n, grid, best_path
+        cells = [grid[r][c] for r, c in best_path]
+        thief = [cell == "!" for cell in cells]
+        final_coins, total_stolen = score_cells(
+            [0 if t else cell for cell, t in zip(cells, thief)], thief
         )
-        print("Best Path Found for Maximum Coins (Informed):")
-        for i, step in enumerate(path_desc):
-            print(f"{i + 1}. {step}")
+        print(f"Best Path Found for Maximum Coins ({label}):")
+        writer = PathWriter(output)
+        writer.add(path_moves(best_path), cells[1:])
+        writer.close()
         print(f"\nFinal Coins: {final_coins}")
         print(f"Total Stolen: {total_stolen}")
+        if note:
+            print(note)
     else:
         print("No path found to the destination.")
     print("-" * 20)
 
 
-if __name__ == "__main__":
-    n_size, grid_data = parse_input()
+# --- Objective 2 Implementation with the Exact Anti-Diagonal DP ---
+def solve_objective2_dp(values, thief_mask, stats=None, output="text"):
+    """
+    Finds the path that maximizes the final coin count with the exact
+    vectorized dynamic program over the Down/Right DAG. The DP has no open
+    set, so stats only records timings.
+    """
+    from common.dp_solver import solve_max_coins
+
+    print("--- Objective 2: Maximize Final Coins (Exact DP) ---")
+    with timed(stats, "search"):
+        best_path, _, _ = solve_max_coins(values, thief_mask)
+    with timed(stats, "outcome"):
+        grid = _path_grid(values, thief_mask, best_path)
+        _report_path(values.shape[0], grid, best_path, "DP", output=output)
+    return best_path
+
+
+# --- Objective 2 with the Multi-Core Tiled Wavefront DP ---
+def solve_objective2_parallel(
+    values, thief_mask, stats=None, workers=None, output="text"
+):
+    """
+    Same result as solve_objective2_dp, computed tile by tile in wavefront
+    order on a process pool (common.parallel).
+    """
+    from common.parallel import solve_parallel
+
+    print("--- Objective 2: Maximize Final Coins (Parallel DP) ---")
+    best_path, _, _ = solve_parallel(values, thief_mask, "coins", workers, stats=stats)
+    with timed(stats, "outcome"):
+        grid = _path_grid(values, thief_mask, best_path)
+        _report_path(values.shape[0], grid, best_path, "Parallel DP", output=output)
+    return best_path
+
+
+# --- Objective 2: the k best paths instead of the single optimum ---
+def solve_objective2_top_k(values, thief_mask, k, stats=None, output="text"):
+    """
+    Lists the k paths with the most final coins, best first, using lazy
+    k-best enumeration over the exact cost-to-go table (common.kbest).
+    """
+    from common.kbest import k_best_paths
+
+    print(f"--- Objective 2: Top {k} Paths for Maximum Coins ---")
+    n = values.shape[0]
+    with timed(stats, "search"):
+        paths = list(k_best_paths(values, thief_mask, "coins", k))
+    with timed(stats, "outcome"):
+        for i, (path, final_coins, total_stolen) in enumerate(paths):
+            print(
+                f"Path {i + 1}: Final Coins: {final_coins}, "
+                f"Total Stolen: {total_stolen}"
+            )
+            if output == "text":
+                grid = _path_grid(values, thief_mask, path)
+                _, _, path_desc = calculate_path_outcome(n, grid, path)
+                print("   " + ", ".join(path_desc))
+            else:
+                print(f"   Moves: {encode_moves(path_moves(path), output)}")
+    print("-" * 20)
+
+
+SOLVERS = {
+    "astar": solve_objective2_informed,
+    "anytime": solve_objective2_anytime,
+    "dp": solve_objective2_dp,
+    "parallel": solve_objective2_parallel,
+}
+
+
+def run_solver(args, values, thief_mask, stats=None):
+    """
+    Runs the solver selected on the command line on the map's arrays;
+    returns its best path.
+    """
+    if args.solver == "astar":
+        return solve_objective2_informed(
+            values,
+            thief_mask,
+            heuristic=args.heuristic,
+            stats=stats,
+            output=args.output,
+        )
+    if args.solver == "anytime":
+        return solve_objective2_anytime(
+            values,
+            thief_mask,
+            heuristic=args.heuristic,
+            time_budget=args.time_budget,
+            node_budget=args.node_budget,
+            weight=args.weight,
+            stats=stats,
+            output=args.output,
+        )
+    if args.solver == "parallel":
+        return solve_objective2_parallel(
+            values, thief_mask, stats=stats, workers=args.workers, output=args.output
+        )
+    return SOLVERS[args.solver](values, thief_mask, stats=stats, output=args.output)
+
 
-    # --- (Informed A* Search for maximizing coins) ---
-    solve_objective2_informed(n_size, grid_data)
+def solve_objective2_cached(cache, args, stats=None):
+    """
+    run_solver on standard input through the result cache: a map seen before
+    is answered from the cache, keyed by its raw bytes first, without
+    parsing or searching.
+    """
+    with timed(stats, "parse"):
+        data = sys.stdin.buffer.read()
+
+    def load():
+        with timed(stats, "parse"):
+            return parse_arrays(data)
+
+    def solve(values, thief_mask):
+        return run_solver(args, values, thief_mask, stats)
+
+    solver = f"astar/{args.heuristic}" if args.solver == "astar" else args.solver
+    entry, hit = result_cache.solve_cached(
+        cache, result_cache.bytes_alias(data), "coins", solver, load, solve
+    )
+    if hit:
+        print("--- Objective 2: Maximize Final Coins (Cached Result) ---")
+        with timed(stats, "outcome"):
+            _report_path(
+                entry.n, entry.grid(), entry.path, "Cached", output=args.output
+            )
+
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def heuristic_weight(text):
+    """argparse type for --weight: a number of at least 1 (1 is plain A*)."""
+    value = float(text)
+    if not value >= 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Objective 2: maximize final coins.")
+    parser.add_argument(
+        "--solver",
+        choices=sorted(SOLVERS),
+        default="astar",
+        help="search engine to use (default: astar)",
+    )
+    parser.add_argument(
+        "--heuristic",
+        choices=KINDS,
+        default="relaxed",
+        help="A* heuristic table (default: relaxed)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help="wall-clock budget for --solver anytime (default: none)",
+    )
+    parser.add_argument(
+        "--node-budget",
+        type=int,
+        metavar="N",
+        help="expanded-state budget for --solver anytime (default: none)",
+    )
+    parser.add_argument(
+        "--weight",
+        type=heuristic_weight,
+        default=DEFAULT_WEIGHT,
+        help="weight of the heuristic for --solver anytime "
+        f"(default: {DEFAULT_WEIGHT})",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=positive_int,
+        default=1,
+        metavar="K",
+        help="list the K best paths instead of the single optimum",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker processes for --solver parallel (default: CPU count)",
+    )
+    search_stats.add_arguments(parser)
+    result_cache.add_arguments(parser)
+    path_io.add_arguments(parser)
+    return parser
+
+
+def main(args=None):
+    """Runs the phase; args are parsed from the command line unless given."""
+    if args is None:
+        args = build_parser().parse_args()
+    stats = search_stats.from_arguments(args)
+    cache = result_cache.from_arguments(args)
+
+    # --- (Informed A* Search or exact DP for maximizing coins) ---
+    # Anytime results depend on the budget, so they are never cached.
+    if cache is not None and args.top_k == 1 and args.solver != "anytime":
+        solve_objective2_cached(cache, args, stats)
+    else:
+        with timed(stats, "parse"):
+            values, thief_mask = parse_arrays()
+        if args.top_k > 1:
+            solve_objective2_top_k(
+                values, thief_mask, args.top_k, stats=stats, output=args.output
+            )
+        else:
+            run_solver(args, values, thief_mask, stats)
+    if stats is not None:
+        stats.report()
+
+
+if __name__ == "__main__":
+    main()
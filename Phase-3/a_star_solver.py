@@ -1,83 +1,256 @@
-import heapq
+from heapq import heappop, heappush
 import numpy as np
-from utils import Node, reconstruct_path_nodes, calculate_final_stats
-from map_loader import THIEF_MARKER_INTERNAL
+from common.anytime import DEFAULT_WEIGHT, anytime_search
+from common.heuristics import resolve
+from common.stats import timed
+from utils import NodeArena, calculate_final_stats
 
-def solve_scenario3_astar(game_map, n):
-    """سناریوی 3 (کمترین زیان) را با A* حل می‌کند."""
+QUEUES = ("bucket", "heap")
+
+def solve_scenario3_astar(game_map, n, heuristic="zero", stats=None, queue="bucket"):
+    """
+    سناریوی 3 (کمترین زیان) را با A* حل می‌کند.
+    heuristic: نوعی از common.heuristics.KINDS یا جدول از پیش محاسبه‌شده (n, n, 2)
+    stats: در صورت دادن common.stats.SearchStats، شمارنده‌های جستجو ثبت می‌شوند
+    queue: صف اولویت، "bucket" (radix heap، _search_buckets) یا "heap" (heapq، _search)؛
+           "bucket" به جدول سازگار (consistent) نیاز دارد، مانند همه KINDS
+    """
+    if queue not in QUEUES:
+        raise ValueError(f"Unknown queue: {queue}")
+    # هیوریستیک به صورت جدول تخت بر اساس شماره حالت (h=0 : Dijkstra ساده)
+    if isinstance(heuristic, str) and heuristic == "zero":
+        h = None
+    else:
+        with timed(stats, "heuristic"):
+            h = resolve(heuristic, game_map.values, game_map.thief_mask(), "stolen")
+
+    # حالت‌ها شماره‌های صحیح در NodeArena هستند: (r * n + c) * 2 + has_thief
+    arena = NodeArena(n)
+    search = _search if queue == "heap" else _search_buckets
+    with timed(stats, "search"):
+        goal_state = search(game_map, n, h, arena, stats)
+    if goal_state < 0:
+        return None, 0, 0 # مسیر پیدا نشد
+
+    with timed(stats, "outcome"):
+        path_nodes = arena.path_nodes(goal_state)
+        final_coins, total_stolen = calculate_final_stats(path_nodes, game_map)
+    final_path_coords = [(node.r, node.c) for node in path_nodes]
+    return final_path_coords, final_coins, total_stolen # مسیر پیدا شد
+
+
+def solve_scenario3_anytime(game_map, n, heuristic="relaxed", time_budget=None,
+                            node_budget=None, weight=DEFAULT_WEIGHT, stats=None):
+    """
+    سناریوی 3 با بودجه زمانی (ثانیه) و/یا بودجه گره (common.anytime).
+    هر مسیر بهتر همراه با کران فاصله‌اش از بهینه چاپ می‌شود و بهترین
+    مسیر پیدا شده تا پایان بودجه برگردانده می‌شود.
+    """
+    with timed(stats, "search"):
+        for result in anytime_search(game_map.values, game_map.thief_mask(), "stolen", heuristic,
+                                     weight=weight, time_limit=time_budget,
+                                     node_limit=node_budget, stats=stats):
+            print(f"[{result.seconds:.3f}s, {result.expanded} expanded] "
+                  f"Stolen: {result.stolen}, at most {result.gap} above the optimum")
+    if result.optimal:
+        print("The route is optimal.")
+    else:
+        print(f"Budget spent: at most {result.gap} of the stolen coins could still be saved.")
+    return result.path, result.coins, result.stolen
+
+
+def _search(game_map, n, h, arena, stats):
+    """حلقه A*؛ شماره حالت هدف را برمی‌گرداند (یا -1 اگر مسیری نباشد)"""
     start_r, start_c = 0, 0
     goal_r, goal_c = n - 1, n - 1
 
-    # تابع هیوریستیک (h=0 : خوش‌بینانه برای کمینه کردن زیان)
-    def heuristic(r, c, has_thief):
-        return 0
+    g_cost, parent = arena.g_cost, arena.parent
 
     # تعیین وضعیت اولیه (دزد در خانه شروع؟)
-    initial_cell_value = game_map[start_r, start_c]
-    initial_has_thief = (initial_cell_value == THIEF_MARKER_INTERNAL)
-    initial_g_cost = 0 # زیان اولیه صفر است
-
-    start_node = Node(start_r, start_c, initial_has_thief,
-                      g_cost=initial_g_cost,
-                      h_cost=heuristic(start_r, start_c, initial_has_thief))
+    initial_has_thief = game_map.is_thief(start_r, start_c)
+    start_state = arena.state_id(start_r, start_c, initial_has_thief)
+    g_cost[start_state] = 0 # زیان اولیه صفر است
 
-    open_set = []  # صف اولویت (min-heap)
-    heapq.heappush(open_set, start_node)
+    # صف اولویت (min-heap) از تاپل‌های ساده: (f_cost, -state, g_cost)
+    # در تساوی f، حالت با شماره بزرگ‌تر (نزدیک‌تر به هدف) زودتر باز می‌شود
+    open_set = [(h[start_state] if h is not None else 0, -start_state, 0)]
 
-    # مجموعه یا دیکشنری برای نودهای بازدید شده و هزینه رسیدن به آن‌ها
-    # key: (r, c, has_thief), value: g_cost
-    visited = {}
-    visited[(start_node.r, start_node.c, start_node.has_thief)] = start_node.g_cost
+    # دسترسی سریع به خانه‌ها بدون ایندکس‌گذاری NumPy: مقدار خانه و بیت دزد
+    values = memoryview(np.ascontiguousarray(game_map.values)).cast("B").cast("i")
+    thief_bits = memoryview(np.ascontiguousarray(game_map.thief_bits)).cast("B")
+    row_bytes = game_map.thief_bits.shape[1]
+    goal_cell = goal_r * n + goal_c
+    # شمارش فقط وقتی stats داده شده باشد (بدون هزینه در حالت عادی)
+    counting = stats is not None
+    if counting:
+        stats.nodes_pushed += 1
+        stats.peak_open_set = max(stats.peak_open_set, 1)
+        visited = 1
 
     while open_set:
-        current_node = heapq.heappop(open_set)
+        _, state, g = heappop(open_set)
+        state = -state
+        if counting:
+            stats.nodes_popped += 1
+        if g > g_cost[state]:
+            if counting:
+                stats.stale_pops += 1
+            continue # ورودی کهنه: بعداً مسیر بهتری به این حالت پیدا شده
 
+        cell = state >> 1
         # بررسی رسیدن به هدف
-        if current_node.r == goal_r and current_node.c == goal_c:
-            path_nodes = reconstruct_path_nodes(current_node)
-            final_coins, total_stolen = calculate_final_stats(path_nodes, game_map)
-            final_path_coords = [(node.r, node.c) for node in path_nodes]
-            return final_path_coords, final_coins, total_stolen # مسیر پیدا شد
+        if cell == goal_cell:
+            break
 
-        # تولید جانشین‌ها (حرکت به پایین و راست)
-        for move in [(1, 0), (0, 1)]: # پایین, راست
-            next_r, next_c = current_node.r + move[0], current_node.c + move[1]
+        has_thief = state & 1
+        r, c = divmod(cell, n)
 
+        # تولید جانشین‌ها (حرکت به پایین و راست)
+        for next_r, next_c in ((r + 1, c), (r, c + 1)): # پایین, راست
             # بررسی معتبر بودن مختصات
-            if 0 <= next_r < n and 0 <= next_c < n:
-                next_cell_value = game_map[next_r, next_c]
-                step_loss = 0 # زیان این حرکت خاص
-                next_has_thief = False # وضعیت دزد *بعد از* ورود به خانه بعدی
+            if next_r < n and next_c < n:
+                next_cell = next_r * n + next_c
+                next_is_thief = thief_bits[next_r * row_bytes + (next_c >> 3)] >> (next_c & 7) & 1
 
                 # محاسبه زیان و وضعیت دزد بعدی
-                if current_node.has_thief: # اگر دزد از خانه فعلی همراه بود
-                    if next_cell_value == THIEF_MARKER_INTERNAL:
-                        step_loss = 0
-                        next_has_thief = False # دعوا شد، دزد فعلی رفت
-                    elif next_cell_value > 0: # گنجینه
-                        step_loss = next_cell_value
-                        next_has_thief = False # دزد گنج را برد و رفت
-                    else: # عادی (منفی)
-                        step_loss = abs(next_cell_value)
-                        next_has_thief = False # دزد پول را گرفت و رفت
+                if has_thief: # اگر دزد از خانه فعلی همراه بود
+                    # دعوا (زیان صفر) یا دزدی گنج/پول؛ دزد در هر حال می‌رود
+                    step_loss = 0 if next_is_thief else abs(values[next_cell])
+                    next_has_thief = 0
                 else: # دزدی همراه نبود
                     step_loss = 0
-                    if next_cell_value == THIEF_MARKER_INTERNAL:
-                        next_has_thief = True # دزد جدید سوار شد
+                    next_has_thief = next_is_thief # دزد جدید سوار می‌شود (یا نه)
+
+                # بررسی و به‌روزرسانی بهترین هزینه حالت جانشین
+                new_g_cost = g + step_loss
+                next_state = next_cell * 2 + next_has_thief
+                if new_g_cost < g_cost[next_state]:
+                    if counting:
+                        stats.nodes_pushed += 1
+                        stats.peak_open_set = max(stats.peak_open_set, len(open_set) + 1)
+                        visited += g_cost[next_state] == NodeArena.UNSEEN
+                    g_cost[next_state] = new_g_cost
+                    parent[next_state] = state
+                    new_f_cost = new_g_cost + h[next_state] if h is not None else new_g_cost
+                    heappush(open_set, (new_f_cost, -next_state, new_g_cost))
+    else:
+        state = -1 # صف خالی شد و هدف دیده نشد
+
+    if counting:
+        stats.peak_visited = max(stats.peak_visited, visited)
+    return state
+
+def _search_buckets(game_map, n, h, arena, stats):
+    """
+    همان حلقه _search با صف سطلی (radix heap) به جای heapq.
+    Losses are non-negative integers and every table of common.heuristics
+    is consistent, so f never decreases along the search: a state pushed
+    from f has f' = f + loss + h(next) - h(state) >= f. That makes a
+    monotone radix heap exact. Bucket 0 holds the states with f equal to
+    the last popped f ("last"); bucket i holds those whose f first differs
+    from last in bit i - 1. Pushes are O(1). When bucket 0 runs dry, the
+    lowest non-empty bucket is spread over the lower ones around its
+    smallest f; an entry only ever moves to a lower bucket, so pops cost
+    O(log C) amortized, C being the largest jump in f.
+    Bucket 0 is emptied LIFO, so among equal f the state just reached is
+    expanded first. That is close to the ties of _search but not the same
+    order (entries moved down from a higher bucket keep no such order), so
+    among routes of equal loss the two queues can return different ones;
+    only the loss is the same. A stale entry is recognized by its f:
+    g = f - h[state] is above the state's best g_cost.
+    """
+    g_cost, parent = arena.g_cost, arena.parent
+
+    initial_has_thief = game_map.is_thief(0, 0)
+    start_state = arena.state_id(0, 0, initial_has_thief)
+    g_cost[start_state] = 0
+
+    # سطل 0 شماره حالت‌ها را نگه می‌دارد؛ بقیه f و حالت را در یک عدد:
+    # (f << state_bits) | state
+    state_bits = (n * n * 2).bit_length()
+    state_mask = (1 << state_bits) - 1
+    last = h[start_state] if h is not None else 0
+    buckets = [[] for _ in range(65)]
+    current = buckets[0]
+    current.append(start_state)
+
+    values = memoryview(np.ascontiguousarray(game_map.values)).cast("B").cast("i")
+    thief_bits = memoryview(np.ascontiguousarray(game_map.thief_bits)).cast("B")
+    row_bytes = game_map.thief_bits.shape[1]
+    goal_cell = (n - 1) * n + (n - 1)
+    counting = stats is not None
+    if counting:
+        stats.nodes_pushed += 1
+        stats.peak_open_set = max(stats.peak_open_set, 1)
+        visited = 1
+        queued = 1
+
+    goal_state = -1
+    while True:
+        if not current:
+            # پر کردن سطل 0 از پایین‌ترین سطل غیرخالی
+            for i in range(1, 65):
+                if buckets[i]:
+                    break
+            else:
+                break # صف خالی شد و هدف دیده نشد
+            items = buckets[i]
+            buckets[i] = []
+            last = min(items) >> state_bits
+            for item in items:
+                f = item >> state_bits
+                if f == last:
+                    current.append(item & state_mask)
+                else:
+                    buckets[(f ^ last).bit_length()].append(item)
+
+        state = current.pop()
+        g = last - h[state] if h is not None else last
+        if counting:
+            stats.nodes_popped += 1
+            queued -= 1
+        if g > g_cost[state]:
+            if counting:
+                stats.stale_pops += 1
+            continue # ورودی کهنه
+
+        cell = state >> 1
+        if cell == goal_cell:
+            goal_state = state
+            break
+
+        has_thief = state & 1
+        r, c = divmod(cell, n)
+        # راست اول: حالت پایین (شماره بزرگ‌تر) آخر اضافه و زودتر باز می‌شود
+        for next_r, next_c in ((r, c + 1), (r + 1, c)): # راست, پایین
+            if next_r < n and next_c < n:
+                next_cell = next_r * n + next_c
+                next_is_thief = thief_bits[next_r * row_bytes + (next_c >> 3)] >> (next_c & 7) & 1
+                if has_thief:
+                    step_loss = 0 if next_is_thief else abs(values[next_cell])
+                    next_has_thief = 0
+                else:
+                    step_loss = 0
+                    next_has_thief = next_is_thief
+
+                new_g_cost = g + step_loss
+                next_state = next_cell * 2 + next_has_thief
+                if new_g_cost < g_cost[next_state]:
+                    new_f_cost = new_g_cost + h[next_state] if h is not None else new_g_cost
+                    if new_f_cost == last:
+                        current.append(next_state)
+                    elif new_f_cost > last:
+                        buckets[(new_f_cost ^ last).bit_length()].append(new_f_cost << state_bits | next_state)
                     else:
-                        next_has_thief = False # همچنان بدون دزد
-
-                # محاسبه هزینه‌های نود جانشین
-                new_g_cost = current_node.g_cost + step_loss
-                new_h_cost = heuristic(next_r, next_c, next_has_thief)
-                successor_node = Node(next_r, next_c, next_has_thief,
-                                    g_cost=new_g_cost, h_cost=new_h_cost,
-                                    parent=current_node)
-
-                # بررسی وضعیت در مجموعه visited
-                successor_state = (successor_node.r, successor_node.c, successor_node.has_thief)
-                if successor_state not in visited or new_g_cost < visited[successor_state]:
-                    visited[successor_state] = new_g_cost
-                    heapq.heappush(open_set, successor_node)
-
-    return None, 0, 0 # مسیر پیدا نشد
\ No newline at end of file
+                        raise ValueError("The heuristic table is not consistent; use queue=\"heap\".")
+                    if counting:
+                        stats.nodes_pushed += 1
+                        queued += 1
+                        stats.peak_open_set = max(stats.peak_open_set, queued)
+                        visited += g_cost[next_state] == NodeArena.UNSEEN
+                    g_cost[next_state] = new_g_cost
+                    parent[next_state] = state
+
+    if counting:
+        stats.peak_visited = max(stats.peak_visited, visited)
+    return goal_state
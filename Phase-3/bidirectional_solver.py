@@ -0,0 +1,163 @@
+from heapq import heappop, heappush
+import numpy as np
+from common.stats import timed
+from utils import Node, NodeArena, calculate_final_stats
+
+def solve_scenario3_bidirectional(game_map, n, stats=None):
+    """
+    سناریوی 3 (کمترین زیان) با جستجوی دوطرفه (Dijkstra از شروع و از هدف).
+    Both searches run with h = 0 and meet in the middle; the result is
+    optimal, like solve_scenario3_astar with the zero heuristic.
+    stats: در صورت دادن common.stats.SearchStats، شمارنده‌های هر دو جستجو ثبت می‌شوند
+    """
+    # جستجوی رو به جلو: g و والد هر حالت؛ جستجوی رو به عقب: زیان تا هدف و حالت بعدی مسیر
+    forward = NodeArena(n)
+    backward = NodeArena(n)
+    with timed(stats, "search"):
+        meet_state = _search(game_map, n, forward, backward, stats)
+    if meet_state < 0:
+        return None, 0, 0 # مسیر پیدا نشد
+
+    with timed(stats, "outcome"):
+        path_nodes = forward.path_nodes(meet_state)
+        state = backward.parent[meet_state]
+        while state >= 0:
+            r, c, has_thief = forward.decode(state)
+            path_nodes.append(Node(r, c, has_thief, parent=path_nodes[-1]))
+            state = backward.parent[state]
+        final_coins, total_stolen = calculate_final_stats(path_nodes, game_map)
+    final_path_coords = [(node.r, node.c) for node in path_nodes]
+    return final_path_coords, final_coins, total_stolen # مسیر پیدا شد
+
+
+def _search(game_map, n, forward, backward, stats):
+    """
+    حلقه دوطرفه؛ حالتی را که بهترین مسیر از آن می‌گذرد برمی‌گرداند (یا -1).
+
+    Backward edges undo one forward step. Entering a cell from state t gives:
+        t = 1 -> state 0, loss |value| (0 on a thief cell: a fight)
+        t = 0 -> state 1 on a thief cell (the thief rides to the next cell),
+                 state 0 otherwise; no loss
+    so the predecessors of (cell, 1) are (up / left, 0) when cell is a thief,
+    and those of (cell, 0) are (up / left, 1), plus (up / left, 0) when cell
+    is not a thief.
+
+    best is the cheapest start-to-goal path seen so far (g_forward + g_backward
+    of a state both searches reached). Every unseen path costs at least the
+    sum of the two smallest keys in the queues, so once that sum reaches best
+    no cheaper path is left.
+    """
+    g_fwd, parent = forward.g_cost, forward.parent
+    g_bwd, successor = backward.g_cost, backward.parent
+    unseen = NodeArena.UNSEEN
+
+    values = memoryview(np.ascontiguousarray(game_map.values)).cast("B").cast("i")
+    thief_bits = memoryview(np.ascontiguousarray(game_map.thief_bits)).cast("B")
+    row_bytes = game_map.thief_bits.shape[1]
+
+    def is_thief(cell):
+        r, c = divmod(cell, n)
+        return thief_bits[r * row_bytes + (c >> 3)] >> (c & 7) & 1
+
+    # شروع: دزد خانه (0,0) سوار می‌شود؛ هدف: هر دو وضعیت دزد در خانه آخر
+    start_state = is_thief(0)
+    g_fwd[start_state] = 0
+    open_fwd = [(0, -start_state)]
+    goal_cell = n * n - 1
+    goal_states = [goal_cell * 2]
+    if is_thief(goal_cell):
+        goal_states.append(goal_cell * 2 + 1)
+    open_bwd = []
+    for state in goal_states:
+        g_bwd[state] = 0
+        heappush(open_bwd, (0, state))
+
+    best, meet_state = unseen, -1
+    for state in goal_states:
+        if g_fwd[state] == 0:
+            best, meet_state = 0, state # نقشه 1x1
+
+    counting = stats is not None
+    if counting:
+        stats.nodes_pushed += 1 + len(goal_states)
+        stats.peak_open_set = max(stats.peak_open_set, 1 + len(goal_states))
+        visited = 1 + len(goal_states)
+
+    while open_fwd and open_bwd:
+        # معیار توقف: هیچ مسیر دیده‌نشده‌ای ارزان‌تر از best نیست
+        if open_fwd[0][0] + open_bwd[0][0] >= best:
+            break
+        # طرفی را گسترش بده که صف کوچک‌تری دارد
+        if len(open_fwd) <= len(open_bwd):
+            g, state = heappop(open_fwd)
+            state = -state
+            if counting:
+                stats.nodes_popped += 1
+            if g > g_fwd[state]:
+                if counting:
+                    stats.stale_pops += 1
+                continue # ورودی کهنه
+            cell, has_thief = state >> 1, state & 1
+            r, c = divmod(cell, n)
+            for next_r, next_c in ((r + 1, c), (r, c + 1)): # پایین, راست
+                if next_r < n and next_c < n:
+                    next_cell = next_r * n + next_c
+                    next_is_thief = is_thief(next_cell)
+                    if has_thief: # دعوا یا دزدی؛ دزد در هر حال می‌رود
+                        step_loss = 0 if next_is_thief else abs(values[next_cell])
+                        next_state = next_cell * 2
+                    else:
+                        step_loss = 0
+                        next_state = next_cell * 2 + next_is_thief
+                    new_g = g + step_loss
+                    if new_g < g_fwd[next_state]:
+                        if counting:
+                            stats.nodes_pushed += 1
+                            visited += g_fwd[next_state] == unseen and g_bwd[next_state] == unseen
+                        g_fwd[next_state] = new_g
+                        parent[next_state] = state
+                        heappush(open_fwd, (new_g, -next_state))
+                        # جستجوی عقب هم به این حالت رسیده است؟
+                        if g_bwd[next_state] != unseen and new_g + g_bwd[next_state] < best:
+                            best, meet_state = new_g + g_bwd[next_state], next_state
+        else:
+            g, state = heappop(open_bwd)
+            if counting:
+                stats.nodes_popped += 1
+            if g > g_bwd[state]:
+                if counting:
+                    stats.stale_pops += 1
+                continue # ورودی کهنه
+            cell, has_thief = state >> 1, state & 1
+            cell_is_thief = is_thief(cell)
+            if has_thief and not cell_is_thief:
+                continue # این حالت از جلو قابل دسترسی نیست
+            r, c = divmod(cell, n)
+            # حالت‌های قبلی (از بالا یا چپ) و زیان ورود به این خانه از هرکدام
+            if has_thief:
+                entries = ((0, 0),)
+            elif cell_is_thief:
+                entries = ((1, 0),) # دعوا
+            else:
+                entries = ((1, abs(values[cell])), (0, 0))
+            for prev_r, prev_c in ((r - 1, c), (r, c - 1)): # بالا, چپ
+                if prev_r >= 0 and prev_c >= 0:
+                    prev_cell = prev_r * n + prev_c
+                    for prev_thief, step_loss in entries:
+                        prev_state = prev_cell * 2 + prev_thief
+                        new_g = g + step_loss
+                        if new_g < g_bwd[prev_state]:
+                            if counting:
+                                stats.nodes_pushed += 1
+                                visited += g_bwd[prev_state] == unseen and g_fwd[prev_state] == unseen
+                            g_bwd[prev_state] = new_g
+                            successor[prev_state] = state
+                            heappush(open_bwd, (new_g, prev_state))
+                            if g_fwd[prev_state] != unseen and g_fwd[prev_state] + new_g < best:
+                                best, meet_state = g_fwd[prev_state] + new_g, prev_state
+        if counting:
+            stats.peak_open_set = max(stats.peak_open_set, len(open_fwd) + len(open_bwd))
+
+    if counting:
+        stats.peak_visited = max(stats.peak_visited, visited)
+    return meet_state
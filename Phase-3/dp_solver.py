@@ -0,0 +1,13 @@
+from common.dp_solver import solve_min_stolen
+from common.parallel import solve_parallel
+from common.stats import timed
+
+def solve_scenario3_dp(game_map, n, stats=None):
+    """Solves scenario 3 (minimum loss) exactly with the anti-diagonal DP."""
+    with timed(stats, "search"):
+        return solve_min_stolen(game_map.values, game_map.thief_mask())
+
+
+def solve_scenario3_parallel(game_map, n, stats=None, workers=None):
+    """Same as solve_scenario3_dp, with the tiled wavefront on a process pool."""
+    return solve_parallel(game_map.values, game_map.thief_mask(), "stolen", workers, stats=stats)
@@ -1,25 +1,168 @@
-from map_loader import load_map
-from a_star_solver import solve_scenario3_astar
+import argparse
+import sys
 from pathlib import Path
 
-def main():
-    map_file = Path("Phase-3", "map2.txt")
-    try:
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from map_loader import load_map
+from a_star_solver import QUEUES, solve_scenario3_anytime, solve_scenario3_astar
+from bidirectional_solver import solve_scenario3_bidirectional
+from dp_solver import solve_scenario3_dp, solve_scenario3_parallel
+from common import cache as result_cache
+from common.anytime import DEFAULT_WEIGHT
+from common import path_io
+from common import stats as search_stats
+from common.heuristics import KINDS
+from common.kbest import k_best_paths
+from common.path_io import encode_moves, path_moves
+from common.stats import timed
+
+SOLVERS = {
+    "anytime": ("anytime A*", solve_scenario3_anytime),
+    "astar": ("A*", solve_scenario3_astar),
+    "bidirectional": ("bidirectional search", solve_scenario3_bidirectional),
+    "dp": ("exact DP", solve_scenario3_dp),
+    "parallel": ("parallel DP", solve_scenario3_parallel),
+}
+
+def load_and_report(map_file, stats=None):
+    with timed(stats, "parse"):
         game_map, n = load_map(map_file)
-        print(f"Map {n}x{n} loaded from file '{map_file}'.")
+    print(f"Map {n}x{n} loaded from file '{map_file}'.")
+    print("-" * 30)
+    return game_map, n
+
+
+def run_solver(args, game_map, n, stats=None):
+    """Runs the solver selected on the command line; returns (path, coins, stolen)."""
+    solver_name, solver = SOLVERS[args.solver]
+    print(f"Solving scenario 3 (minimum loss) with {solver_name}...")
+    if args.solver == "astar":
+        return solver(game_map, n, heuristic=args.heuristic or "zero", stats=stats, queue=args.queue)
+    if args.solver == "anytime":
+        return solver(game_map, n, heuristic=args.heuristic or "relaxed", time_budget=args.time_budget,
+                      node_budget=args.node_budget, weight=args.weight, stats=stats)
+    if args.solver == "parallel":
+        return solver(game_map, n, stats=stats, workers=args.workers)
+    return solver(game_map, n, stats=stats)
+
+
+def solve_cached(cache, args, stats=None):
+    """
+    run_solver through the result cache (common.cache): a map file solved
+    before is answered without loading it.
+    """
+    loaded = []
+
+    def load():
+        game_map, _ = load_and_report(args.map_file, stats)
+        loaded.append(game_map)
+        return game_map.values, game_map.thief_mask()
+
+    def solve(values, thief_mask):
+        return run_solver(args, loaded[0], values.shape[0], stats)[0]
+
+    # The two queues can return different routes of equal loss.
+    solver = f"astar/{args.heuristic or 'zero'}/{args.queue}" if args.solver == "astar" else args.solver
+    alias = result_cache.file_alias(args.map_file)
+    entry, hit = result_cache.solve_cached(cache, alias, "stolen", solver, load, solve)
+    if hit:
+        print(f"Result for the {entry.n}x{entry.n} map '{args.map_file}' found in the result cache.")
         print("-" * 30)
+    if entry is None:
+        return None, 0, 0
+    return entry.path, entry.coins, entry.stolen
 
-        print("Solving scenario 3 (minimum loss) with A*...")
-        path3, coins3, stolen3 = solve_scenario3_astar(game_map, n)
+
+def format_path(path, output):
+    """The path as a coordinate list ("text") or its encoded moves."""
+    if output == "text":
+        return f"Path: {path}"
+    return f"Moves: {encode_moves(path_moves(path), output)}"
+
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def heuristic_weight(text):
+    """argparse type for --weight: a number of at least 1 (1 is plain A*)."""
+    value = float(text)
+    if not value >= 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scenario 3: minimize stolen coins.")
+    parser.add_argument("map_file", nargs="?", default=Path("Phase-3", "map2.txt"),
+                        type=Path, help="map file to solve (default: Phase-3/map2.txt)")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="astar",
+                        help="search engine to use (default: astar)")
+    parser.add_argument("--heuristic", choices=KINDS,
+                        help="A* heuristic table (default: zero, relaxed for --solver anytime)")
+    parser.add_argument("--queue", choices=QUEUES, default="bucket",
+                        help="A* priority queue: integer buckets or a binary heap (default: bucket)")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                        help="wall-clock budget for --solver anytime (default: none)")
+    parser.add_argument("--node-budget", type=int, metavar="N",
+                        help="expanded-state budget for --solver anytime (default: none)")
+    parser.add_argument("--weight", type=heuristic_weight, default=DEFAULT_WEIGHT,
+                        help=f"weight of the heuristic for --solver anytime (default: {DEFAULT_WEIGHT})")
+    parser.add_argument("--top-k", type=positive_int, default=1, metavar="K",
+                        help="list the K lowest-loss routes instead of the single optimum")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes for --solver parallel (default: CPU count)")
+    search_stats.add_arguments(parser)
+    result_cache.add_arguments(parser)
+    path_io.add_arguments(parser)
+    return parser
+
+
+def main(args=None):
+    """Runs the phase; args are parsed from the command line unless given."""
+    if args is None:
+        args = build_parser().parse_args()
+    stats = search_stats.from_arguments(args)
+    cache = result_cache.from_arguments(args)
+
+    map_file = args.map_file
+    # Anytime results depend on the budget, so they are never cached.
+    if args.solver == "anytime":
+        cache = None
+    try:
+        if args.top_k > 1:
+            game_map, n = load_and_report(map_file, stats)
+            print(f"Listing the {args.top_k} lowest-loss routes for scenario 3...")
+            with timed(stats, "search"):
+                routes = list(k_best_paths(game_map.values, game_map.thief_mask(), "stolen", args.top_k))
+            print(f"\n--- Top {len(routes)} Routes of Scenario 3 ---")
+            for i, (path, coins, stolen) in enumerate(routes):
+                print(f"{i + 1}. Stolen: {stolen}, Coins: {coins}")
+                print(f"   {format_path(path, args.output)}")
+            if stats is not None:
+                stats.report()
+            return
+        if cache is not None:
+            path3, coins3, stolen3 = solve_cached(cache, args, stats)
+        else:
+            game_map, n = load_and_report(map_file, stats)
+            path3, coins3, stolen3 = run_solver(args, game_map, n, stats)
 
         if path3:
             print("\n--- Results of Scenario 3 ---")
-            print(f"Path: {path3}")
+            print(format_path(path3, args.output))
             print(f"Coins collected by Aryan: {coins3}")
             print(f"Total stolen coins (minimized): {stolen3}")
         else:
             print("\n--- Results of Scenario 3 ---")
             print("No path found for scenario 3.")
+        if stats is not None:
+            stats.report()
 
     except FileNotFoundError:
         print(f"Error: Map file '{map_file}' not found.")
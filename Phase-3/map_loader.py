@@ -1,32 +1,36 @@
+from collections import namedtuple
+
 import numpy as np
+from common.map_io import load_map as load_map_arrays
+
+
+class GameMap(namedtuple("GameMap", ["values", "thief_bits"])):
+    """
+    نقشه بازی: مقدار صحیح هر خانه (int32) به همراه بیت‌مپ دزدها.
+    values:     int32 array of shape (n, n); 0 under thieves
+    thief_bits: uint8 array of shape (n, ceil(n / 8)); bit c % 8 of
+                byte c // 8 in row r is set when (r, c) is a thief cell
+    """
+    __slots__ = ()
+
+    @property
+    def n(self):
+        return self.values.shape[0]
+
+    def is_thief(self, r, c):
+        """آیا خانه (r, c) دزد است؟"""
+        return bool(self.thief_bits[r, c >> 3] >> (c & 7) & 1)
+
+    def thief_mask(self):
+        """ماسک بولی دزدها با شکل (n, n)."""
+        return np.unpackbits(self.thief_bits, axis=1, count=self.n,
+                             bitorder="little").astype(bool)
 
-THIEF_MARKER_INTERNAL = float('inf') # مقدار داخلی برای نمایش دزد
 
 def load_map(file_path):
-    """نقشه را از فایل متنی می‌خواند و به آرایه NumPy تبدیل می‌کند."""
-    map_data = []
-    with open(file_path, 'r') as f:
-        for line in f:
-            row = []
-            items = line.strip().split()
-            if not items: continue # Skip empty lines
-            for item in items:
-                try:
-                    val = int(item)
-                    row.append(val)
-                except ValueError:
-                    if item == '!':
-                        row.append(THIEF_MARKER_INTERNAL)
-                    else:
-                        raise ValueError(f"Invalid item in map: {item}")
-            map_data.append(row)
-
-    if not map_data:
-        raise ValueError("Map is empty!")
-
-    n = len(map_data)
-    for r in map_data:
-        if len(r) != n:
-            raise ValueError(f"Map is not square!")
-
-    return np.array(map_data, dtype=float), n # Use float for infinity marker
\ No newline at end of file
+    """نقشه را از فایل متنی یا باینری می‌خواند و به GameMap تبدیل می‌کند."""
+    values, thief_mask = load_map_arrays(file_path)
+    n = values.shape[0]
+
+    thief_bits = np.packbits(thief_mask, axis=1, bitorder="little")
+    return GameMap(values.astype(np.int32, copy=False), thief_bits), n
@@ -1,5 +1,7 @@
+from array import array
+
 import numpy as np
-from map_loader import THIEF_MARKER_INTERNAL
+from common.rules import score_cells
 
 class Node:
     """نمایش یک حالت در فضای جستجو (موقعیت + وضعیت دزد)."""
@@ -32,6 +34,44 @@ class Node:
          return f"Node(r={self.r}, c={self.c}, thief={self.has_thief}, g={self.g_cost}, h={self.h_cost})"
 
 
+class NodeArena:
+    """
+    ذخیره فشرده حالت‌های جستجو در آرایه‌های از پیش تخصیص‌یافته.
+    Each (r, c, has_thief) state is the integer index (r * n + c) * 2 + has_thief,
+    so the thief flag is the low bit of the index. g_cost and parent live in
+    flat int64 arrays (16 bytes per state) instead of one Node object each.
+    """
+    UNSEEN = (1 << 63) - 1 # g_cost حالت‌هایی که هنوز دیده نشده‌اند
+
+    __slots__ = ("n", "g_cost", "parent")
+
+    def __init__(self, n):
+        self.n = n
+        size = n * n * 2
+        self.g_cost = array("q", [self.UNSEEN]) * size
+        self.parent = array("q", [-1]) * size
+
+    def state_id(self, r, c, has_thief):
+        return (r * self.n + c) * 2 + has_thief
+
+    def decode(self, state):
+        """(r, c, has_thief) متناظر با شماره حالت."""
+        r, c = divmod(state >> 1, self.n)
+        return r, c, bool(state & 1)
+
+    def path_nodes(self, state):
+        """مسیر تا حالت داده‌شده را به صورت لیستی از Node (از شروع به پایان) می‌سازد."""
+        nodes = []
+        while state >= 0:
+            r, c, has_thief = self.decode(state)
+            nodes.append(Node(r, c, has_thief, g_cost=self.g_cost[state]))
+            state = self.parent[state]
+        nodes.reverse()
+        for prev, node in zip(nodes, nodes[1:]):
+            node.parent = prev
+        return nodes
+
+
 def reconstruct_path_nodes(node):
     """مسیر را به صورت لیستی از نودها از شروع به پایان بازسازی می‌کند."""
     nodes = []
@@ -43,58 +83,11 @@ def reconstruct_path_nodes(node):
 
 def calculate_final_stats(path_nodes, game_map):
     """محاسبه سکه نهایی آریان و کل زیان دزدیده شده بر اساس مسیر نودها."""
-    coins = 0
-    stolen = 0
-    n = game_map.shape[0]
-
     if not path_nodes:
         return 0, 0
-
-    # وضعیت اولیه در خانه (0,0)
-    start_node = path_nodes[0]
-    start_r, start_c = start_node.r, start_node.c
-    start_cell_value = game_map[start_r, start_c]
-
-    # وضعیت دزد *بعد از* اعمال اثر خانه شروع
-    current_has_thief = start_node.has_thief
-
-    # اعمال اثر خود خانه شروع بر سکه‌های آریان (این جزو زیان محاسبه نمی‌شود)
-    if start_cell_value != THIEF_MARKER_INTERNAL:
-        if start_cell_value > 0:
-            coins += start_cell_value # گنجینه اولیه
-        else: # شامل هزینه عادی < 0
-            coins += start_cell_value # هزینه اولیه
-
-    # پیمایش حرکت‌ها بین نودها
-    for i in range(len(path_nodes) - 1):
-        current_node = path_nodes[i] # نود فعلی (از آن حرکت می‌کنیم)
-        next_node = path_nodes[i+1]   # نود بعدی (به آن می‌رسیم)
-        next_r, next_c = next_node.r, next_node.c
-        next_cell_value = game_map[next_r, next_c]
-
-        # دزدی که از خانه current_node سوار شده (اگر شده باشد) در خانه next_node عمل می‌کند
-        thief_was_present_before_move = current_node.has_thief
-        step_loss = 0
-        arian_gain_loss = 0 # تغییر مستقیم سکه آریان در این مرحله
-
-        if thief_was_present_before_move:
-            if next_cell_value == THIEF_MARKER_INTERNAL:
-                step_loss = 0 # دعوا
-            elif next_cell_value > 0: # گنجینه
-                step_loss = next_cell_value
-            elif next_cell_value < 0: # عادی
-                step_loss = abs(next_cell_value)
-            # دزد در هر صورت پیاده می‌شود (یا بخاطر دعوا یا بعد از دزدی)
-        else:
-            # دزدی همراه نبود، آریان خودش با خانه بعدی تعامل می‌کند
-            step_loss = 0
-            if next_cell_value != THIEF_MARKER_INTERNAL:
-                arian_gain_loss = next_cell_value # گنجینه یا هزینه عادی
-
-        stolen += step_loss
-        coins += arian_gain_loss
-
-        # وضعیت دزد برای مرحله بعد، همان وضعیت ذخیره شده در نود بعدی است
-        current_has_thief = next_node.has_thief
-
-    return int(coins), int(stolen)
\ No newline at end of file
+    rows = np.array([node.r for node in path_nodes])
+    cols = np.array([node.c for node in path_nodes])
+    # بیت دزد هر خانه مسیر از بیت‌مپ نقشه
+    cell_thief = game_map.thief_bits[rows, cols >> 3] >> (cols & 7) & 1
+    coins, stolen = score_cells(game_map.values[rows, cols], cell_thief)
+    return int(coins), int(stolen)
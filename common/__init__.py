@@ -0,0 +1 @@
+"""Shared helpers used by every phase of Escape from the Lost Land."""
@@ -0,0 +1,218 @@
+"""
+Anytime search with a wall-clock or node budget: Anytime Weighted A*
+(AWA*, Hansen and Zhou).
+
+A greedy walk along the heuristic gives a first path at once. A weighted
+A* search then runs on: its open list is ordered by g + weight * h, which
+dives towards the goal and reaches complete paths early, and each cheaper
+path it reaches replaces the best one. States whose g + h cannot beat the
+best path are pruned, and states reached again at a lower cost are
+reopened, so once the open list runs dry the best path is optimal.
+
+At any time the best path comes with a provable bound. With an admissible
+h, the optimal path passes through some open state at its optimal cost,
+so the optimum costs at least the smallest g + h on the open list. The
+gap between that and the best path's cost bounds its distance from the
+optimum, in coins or in stolen amount. A second heap, keyed by g + h,
+keeps that minimum at hand.
+
+Costs follow common.dp_solver ("coins" pays the negated coins). Weighting
+h is only meaningful with non-negative costs, so each step is charged a
+constant extra (the largest cell value, for "coins"). Every path has
+2n - 2 steps, so the shift changes no ranking and cancels out of the gap.
+"""
+import time
+from array import array
+from collections import namedtuple
+from heapq import heappop, heappush
+
+import numpy as np
+
+from common.dp_solver import OBJECTIVES
+from common.heuristics import as_lookup, get_table
+from common.rules import score_path
+
+DEFAULT_WEIGHT = 1.2
+
+# Expansions between two clock readings.
+_CLOCK_EVERY = 256
+
+UNSEEN = (1 << 63) - 1
+
+
+class Solution(namedtuple("Solution", ["path", "coins", "stolen", "gap", "seconds", "expanded"])):
+    """
+    A path found by anytime_search.
+    gap:      the path is at most this far from the optimum, in coins
+              ("coins") or stolen amount ("stolen"); 0 means optimal
+    seconds:  time since the search started
+    expanded: states expanded so far
+    """
+
+    __slots__ = ()
+
+    @property
+    def optimal(self):
+        return self.gap == 0
+
+
+def anytime_search(
+    values,
+    thief_mask,
+    objective="stolen",
+    heuristic="relaxed",
+    weight=DEFAULT_WEIGHT,
+    time_limit=None,
+    node_limit=None,
+    stats=None,
+):
+    """
+    Yields a Solution for the first path and for each better one, then a
+    last one once the path is proven optimal or the budget runs out. The
+    budget covers time_limit seconds from the call (heuristic table
+    included) and node_limit expanded states; either may be None.
+    heuristic: "zero", "relaxed" or "exact" (see common.heuristics).
+    weight: weight of h in the search order; 1 is plain A*.
+    stats: a common.stats.SearchStats to record search counters, or None.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    if not weight >= 1:  # NaN included
+        raise ValueError("weight must be at least 1")
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit if time_limit is not None else None
+    n = values.shape[0]
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    count_coins = objective == "coins"
+
+    # Per-step shift that makes every step cost non-negative.
+    shift = max(0, int(values[~thief_mask].max(initial=0))) if count_coins else 0
+    if heuristic == "zero":
+        table = np.zeros((n, n, 2), dtype=np.int64)
+    else:
+        # Still admissible: the shift is paid on each step left.
+        rows, cols = np.indices((n, n))
+        steps_left = (2 * n - 2 - rows - cols)[:, :, None]
+        table = np.maximum(get_table(values, thief_mask, objective, heuristic) + shift * steps_left, 0)
+    h = as_lookup(table)
+    flat_values = as_lookup(np.asarray(values, dtype=np.int64))
+    thief = memoryview(np.ascontiguousarray(thief_mask).view(np.uint8).ravel())
+    goal_cell = n * n - 1
+
+    def enter(t, cell):
+        """(thief state after, shifted step cost) of entering cell with thief state t."""
+        if t:
+            # Robbed (or a fight on a thief cell); the thief leaves.
+            return 0, shift + (0 if count_coins or thief[cell] else abs(flat_values[cell]))
+        if thief[cell]:
+            return 1, shift
+        return 0, shift + (-flat_values[cell] if count_coins else 0)
+
+    def successors(state):
+        cell, t = state >> 1, state & 1
+        r, c = divmod(cell, n)
+        if r + 1 < n:
+            nt, step = enter(t, cell + n)
+            yield (cell + n) * 2 + nt, step
+        if c + 1 < n:
+            nt, step = enter(t, cell + 1)
+            yield (cell + 1) * 2 + nt, step
+
+    size = n * n * 2
+    g_cost = array("q", [UNSEEN]) * size
+    parent = array("q", [-1]) * size
+    closed = bytearray(size)  # Expanded at its current g.
+
+    def lower_bound():
+        """Smallest g + h over the open states, capped by the best cost."""
+        while bounds:
+            f, state, g = bounds[0]
+            if g == g_cost[state] and not closed[state]:
+                return min(f, best_cost)
+            heappop(bounds)  # Expanded or improved since.
+        return best_cost
+
+    def solution():
+        coins, stolen = score_path(values, thief_mask, best_path)
+        gap = best_cost - lower_bound()
+        return Solution(best_path, coins, stolen, gap, time.perf_counter() - start_time, expanded)
+
+    t0 = thief[0]
+    g0 = 0 if t0 or not count_coins else -flat_values[0]
+
+    # Greedy walk along h: a first path in O(n).
+    state, best_cost = t0, g0
+    walk = [state]
+    while state >> 1 != goal_cell:
+        state, step = min(successors(state), key=lambda s: s[1] + h[s[0]])
+        best_cost += step
+        walk.append(state)
+    best_path = [divmod(s >> 1, n) for s in walk]
+    expanded = 0
+
+    # open_set is ordered by g + weight * h and bounds by g + h; both hold
+    # (key, state, g) and skip entries left behind by a lower g.
+    g_cost[t0] = g0
+    open_set = [(g0 + weight * h[t0], -t0, g0)]
+    bounds = [(g0 + h[t0], t0, g0)]
+    counting = stats is not None
+    if counting:
+        stats.nodes_pushed += 1
+        stats.peak_open_set = max(stats.peak_open_set, 1)
+    yield solution()
+
+    while open_set:
+        _, state, g = heappop(open_set)
+        state = -state
+        if counting:
+            stats.nodes_popped += 1
+        if g > g_cost[state] or closed[state] or g + h[state] >= best_cost:
+            # Superseded, or pruned by a path found since.
+            if counting:
+                stats.stale_pops += 1
+            continue
+        if node_limit is not None and expanded >= node_limit:
+            break
+        if deadline is not None and expanded % _CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            break
+        closed[state] = 1
+        expanded += 1
+        found = -1
+        for next_state, step in successors(state):
+            new_g = g + step
+            # A state that cannot beat the best path is not worth keeping.
+            if new_g >= g_cost[next_state] or new_g + h[next_state] >= best_cost:
+                continue
+            g_cost[next_state] = new_g
+            parent[next_state] = state
+            if next_state >> 1 == goal_cell:
+                best_cost, found = new_g, next_state
+                continue
+            closed[next_state] = 0  # Reopened if it was expanded before.
+            heappush(open_set, (new_g + weight * h[next_state], -next_state, new_g))
+            heappush(bounds, (new_g + h[next_state], next_state, new_g))
+            if counting:
+                stats.nodes_pushed += 1
+                stats.peak_open_set = max(stats.peak_open_set, len(open_set))
+        if found >= 0:
+            # Yielded once every successor is on the open list, for the bound.
+            best_path = []
+            while found >= 0:
+                best_path.append(divmod(found >> 1, n))
+                found = parent[found]
+            best_path.reverse()
+            yield solution()
+    else:
+        # Nothing left that could beat the best path: it is optimal.
+        bounds.clear()
+
+    if counting:
+        stats.peak_visited = max(stats.peak_visited, size - g_cost.count(UNSEEN))
+    yield solution()
+
+
+def solve_anytime(values, thief_mask, objective="stolen", **options):
+    """The last Solution of anytime_search (see there for options)."""
+    for result in anytime_search(values, thief_mask, objective, **options):
+        pass
+    return result
@@ -0,0 +1,246 @@
+"""
+Parallel batch solving of many maps.
+
+Maps are taken from a directory (*.txt / *.bin files), a glob pattern or a
+JSONL manifest, fanned out over a process pool and solved for the selected
+objectives. One JSON line is written per map as soon as it finishes, so
+results stream out in completion order:
+
+    {"map": "maps/a.txt", "n": 50, "seconds": 0.01,
+     "results": {"objective3": {"moves": "DDRR...", "coins": 12, "stolen": 3}}}
+
+A map that fails (bad input, per-map timeout, crashed worker) produces an
+{"map": ..., "error": ...} line instead and never aborts the batch.
+
+Results are read from and written to the result cache (common.cache)
+unless --no-cache is given, so maps solved by an earlier batch or by the
+phase entry points run with --cache are answered without solving them
+again.
+
+Manifest lines look like {"map": "path/to/map.txt", "id": "optional tag"};
+relative paths are resolved against the manifest's directory.
+
+Usage:
+    python -m common.batch maps/ --workers 8 --timeout 30 > results.jsonl
+    python -m common.batch "maps/**/*.bin" --objectives 2,3
+    python -m common.batch manifest.jsonl --output results.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from common import cache as result_cache
+from common.dp_solver import solve_max_coins, solve_min_stolen
+from common.map_io import load_map
+from common.path_io import encode_path
+from common.rules import score_path
+
+OBJECTIVES = ("1", "2", "3")
+
+# A map whose worker dies this many times is reported as failed.
+MAX_ATTEMPTS = 2
+
+# (objective, solver) under which each objective is cached; 2 and 3 share
+# entries with the dp solvers of Phases 2 and 3.
+CACHE_KEYS = {"1": ("1", "route"), "2": ("coins", "dp"), "3": ("stolen", "dp")}
+
+# Files picked up when the source is a directory.
+MAP_SUFFIXES = (".txt", ".bin")
+
+
+def collect_maps(source):
+    """
+    Expands a directory, glob pattern or JSONL manifest into a list of
+    {"map": path, ...} jobs, in a stable order.
+    """
+    path = Path(source)
+    if path.is_dir():
+        return [
+            {"map": str(p)}
+            for p in sorted(path.iterdir())
+            if p.is_file() and p.suffix in MAP_SUFFIXES
+        ]
+    if path.is_file() and path.suffix == ".jsonl":
+        jobs = []
+        with open(path) as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                job = json.loads(line)
+                if "map" not in job:
+                    raise ValueError(f"{source}:{line_no}: manifest entry has no 'map'")
+                job["map"] = str(path.parent / job["map"])
+                jobs.append(job)
+        return jobs
+    return [{"map": p} for p in sorted(glob.glob(source, recursive=True)) if os.path.isfile(p)]
+
+
+def solve_objective(values, thief_mask, objective):
+    """Runs one objective; returns (path, coins, stolen)."""
+    if objective == "1":
+        # The route BFS returns with no blocked cells: Down, then Right.
+        n = values.shape[0]
+        path = [(r, 0) for r in range(n)] + [(n - 1, c) for c in range(1, n)]
+        coins, stolen = score_path(values, thief_mask, path)
+        return path, coins, stolen
+    if objective == "2":
+        return solve_max_coins(values, thief_mask)
+    return solve_min_stolen(values, thief_mask)
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("map timed out")
+
+
+def solve_cached(cache, map_file, objectives):
+    """
+    solve_objective for each objective through the result cache; the map is
+    loaded at most once, and not at all when every objective is cached.
+    Returns (n, {objective: (path, coins, stolen)}).
+    """
+    alias = result_cache.file_alias(map_file)
+    grid = []
+
+    def load():
+        if not grid:
+            grid.extend(load_map(map_file))
+        return grid
+
+    n = None
+    results = {}
+    for objective in objectives:
+        cache_objective, solver = CACHE_KEYS[objective]
+        entry, _ = result_cache.solve_cached(
+            cache,
+            alias,
+            cache_objective,
+            solver,
+            load,
+            lambda values, thief_mask: solve_objective(values, thief_mask, objective)[0],
+        )
+        n = entry.n
+        results[objective] = (entry.path, entry.coins, entry.stolen)
+    return n, results
+
+
+def solve_job(job, objectives, timeout, cache=None):
+    """
+    Worker entry point: loads and solves one map, through the result cache
+    when one is given. Never raises; failures are returned as an "error"
+    record so the batch keeps going.
+    """
+    record = dict(job)
+    start = time.perf_counter()
+    use_alarm = timeout and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if cache is not None:
+            n, solved = solve_cached(cache, job["map"], objectives)
+        else:
+            values, thief_mask = load_map(job["map"])
+            n = values.shape[0]
+            solved = {o: solve_objective(values, thief_mask, o) for o in objectives}
+        record["n"] = int(n)
+        record["results"] = {
+            f"objective{objective}": {
+                "moves": encode_path(path),
+                "coins": coins,
+                "stolen": stolen,
+            }
+            for objective, (path, coins, stolen) in solved.items()
+        }
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_batch(jobs, objectives=OBJECTIVES, workers=None, timeout=None, cache=None):
+    """
+    Solves every job on a process pool and yields result records in
+    completion order. At most 2 * workers maps are in flight at once. When a
+    worker process dies, the maps that were in flight are retried one at a
+    time, so only the map that actually crashes is reported as failed.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque((job, 1) for job in jobs)
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < 2 * workers:
+                        job, attempt = pending[0]
+                        retrying = any(a > 1 for _, a in in_flight.values())
+                        if retrying or (attempt > 1 and in_flight):
+                            break  # Retried maps run alone.
+                        future = pool.submit(solve_job, job, objectives, timeout, cache)
+                        in_flight[future] = pending.popleft()
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record = future.result()
+                        del in_flight[future]
+                        yield record
+            except BrokenProcessPool:
+                # Retry the maps that were in flight on a fresh pool.
+                for job, attempt in in_flight.values():
+                    if attempt < MAX_ATTEMPTS:
+                        pending.appendleft((job, attempt + 1))
+                    else:
+                        yield dict(job, error="worker process crashed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve many maps in parallel.")
+    parser.add_argument("source", help="directory, glob pattern or JSONL manifest of maps")
+    parser.add_argument(
+        "--objectives",
+        default=",".join(OBJECTIVES),
+        help="comma-separated objectives to run (default: 1,2,3)",
+    )
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, help="per-map time limit in seconds")
+    parser.add_argument("--output", help="write JSONL here instead of stdout")
+    result_cache.add_arguments(parser, default=True)
+    args = parser.parse_args(argv)
+
+    objectives = [o.strip() for o in args.objectives.split(",") if o.strip()]
+    unknown = sorted(set(objectives) - set(OBJECTIVES))
+    if unknown:
+        parser.error(f"unknown objective(s): {', '.join(unknown)}")
+
+    jobs = collect_maps(args.source)
+    out = open(args.output, "w") if args.output else sys.stdout
+    failed = 0
+    start = time.perf_counter()
+    try:
+        cache = result_cache.from_arguments(args)
+        for record in run_batch(jobs, objectives, args.workers, args.timeout, cache):
+            failed += "error" in record
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Solved {len(jobs) - failed}/{len(jobs)} maps in {elapsed:.2f}s ({failed} failed).",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Reproducible benchmark suite for the solvers.
+
+Every (solver, layout, size) run happens in a fresh process on a map from
+common.mapgen with a fixed seed, and records the wall time of the solve,
+the peak RSS of the process and the search counters from common.stats (nodes
+expanded, pushed, stale pops and peak open set for the search solvers; the
+DP reports the states it sweeps as expanded). Runs that exceed the
+time or memory limit are recorded as such instead of stopping the suite.
+
+Results are written as JSON, together with the commit and environment, so
+two runs can be compared:
+
+    python -m common.benchmark --sizes 10 100 1000 --output base.json
+    python -m common.benchmark --sizes 10 100 1000 --output new.json
+    python -m common.benchmark --compare base.json new.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common.mapgen import DISTRIBUTIONS, LAYOUTS, generate_map
+from common.map_io import to_grid
+from common.stats import SearchStats
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SOLVERS = {
+    "objective1": "Phase 1 solve_objective1 (BFS)",
+    "objective2": "Phase 2 solve_objective2_informed (A*)",
+    "scenario3": "Phase 3 solve_scenario3_astar (A*, bucket queue)",
+    "scenario3-heap": "Phase 3 solve_scenario3_astar (A*, binary heap)",
+    "scenario3-bidir": "Phase 3 solve_scenario3_bidirectional (bidirectional Dijkstra)",
+    "dp-coins": "common.dp_solver.solve_max_coins",
+    "dp-stolen": "common.dp_solver.solve_min_stolen",
+    "outofcore": "common.outofcore.solve_arrays (stolen)",
+}
+DEFAULT_SOLVERS = ("objective1", "objective2", "scenario3")
+DEFAULT_SIZES = (10, 50, 100, 500, 1000, 2000, 5000)
+
+
+def _load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _prepare(solver, values, thief_mask):
+    """
+    Returns (run, stats) for a solver: run() performs the solve and returns
+    (coins, stolen), recording its search counters in stats.
+    """
+    n = values.shape[0]
+    stats = SearchStats()
+    if solver == "objective1":
+        phase1 = _load_module("phase1_main", ROOT / "Phase 1" / "main.py")
+        grid = to_grid(values, thief_mask)
+
+        def run():
+            phase1.solve_objective1(n, grid, stats)
+
+        return run, stats
+
+    if solver == "objective2":
+        phase2 = _load_module("phase2_main", ROOT / "Phase 2" / "main.py")
+
+        def run():
+            phase2.solve_objective2_informed(values, thief_mask, stats=stats)
+
+        return run, stats
+
+    if solver in ("scenario3", "scenario3-heap", "scenario3-bidir"):
+        sys.path.insert(0, str(ROOT / "Phase-3"))
+        from map_loader import GameMap
+
+        game_map = GameMap(values, np.packbits(thief_mask, axis=1, bitorder="little"))
+        if solver == "scenario3-heap":
+            from a_star_solver import solve_scenario3_astar
+
+            return (lambda: solve_scenario3_astar(game_map, n, stats=stats, queue="heap")[1:]), stats
+        if solver == "scenario3":
+            from a_star_solver import solve_scenario3_astar as solve
+        else:
+            from bidirectional_solver import solve_scenario3_bidirectional as solve
+        return (lambda: solve(game_map, n, stats=stats)[1:]), stats
+
+    if solver == "outofcore":
+        from common.outofcore import solve_arrays
+
+        return (lambda: solve_arrays(values, thief_mask, stats=stats)[1:]), stats
+
+    from common.dp_solver import solve_max_coins, solve_min_stolen
+
+    solve = solve_max_coins if solver == "dp-coins" else solve_min_stolen
+    stats.nodes_popped = 2 * n * n
+    return (lambda: solve(values, thief_mask)[1:]), stats
+
+
+def _run_child(conn, solver, n, map_options, max_rss_mb):
+    """Child process: generates the map, runs one solve, reports metrics."""
+    if max_rss_mb:
+        limit = max_rss_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        values, thief_mask = generate_map(n, **map_options)
+        run, stats = _prepare(solver, values, thief_mask)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            outcome = run()
+            seconds = time.perf_counter() - start
+        result = {
+            "status": "ok",
+            "seconds": seconds,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "baseline_rss_kb": baseline,
+        }
+        counters = stats.as_dict()
+        for key in ("nodes_expanded", "nodes_pushed", "stale_pops", "peak_open_set", "peak_visited"):
+            result[key] = counters[key]
+        if outcome is not None:
+            result["coins"], result["stolen"] = (int(x) for x in outcome)
+    except MemoryError:
+        result = {"status": "memory limit"}
+    except Exception as e:
+        result = {"status": f"error: {type(e).__name__}: {e}"}
+    conn.send(result)
+
+
+def run_once(solver, n, map_options, timeout, max_rss_mb):
+    """Runs one measurement in a fresh process and returns its metrics."""
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_child, args=(sender, solver, n, map_options, max_rss_mb))
+    process.start()
+    sender.close()
+    result = None
+    if receiver.poll(timeout):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            pass
+    if process.is_alive():
+        process.kill()
+    process.join()
+    if result is None:
+        result = {"status": "timeout" if process.exitcode in (None, -9) else f"crashed ({process.exitcode})"}
+    return result
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(solvers, sizes, layouts, map_options, repeat, timeout, max_rss_mb, log=None):
+    runs = []
+    for layout in layouts:
+        for solver in solvers:
+            for n in sizes:
+                options = dict(map_options, layout=layout)
+                best = None
+                for _ in range(repeat):
+                    result = run_once(solver, n, options, timeout, max_rss_mb)
+                    if result["status"] != "ok":
+                        best = result
+                        break
+                    if best is None or result["seconds"] < best["seconds"]:
+                        best = result
+                record = {"solver": solver, "layout": layout, "n": n, **best}
+                runs.append(record)
+                if log:
+                    log(record)
+                if best["status"] != "ok":
+                    break  # Larger sizes would only fail the same way.
+    return runs
+
+
+def compare(base_path, new_path, threshold):
+    """Prints per-run time ratios; returns the number of regressions."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    key = lambda r: (r["solver"], r["layout"], r["n"])
+    base_runs = {key(r): r for r in base["runs"]}
+    regressions = 0
+    print(f"{'solver':<12} {'layout':<15} {'n':>6} {'base s':>10} {'new s':>10} {'ratio':>7}  nodes")
+    for run in new["runs"]:
+        old = base_runs.get(key(run))
+        if not old or old["status"] != "ok" or run["status"] != "ok":
+            status = run["status"] if not old else f"{old['status']} -> {run['status']}"
+            print(f"{run['solver']:<12} {run['layout']:<15} {run['n']:>6} {status}")
+            continue
+        ratio = run["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        nodes = f"{old['nodes_expanded']} -> {run['nodes_expanded']}"
+        print(
+            f"{run['solver']:<12} {run['layout']:<15} {run['n']:>6} "
+            f"{old['seconds']:>10.4f} {run['seconds']:>10.4f} {ratio:>7.2f}  {nodes}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on synthetic maps.")
+    parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS), default=list(DEFAULT_SOLVERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=["random"])
+    parser.add_argument("--values", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--low", type=int, default=-10, help="smallest cost (default: -10)")
+    parser.add_argument("--high", type=int, default=10, help="largest treasure (default: 10)")
+    parser.add_argument("--thieves", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per point; the fastest is kept")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds per run (default: 120)")
+    parser.add_argument("--max-rss-mb", type=int, default=4096, help="address-space cap per run")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown flagged by --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    def log(record):
+        if record["status"] == "ok":
+            detail = (
+                f"{record['seconds']:.4f}s  rss={record['peak_rss_kb'] // 1024}MB  "
+                f"nodes={record['nodes_expanded']}"
+            )
+        else:
+            detail = record["status"]
+        print(f"{record['solver']:<12} {record['layout']:<15} n={record['n']:<6} {detail}", file=sys.stderr)
+
+    map_options = {"seed": args.seed, "thieves": args.thieves, "values": args.values, "low": args.low, "high": args.high}
+    runs = run_suite(
+        args.solvers, args.sizes, args.layouts, map_options, args.repeat, args.timeout, args.max_rss_mb, log
+    )
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "map_options": map_options,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
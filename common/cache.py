@@ -0,0 +1,297 @@
+"""
+Content-addressed on-disk cache of solved maps.
+
+A result is keyed by the digest of the normalized grid (n, the int32 values
+with 0 under thieves and the packed thief mask, so a text map and its binary
+conversion share entries), the objective, the solver and SOLVER_VERSION.
+Entry points also record aliases that lead to that digest without parsing
+the map:
+
+    file alias   -- real path, inode, size and mtime of a map file; a hit
+                    costs a stat and two small reads, whatever the map size
+    bytes alias  -- digest of the raw input, for maps read from stdin
+
+Each entry is one small binary file holding the coins, the stolen total and
+the path: its moves as bits, plus the values and thief flags of the cells
+along it, so the step-by-step report can be printed without the grid.
+
+Files are written to a temporary name and renamed into place, so concurrent
+batch workers never see partial entries. Hits refresh a file's mtime.
+Each cache object keeps a running estimate of the directory size, added to
+on every write; the directory is only scanned when the estimate passes the
+size cap, or every _SCAN_EVERY writes to catch other processes' writes.
+A scan deletes the least recently used files until the cache is back under
+_LOW_WATER of its cap, which leaves room for many writes before the next.
+
+Entry points take --cache / --no-cache, --cache-dir (default
+$LOST_LAND_CACHE_DIR or ~/.cache/lost-land) and --cache-max-mb. The phase
+entry points leave the cache off unless --cache is given, so a run never
+depends on what earlier runs left behind; common.batch turns it on by
+default.
+"""
+import argparse
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common.rules import score_path
+
+# Bump when a solver change alters its results, to invalidate old entries.
+SOLVER_VERSION = 2
+DEFAULT_MAX_MB = 256
+
+_MAGIC = b"LLRES\x00\x01\n"
+# magic | n | coins | stolen | number of path cells
+_HEADER = struct.Struct("<8sIqqI")
+_RESULT, _ALIAS = ".res", ".ref"
+# Temporary files older than this are left over from a crashed writer.
+_STALE_TMP_SECONDS = 3600
+# Writes between two scans of the directory, whatever the estimated size.
+_SCAN_EVERY = 64
+# Fraction of max_bytes that a scan over the cap evicts down to.
+_LOW_WATER = 0.9
+
+
+def grid_digest(values, thief_mask):
+    """Digest of the normalized grid."""
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(struct.pack("<I", values.shape[0]))
+    digest.update(np.where(thief_mask, 0, values).astype("<i4").tobytes())
+    digest.update(np.packbits(thief_mask, axis=-1, bitorder="little").tobytes())
+    return digest.hexdigest()
+
+
+def file_alias(file_path):
+    """Alias of a map file by its identity on disk; no map data is read."""
+    path = os.path.realpath(file_path)
+    st = os.stat(path)
+    return _alias_digest(f"file:{path}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}".encode())
+
+
+def bytes_alias(data):
+    """Alias of a raw map as read, before parsing."""
+    return _alias_digest(b"bytes:" + hashlib.blake2b(data, digest_size=20).digest())
+
+
+def _alias_digest(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class Entry(namedtuple("Entry", ["n", "path", "coins", "stolen", "cell_values", "cell_thief"])):
+    """A cached result; cell_values / cell_thief follow the path."""
+
+    __slots__ = ()
+
+    def grid(self):
+        """The path cells as a sparse grid: grid[r][c], "!" for thieves."""
+        grid = {}
+        for (r, c), value, thief in zip(self.path, self.cell_values, self.cell_thief):
+            grid.setdefault(r, {})[c] = "!" if thief else value
+        return grid
+
+
+def _encode(n, path, coins, stolen, values, thief_mask):
+    rows, cols = np.array(path).T
+    moves = np.diff(rows) > 0  # True for Down
+    return b"".join(
+        (
+            _HEADER.pack(_MAGIC, n, coins, stolen, len(path)),
+            np.packbits(moves, bitorder="little").tobytes(),
+            np.asarray(values[rows, cols], dtype="<i4").tobytes(),
+            np.packbits(np.asarray(thief_mask[rows, cols], dtype=bool), bitorder="little").tobytes(),
+        )
+    )
+
+
+def _decode(data):
+    magic, n, coins, stolen, cells = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not a cache entry.")
+    offset = _HEADER.size
+    move_bytes = (cells - 1 + 7) // 8
+    down = np.unpackbits(np.frombuffer(data, np.uint8, move_bytes, offset), count=cells - 1, bitorder="little")
+    offset += move_bytes
+    cell_values = np.frombuffer(data, "<i4", cells, offset).tolist()
+    offset += 4 * cells
+    cell_thief = np.unpackbits(
+        np.frombuffer(data, np.uint8, (cells + 7) // 8, offset), count=cells, bitorder="little"
+    ).astype(bool).tolist()
+    rows = np.concatenate(([0], np.cumsum(down, dtype=np.int64))).tolist()
+    cols = [i - r for i, r in enumerate(rows)]
+    return Entry(n, list(zip(rows, cols)), coins, stolen, cell_values, cell_thief)
+
+
+class ResultCache:
+    """Size-bounded LRU cache of results in one directory."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        # Estimated bytes in the directory (None until the first scan) and
+        # writes since the last scan.
+        self._size = None
+        self._writes = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file(self, name, suffix):
+        return os.path.join(self.directory, name + suffix)
+
+    @staticmethod
+    def _key(digest, objective, solver):
+        return _alias_digest(f"{digest}:{objective}:{solver}:{SOLVER_VERSION}".encode())
+
+    def _read(self, path):
+        """File contents, refreshing its LRU position; None if missing."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None  # Never written, or evicted by another process.
+        return data
+
+    def _write(self, path, data):
+        """Atomically replaces path with data."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._writes += 1
+        if self._size is not None:
+            self._size += len(data)
+
+    def resolve(self, alias):
+        """Grid digest recorded for an alias, or None."""
+        data = self._read(self._file(alias, _ALIAS))
+        return data.decode() if data else None
+
+    def link(self, alias, digest):
+        """Records that alias stands for the grid with this digest."""
+        self._write(self._file(alias, _ALIAS), digest.encode())
+
+    def get(self, digest, objective, solver):
+        """Cached Entry for the grid, or None."""
+        data = self._read(self._file(self._key(digest, objective, solver), _RESULT))
+        if data is None:
+            return None
+        try:
+            return _decode(data)
+        except (ValueError, struct.error):
+            return None
+
+    def lookup(self, alias, objective, solver):
+        """get() through an alias, without the grid."""
+        digest = self.resolve(alias)
+        return self.get(digest, objective, solver) if digest else None
+
+    def put(self, digest, objective, solver, values, thief_mask, path, coins, stolen):
+        """Stores a result and returns it as an Entry; the grid is only read along the path."""
+        data = _encode(values.shape[0], path, int(coins), int(stolen), values, thief_mask)
+        self._write(self._file(self._key(digest, objective, solver), _RESULT), data)
+        if self._size is None or self._size > self.max_bytes or self._writes >= _SCAN_EVERY:
+            self.evict()
+        return _decode(data)
+
+    def evict(self):
+        """
+        Scans the directory and, if it is over max_bytes, deletes least
+        recently used files until it fits _LOW_WATER of it.
+        """
+        files = []
+        total = 0
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for item in it:
+                try:
+                    st = item.stat()
+                except FileNotFoundError:
+                    continue
+                if item.name.startswith(".tmp-"):
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        _remove(item.path)
+                    continue
+                if item.name.endswith((_RESULT, _ALIAS)):
+                    files.append((st.st_mtime_ns, st.st_size, item.path))
+                    total += st.st_size
+        if total > self.max_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes * _LOW_WATER:
+                    break
+                _remove(path)
+                total -= size
+        self._size = total
+        self._writes = 0
+
+
+def solve_cached(cache, alias, objective, solver, load, solve):
+    """
+    Answers from the cache when possible, solving otherwise:
+        1. the alias leads to a cached result: neither load nor solve runs
+        2. load() -> (values, thief_mask); the grid digest has a result
+        3. solve(values, thief_mask) -> path (or None); the result is stored
+    Returns (entry, hit), entry being None when no path exists.
+    """
+    entry = cache.lookup(alias, objective, solver)
+    if entry is not None:
+        return entry, True
+    values, thief_mask = load()
+    digest = grid_digest(values, thief_mask)
+    entry = cache.get(digest, objective, solver)
+    hit = entry is not None
+    if not hit:
+        path = solve(values, thief_mask)
+        if not path:
+            return None, False
+        coins, stolen = score_path(values, thief_mask, path)
+        entry = cache.put(digest, objective, solver, values, thief_mask, path, coins, stolen)
+    cache.link(alias, digest)
+    return entry, hit
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass  # Another process evicted it first.
+
+
+def default_directory():
+    return os.environ.get("LOST_LAND_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "lost-land")
+
+
+def add_arguments(parser, default=False):
+    """
+    Adds the --cache / --no-cache, --cache-dir and --cache-max-mb flags to a
+    parser; default says whether the cache is on without either flag.
+    """
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=default,
+        help=f"read and write the result cache (default: {'on' if default else 'off'})",
+    )
+    parser.add_argument("--cache-dir", help="result cache directory (default: $LOST_LAND_CACHE_DIR or ~/.cache/lost-land)")
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f"size cap of the result cache (default: {DEFAULT_MAX_MB})",
+    )
+
+
+def from_arguments(args):
+    """ResultCache for the parsed flags, or None when the cache is off."""
+    if not args.cache:
+        return None
+    return ResultCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
@@ -0,0 +1,121 @@
+"""
+Thin client of the solver daemon (common.daemon).
+
+Takes a phase number followed by that phase's main.py arguments, and
+prints exactly what main.py would, with the same exit status:
+
+    python -m common.client 3 Phase-3/map.txt --solver dp
+    python -m common.client 2 --solver dp < map.txt
+    python -m common.client --socket /tmp/ll.sock 1 --solver bfs < map.txt
+
+Phases 1 and 2 read the map from stdin, which is forwarded to the daemon.
+Phase 3 map paths are resolved against the client's working directory.
+When no daemon is listening, the phase's main.py is run directly instead.
+
+Only light standard-library modules are imported here, so the client
+starts about as fast as a bare interpreter. NumPy and the solvers stay
+loaded in the daemon.
+
+Wire format, shared with the daemon. A message is a field count followed
+by that many byte strings, each prefixed with its length (all "<I"):
+    request:  phase, working directory, stdin, the LOST_LAND_* environment
+              ("KEY=value" lines), then the main.py arguments
+    reply:    exit status (decimal), stdout, stderr
+A connection may carry any number of requests, one after the other.
+"""
+import os
+import struct
+import sys
+from _socket import AF_UNIX, SOCK_STREAM, socket
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = {
+    "1": os.path.join(ROOT, "Phase 1", "main.py"),
+    "2": os.path.join(ROOT, "Phase 2", "main.py"),
+    "3": os.path.join(ROOT, "Phase-3", "main.py"),
+}
+LENGTH = struct.Struct("<I")
+USAGE = "usage: python -m common.client [--socket PATH] {1,2,3} [main.py arguments]"
+
+
+def default_socket():
+    """$LOST_LAND_DAEMON_SOCKET, or a per-user socket in the temp directory."""
+    return os.environ.get("LOST_LAND_DAEMON_SOCKET") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"lost-land-{os.getuid()}.sock"
+    )
+
+
+def pack(fields):
+    """One message holding the given byte strings."""
+    parts = [LENGTH.pack(len(fields))]
+    for field in fields:
+        parts += (LENGTH.pack(len(field)), field)
+    return b"".join(parts)
+
+
+def read_message(read):
+    """Fields of one message; read(k) must return exactly k bytes."""
+    (count,) = LENGTH.unpack(read(LENGTH.size))
+    return [read(LENGTH.unpack(read(LENGTH.size))[0]) for _ in range(count)]
+
+
+def connect(path):
+    """Socket connected to the daemon, or None when none is listening."""
+    sock = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(sock, phase, args, stdin=b""):
+    """Runs one phase on the daemon; returns (status, stdout, stderr)."""
+    env = "\n".join(f"{k}={v}" for k, v in os.environ.items() if k.startswith("LOST_LAND_"))
+    fields = [phase.encode(), os.fsencode(os.getcwd()), stdin, env.encode()]
+    sock.sendall(pack(fields + [os.fsencode(arg) for arg in args]))
+
+    def read(k):
+        data = bytearray()
+        while len(data) < k:
+            chunk = sock.recv(k - len(data))
+            if not chunk:
+                raise ConnectionError("Daemon closed the connection.")
+            data += chunk
+        return bytes(data)
+
+    status, out, err = read_message(read)
+    return int(status), out, err
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    path = default_socket()
+    if argv[:1] == ["--socket"] and len(argv) > 1:
+        path, argv = argv[1], argv[2:]
+    if not argv or argv[0] not in PHASES:
+        sys.exit(USAGE)
+    phase, args = argv[0], argv[1:]
+
+    sock = connect(path)
+    if sock is None:
+        # No daemon: behave exactly like main.py, just without the warm start.
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, PHASES[phase]] + args)
+    try:
+        # Phases 1 and 2 read the map from stdin (but not for --help).
+        reads_stdin = phase != "3" and not {"-h", "--help"} & set(args)
+        stdin = sys.stdin.buffer.read() if reads_stdin else b""
+        status, out, err = request(sock, phase, args, stdin)
+    finally:
+        sock.close()
+    sys.stdout.buffer.write(out)
+    sys.stdout.flush()
+    sys.stderr.buffer.write(err)
+    sys.stderr.flush()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Pre-warmed daemon that runs the phase entry points without process startup.
+
+Running main.py on a tiny map is mostly interpreter startup, the NumPy
+import and module loading; the search itself takes well under a
+millisecond. The daemon pays those costs once. It imports the three phase
+entry points and runs each solver on a small map to warm them up. Then it
+serves runs of any phase on a Unix socket, sent by the thin client
+(common.client), which takes the same arguments as main.py:
+
+    python -m common.daemon &
+    python -m common.client 3 Phase-3/map.txt --solver dp
+    python -m common.client 2 --solver dp < map.txt
+
+Each run calls the phase's main() with sys.argv, stdin, stdout, stderr, the
+working directory and the LOST_LAND_* environment swapped for the
+client's, so output and exit status match main.py exactly. All of them,
+and tracemalloc, are restored after the run; only the heuristic table
+cache (common.heuristics.get_table) is kept across runs on purpose. Runs execute one
+at a time, because those are process-wide. A long solve delays the runs
+queued behind it.
+
+Usage:
+    python -m common.daemon                          # socket from common.client.default_socket
+    python -m common.daemon --socket /tmp/ll.sock
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+
+from common.client import LENGTH, PHASES, ROOT, connect, default_socket, pack
+
+# A 3x3 map with thieves in a row, a pickup and a fight, for warm-up runs.
+WARMUP_MAP = b"1 ! -2\n! ! 3\n-4 5 !\n"
+
+# Solver arguments run once at startup, per phase (the parallel solvers
+# are skipped: they start a process pool).
+WARMUP_ARGS = {
+    "1": [["--solver", "stream"], ["--solver", "bfs"]],
+    "2": [["--solver", "astar", "--heuristic", kind] for kind in ("zero", "relaxed", "exact")]
+    + [["--solver", "anytime"], ["--solver", "dp"], ["--top-k", "2"]],
+    "3": [["--solver", kind] for kind in ("anytime", "astar", "bidirectional", "dp")]
+    + [["--queue", "heap"], ["--top-k", "2"]],
+}
+
+
+def _load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Daemon:
+    """
+    The phase entry points, loaded once, and the runs made through them.
+    Argument parsers are built once too: building one costs more than
+    solving a tiny map.
+    """
+
+    def __init__(self):
+        # Phase 3 imports its own modules by their bare names.
+        sys.path.insert(0, os.path.join(ROOT, "Phase-3"))
+        self.phases = {}
+        saved_argv = sys.argv
+        try:
+            for phase, path in PHASES.items():
+                module = _load_module(f"phase{phase}_main", path)
+                # The parser takes its program name ("main.py") from argv.
+                sys.argv = [path]
+                self.phases[phase] = (module.build_parser(), module.main)
+        finally:
+            sys.argv = saved_argv
+
+    def run(self, phase, args, stdin=b"", cwd=None, env=None):
+        """
+        Runs main() of a phase as if started with these arguments.
+        Returns (exit status, stdout bytes, stderr bytes).
+        """
+        saved = (sys.argv, sys.stdin, sys.stdout, sys.stderr, os.getcwd())
+        tracing = tracemalloc.is_tracing()
+        saved_env = {key: os.environ.get(key) for key in env or {}}
+        out = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        err = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        sys.argv = [PHASES[phase]] + list(args)
+        # Buffered like the real stdin: the map readers peek at the header.
+        sys.stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(stdin)), encoding="utf-8")
+        sys.stdout, sys.stderr = out, err
+        status = 0
+        try:
+            os.environ.update(env or {})
+            if cwd is not None:
+                os.chdir(cwd)
+            parser, main = self.phases[phase]
+            main(parser.parse_args(args))
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                status = e.code or 0
+            else:
+                print(e.code, file=err)
+                status = 1
+        except Exception:
+            traceback.print_exc(file=err)
+            status = 1
+        finally:
+            sys.argv, sys.stdin, sys.stdout, sys.stderr, home = saved
+            os.chdir(home)
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            # --trace-memory starts tracemalloc; a run that fails before its
+            # stats are reported would leave every later run traced.
+            if tracemalloc.is_tracing() and not tracing:
+                tracemalloc.stop()
+        out.flush()
+        err.flush()
+        return status, out.buffer.getvalue(), err.buffer.getvalue()
+
+    def warm_up(self):
+        """Runs every solver once on WARMUP_MAP; returns the seconds taken."""
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as directory:
+            map_file = os.path.join(directory, "warmup.txt")
+            with open(map_file, "wb") as f:
+                f.write(WARMUP_MAP)
+            for phase, runs in WARMUP_ARGS.items():
+                for args in runs:
+                    args = args + ["--no-cache"]
+                    if phase == "3":
+                        self.run(phase, [map_file] + args)
+                    else:
+                        self.run(phase, args, WARMUP_MAP)
+        return time.perf_counter() - start
+
+    def handle(self, fields):
+        """Answers one request message (see common.client) with a reply message."""
+        if len(fields) < 4 or fields[0].decode() not in PHASES:
+            return pack([b"2", b"", b"Bad request: expected phase, cwd, stdin, env and arguments.\n"])
+        phase, cwd, stdin, env = fields[:4]
+        env = dict(line.split("=", 1) for line in env.decode().splitlines() if "=" in line)
+        args = [os.fsdecode(arg) for arg in fields[4:]]
+        status, out, err = self.run(phase.decode(), args, stdin, os.fsdecode(cwd), env)
+        return pack([str(status).encode(), out, err])
+
+
+async def _read_message(reader):
+    (count,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    fields = []
+    for _ in range(count):
+        (size,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+        fields.append(await reader.readexactly(size))
+    return fields
+
+
+async def serve(daemon, path):
+    """Serves clients on a Unix socket; runs execute one at a time."""
+
+    async def client(reader, writer):
+        try:
+            while True:
+                try:
+                    fields = await _read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break  # Client done.
+                writer.write(daemon.handle(fields))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(client, path=path)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the phase entry points from one warm process.")
+    parser.add_argument("--socket", help="Unix socket to listen on (default: $LOST_LAND_DAEMON_SOCKET or a per-user temp file)")
+    args = parser.parse_args(argv)
+
+    path = args.socket or default_socket()
+    sock = connect(path)
+    if sock is not None:
+        sock.close()
+        parser.error(f"a daemon is already listening on {path}")
+    daemon = Daemon()
+    seconds = daemon.warm_up()
+    print(f"Warmed up in {seconds:.2f}s; listening on {path}.", file=sys.stderr)
+    try:
+        asyncio.run(serve(daemon, path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
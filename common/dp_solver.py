@@ -0,0 +1,176 @@
+"""
+Exact dynamic-programming solver for the Down/Right grid.
+
+Because Arian can only move Down or Right, the (row, col, has_thief) state
+space is a DAG and every cell on anti-diagonal d = row + col only depends on
+cells of diagonal d - 1. The solver sweeps the diagonals in order and updates
+both state layers (no thief / thief in the car) with vectorized NumPy
+operations, so the only Python-level loop runs over the 2n - 1 diagonals.
+
+The grid is passed as two arrays of shape (n, n):
+    values     -- integer cell values (ignored where thief_mask is True)
+    thief_mask -- True for "!" cells
+"""
+import numpy as np
+
+from common.rules import states_outcome
+
+# Sentinel cost for unreachable states; far from overflowing int64 on any
+# realistic path length.
+UNREACHABLE = np.iinfo(np.int64).max // 4
+
+# Bits of the per-state choice table used for path reconstruction.
+FROM_UP = 1  # predecessor is (r - 1, c) instead of (r, c - 1)
+FROM_THIEF = 2  # predecessor state had a thief in the car
+
+OBJECTIVES = ("coins", "stolen")
+
+
+def _step_costs(values, objective):
+    """
+    Returns the cost of entering each cell without / with a thief in the car.
+    Costs are minimized, so maximizing coins uses the negated cell value.
+    """
+    values = values.astype(np.int64, copy=False)
+    if objective == "coins":
+        # Without a thief Arian collects (or pays) the value; a thief takes it.
+        return -values, np.zeros_like(values)
+    if objective == "stolen":
+        # Without a thief nothing is lost; a thief steals abs(value).
+        return np.zeros_like(values), np.abs(values)
+    raise ValueError(f"Unknown objective: {objective}")
+
+
+def _diagonal(d, n, width=None):
+    """
+    Row indices (and matching columns) of anti-diagonal d of an n x n grid,
+    or of an n x width grid when width is given.
+    """
+    width = n if width is None else width
+    rows = np.arange(max(0, d - width + 1), min(d, n - 1) + 1)
+    return rows, d - rows
+
+
+def _min_of_predecessors(prev, rows):
+    """
+    Picks the cheaper of the Up and Left predecessors for each cell on the
+    current diagonal. prev is indexed by row + 1 so that prev[0] is padding.
+    Returns (best_cost, came_from_up).
+    """
+    up = prev[rows]  # row r - 1 on the previous diagonal
+    left = prev[rows + 1]  # row r on the previous diagonal
+    from_up = up < left
+    return np.where(from_up, up, left), from_up
+
+
+def sweep(values, thief_mask, objective="stolen"):
+    """
+    Runs the forward DP over all anti-diagonals.
+    Returns (goal_costs, choice) where goal_costs[t] is the optimal cost of
+    reaching (n-1, n-1) with thief state t, and choice is a uint8 array of
+    shape (2, n, n) holding the FROM_UP / FROM_THIEF bits of each state.
+    """
+    n = values.shape[0]
+    cost_free, cost_robbed = _step_costs(values, objective)
+    choice = np.zeros((2, n, n), dtype=np.uint8)
+
+    # Cost layers of the previous diagonal, indexed by row + 1.
+    prev = np.full((2, n + 1), UNREACHABLE, dtype=np.int64)
+    if thief_mask[0, 0]:
+        prev[1, 1] = 0
+    else:
+        prev[0, 1] = cost_free[0, 0]
+
+    for d in range(1, 2 * n - 1):
+        rows, cols = _diagonal(d, n)
+        best0, up0 = _min_of_predecessors(prev[0], rows)
+        best1, up1 = _min_of_predecessors(prev[1], rows)
+        is_thief = thief_mask[rows, cols]
+
+        # Plain cell: arrive without a thief and pay the cell, or arrive with
+        # one and let it rob the cell. Either way the car is empty afterwards.
+        free = best0 + cost_free[rows, cols]
+        robbed = best1 + cost_robbed[rows, cols]
+        use_robbed = robbed < free
+        plain_cost = np.where(use_robbed, robbed, free)
+        plain_up = np.where(use_robbed, up1, up0)
+
+        # Thief cell: an empty car picks the thief up, two thieves fight.
+        cur = np.full((2, n + 1), UNREACHABLE, dtype=np.int64)
+        cur[0, rows + 1] = np.where(is_thief, best1, plain_cost)
+        cur[1, rows + 1] = np.where(is_thief, best0, UNREACHABLE)
+        # Negative step costs can pull the sentinel down; snap it back so
+        # unreachable states never drift into the range of real costs.
+        cur[cur >= UNREACHABLE // 2] = UNREACHABLE
+
+        choice[0, rows, cols] = np.where(
+            is_thief, up1 * FROM_UP | FROM_THIEF, plain_up * FROM_UP | use_robbed * FROM_THIEF
+        )
+        choice[1, rows, cols] = up0 * FROM_UP
+        prev = cur
+
+    return prev[:, n], choice
+
+
+def reconstruct(choice, goal_thief):
+    """
+    Walks the choice table back from its bottom-right cell in state
+    goal_thief (the goal (n-1, n-1) for a full sweep).
+    Returns (path_coords, thief_states) ordered from the start cell.
+    """
+    r, c = choice.shape[1] - 1, choice.shape[2] - 1
+    t = goal_thief
+    path = [(r, c)]
+    states = [t]
+    while r or c:
+        bits = choice[t, r, c]
+        if bits & FROM_UP:
+            r -= 1
+        else:
+            c -= 1
+        t = 1 if bits & FROM_THIEF else 0
+        path.append((r, c))
+        states.append(t)
+    path.reverse()
+    states.reverse()
+    return path, states
+
+
+def path_outcome(values, thief_mask, path, states):
+    """Final coins and total stolen along a path with known thief states."""
+    rows, cols = np.array(path).T
+    return cells_outcome(values[rows, cols], thief_mask[rows, cols], states)
+
+
+def cells_outcome(cell_values, cell_thief, states):
+    """Final coins and total stolen from the cells of a path, in order."""
+    coins, stolen = states_outcome(cell_values, cell_thief, states)
+    return int(coins), int(stolen)
+
+
+def solve(values, thief_mask, objective="stolen"):
+    """
+    Solves the given objective exactly.
+    objective: "coins" maximizes final coins, "stolen" minimizes total stolen.
+    Returns (path_coords, final_coins, total_stolen).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    goal_costs, choice = sweep(values, thief_mask, objective)
+    goal_thief = int(goal_costs[1] < goal_costs[0])
+    if goal_costs[goal_thief] >= UNREACHABLE:
+        return None, 0, 0
+    path, states = reconstruct(choice, goal_thief)
+    coins, stolen = path_outcome(values, thief_mask, path, states)
+    return path, coins, stolen
+
+
+def solve_max_coins(values, thief_mask):
+    """Objective 2: path maximizing Arian's final coins."""
+    return solve(values, thief_mask, "coins")
+
+
+def solve_min_stolen(values, thief_mask):
+    """Objective 3: path minimizing the total amount stolen by thieves."""
+    return solve(values, thief_mask, "stolen")
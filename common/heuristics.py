@@ -0,0 +1,193 @@
+"""
+Precomputed admissible heuristic tables for the A* solvers.
+
+A table holds, for every (row, col, has_thief) state, a lower bound on the
+cost still to pay between that state (the cell itself already applied) and
+the goal. Costs follow common.dp_solver: the "stolen" objective pays the
+amount stolen, the "coins" objective pays the negated coins, so an upper
+bound on future coins is simply -table[state].
+
+Tables have shape (n, n, 2); flattened, the index of a state is
+(row * n + col) * 2 + has_thief, the state id both A* solvers already use.
+A table towards another goal cell (gr, gc) covers only the cells that can
+still reach it and has shape (gr + 1, gc + 1, 2).
+
+Kinds:
+    zero    -- h = 0 (plain Dijkstra / exhaustive search)
+    relaxed -- every cell is charged its cheapest outcome under any thief
+               state; only a thief already in the car is modeled exactly
+               for the next step
+    exact   -- the true cost-to-go from a reverse DP over (cell, has_thief);
+               the tightest admissible bound there is
+
+Both non-trivial kinds are built by a reverse sweep over anti-diagonals with
+vectorized NumPy updates, and are cached per map so that repeated solves of
+the same map skip the rebuild.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from common.dp_solver import OBJECTIVES, UNREACHABLE, _diagonal, _step_costs
+
+KINDS = ("zero", "relaxed", "exact")
+
+# Number of tables kept by get_table.
+CACHE_SIZE = 8
+_cache = OrderedDict()
+
+
+def map_digest(values, thief_mask):
+    """Content hash of a map, used as the cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.int64(values.shape[0]).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.int32).tobytes())
+    digest.update(np.packbits(thief_mask).tobytes())
+    return digest.hexdigest()
+
+
+def _sweep_back(shape, enter_free, picks_up, enter_robbed, exact):
+    """
+    Reverse DP over anti-diagonals from the bottom-right cell of a grid of
+    the given (rows, cols) shape.
+    enter_free / enter_robbed are the costs of entering each cell without /
+    with a thief in the car, and picks_up marks cells that put a thief in an
+    empty car. With exact=False every successor is continued with the
+    no-thief cost-to-go, which is what the relaxed kind needs.
+    Returns the (rows, cols, 2) cost-to-go table.
+    """
+    n, width = shape
+    table = np.zeros((n, width, 2), dtype=np.int64)
+    # Cost of entering each cell of the previous (later) diagonal plus its
+    # cost-to-go, per incoming thief state, indexed by row.
+    nxt = None
+
+    for d in range(n + width - 2, -1, -1):
+        rows, cols = _diagonal(d, n, width)
+        if nxt is not None:
+            # Successors: Down is row r + 1, Right is row r of diagonal d + 1.
+            table[rows, cols, 0] = np.minimum(nxt[0, rows + 1], nxt[0, rows])
+            table[rows, cols, 1] = np.minimum(nxt[1, rows + 1], nxt[1, rows])
+
+        h0 = table[rows, cols, 0]
+        h1 = table[rows, cols, 1]
+        after_free = np.where(picks_up[rows, cols], h1, h0) if exact else h0
+        nxt = np.full((2, n + 1), UNREACHABLE, dtype=np.int64)
+        nxt[0, rows] = enter_free[rows, cols] + after_free
+        nxt[1, rows] = enter_robbed[rows, cols] + h0
+    return table
+
+
+def build_table(values, thief_mask, objective="stolen", kind="exact", goal=None):
+    """
+    Builds a heuristic table of the given kind (see module docstring),
+    towards the bottom-right cell or the given (row, col) goal.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown heuristic: {kind}")
+    if goal is not None:
+        gr, gc = goal
+        values, thief_mask = values[: gr + 1, : gc + 1], thief_mask[: gr + 1, : gc + 1]
+    shape = values.shape
+    if kind == "zero":
+        return np.zeros(shape + (2,), dtype=np.int64)
+
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    cost_free, cost_robbed = _step_costs(values, objective)
+    # Arriving with a thief: a thief cell means a fight, anything else is robbed.
+    enter1 = np.where(thief_mask, 0, cost_robbed)
+    if kind == "exact":
+        # Arriving empty: a thief cell is free but puts a thief in the car.
+        enter0 = np.where(thief_mask, 0, cost_free)
+        return _sweep_back(shape, enter0, thief_mask, enter1, exact=True)
+
+    cheapest = np.where(thief_mask, 0, np.minimum(cost_free, cost_robbed))
+    return _sweep_back(shape, cheapest, thief_mask, enter1, exact=False)
+
+
+def repair_table(table, values, thief_mask, objective, cells):
+    """
+    Brings an exact table up to date in place after the given (row, col)
+    cells of values / thief_mask changed. Only states up and to the left of
+    a changed cell can be affected, and the repair walks back diagonal by
+    diagonal from the changed cells, recomputing only the predecessors of
+    entries that actually changed. Its cost follows the changed region, not
+    the grid size. Returns the number of cells recomputed.
+    """
+    h, w = table.shape[:2]
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    # A changed cell alters the cost of entering it, so its predecessors
+    # must be recomputed even where its own entry stays the same.
+    pending = {}
+    for r, c in cells:
+        if r < h and c < w:
+            pending.setdefault(r + c, []).append(r)
+    recomputed = 0
+    d = max(pending, default=0)
+    changed = np.empty(0, dtype=np.intp)  # Rows of diagonal d whose entry changed.
+    while d > 0:
+        rows = np.concatenate((changed, np.array(pending.pop(d, []), dtype=np.intp)))
+        if not len(rows):
+            if not pending:
+                break
+            d = max(pending)
+            continue
+        # Predecessors on diagonal d - 1: Up is row r - 1, Left is row r.
+        d -= 1
+        rows = np.unique(np.concatenate((rows - 1, rows)))
+        rows = rows[(rows >= max(0, d - w + 1)) & (rows <= min(d, h - 1))]
+        cols = d - rows
+        best = np.full((2, len(rows)), UNREACHABLE, dtype=np.int64)
+        for nr, nc in ((rows + 1, cols), (rows, cols + 1)):
+            ok = (nr < h) & (nc < w)
+            r_ok, c_ok = nr[ok], nc[ok]
+            is_thief = thief_mask[r_ok, c_ok]
+            cost_free, cost_robbed = _step_costs(values[r_ok, c_ok], objective)
+            after = table[r_ok, c_ok, 0]
+            enter0 = np.where(is_thief, table[r_ok, c_ok, 1], cost_free + after)
+            enter1 = np.where(is_thief, after, cost_robbed + after)
+            best[0, ok] = np.minimum(best[0, ok], enter0)
+            best[1, ok] = np.minimum(best[1, ok], enter1)
+        old = table[rows, cols]
+        differs = (old[:, 0] != best[0]) | (old[:, 1] != best[1])
+        table[rows, cols, 0] = best[0]
+        table[rows, cols, 1] = best[1]
+        recomputed += len(rows)
+        changed = rows[differs]
+    return recomputed
+
+
+def get_table(values, thief_mask, objective="stolen", kind="exact"):
+    """build_table with a small per-map LRU cache keyed by map content."""
+    key = (map_digest(values, thief_mask), objective, kind)
+    table = _cache.get(key)
+    if table is None:
+        table = build_table(values, thief_mask, objective, kind)
+        _cache[key] = table
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return table
+
+
+def as_lookup(table):
+    """
+    Flat, read-only view of a table indexed by state id. Indexing it yields
+    plain Python ints, which is much cheaper than NumPy scalar indexing in
+    the solvers' inner loops.
+    """
+    return memoryview(np.ascontiguousarray(table, dtype=np.int64)).cast("B").cast("q")
+
+
+def resolve(heuristic, values, thief_mask, objective):
+    """
+    Turns a heuristic plug-in into a flat lookup indexed by state id.
+    heuristic is a kind name from KINDS, or a precomputed (n, n, 2) table.
+    """
+    if isinstance(heuristic, str):
+        heuristic = get_table(values, thief_mask, objective, heuristic)
+    return as_lookup(heuristic)
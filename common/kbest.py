@@ -0,0 +1,91 @@
+"""
+The k best paths for an objective, in order.
+
+The exact cost-to-go table from common.heuristics gives, for every
+(cell, has_thief) state, the optimal cost still to pay, so the best
+completion of any prefix is known without search. Paths are enumerated
+lazily, in the style of Eppstein's k-shortest paths on a DAG:
+
+    1. Pop the cheapest prefix from a heap (at first, just the start cell).
+    2. Follow its optimal completion to the goal. At every step, push the
+       move that was not taken as a new prefix, keyed by the exact cost of
+       its own best completion.
+    3. The completed path is the next best path.
+
+Every prefix on the heap is a distinct branch of the tree of paths, so each
+path comes out once, in order of cost. After the O(n^2) table, each path
+costs O(n log(k n)) (one walk, one push per step) instead of a full search.
+"""
+import heapq
+from itertools import count
+
+import numpy as np
+
+from common.dp_solver import OBJECTIVES
+from common.heuristics import as_lookup, get_table
+from common.rules import score_path
+
+
+def k_best_paths(values, thief_mask, objective="stolen", k=10):
+    """
+    Yields up to k (path_coords, final_coins, total_stolen) tuples, best
+    first: by final coins (descending) for "coins", by total stolen
+    (ascending) for "stolen". Ties come out in no particular order.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    n = values.shape[0]
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+    cost_to_go = as_lookup(get_table(values, thief_mask, objective, "exact"))
+    flat_values = as_lookup(np.asarray(values, dtype=np.int64))
+    thief = memoryview(np.ascontiguousarray(thief_mask).view(np.uint8).ravel())
+    count_coins = objective == "coins"
+    goal = n * n - 1
+
+    def enter(t, cell):
+        """(thief state after, step cost) of entering cell with thief state t."""
+        if t:
+            # Robbed (or a fight on a thief cell); the thief leaves.
+            return 0, 0 if count_coins or thief[cell] else abs(flat_values[cell])
+        if thief[cell]:
+            return 1, 0
+        return 0, -flat_values[cell] if count_coins else 0
+
+    # Heap entries: (best total cost through the prefix, tie, cost so far,
+    # state id, prefix as a linked list of (cell, previous node)).
+    tie = count()
+    t0 = thief[0]
+    g0 = 0 if t0 or not count_coins else -flat_values[0]
+    heap = [(g0 + cost_to_go[t0], next(tie), g0, t0, (0, None))]
+    found = 0
+    while heap and found < k:
+        _, _, g, state, node = heapq.heappop(heap)
+        cell, t = state >> 1, state & 1
+        # Follow the optimal completion, branching off the other move.
+        while cell != goal:
+            r, c = divmod(cell, n)
+            branches = []
+            if r + 1 < n:
+                branches.append(cell + n)
+            if c + 1 < n:
+                branches.append(cell + 1)
+            options = []
+            for nxt in branches:
+                nt, step = enter(t, nxt)
+                nstate = nxt * 2 + nt
+                options.append((g + step + cost_to_go[nstate], g + step, nstate))
+            options.sort()
+            for total, g_other, other in options[1:]:
+                heapq.heappush(heap, (total, next(tie), g_other, other, (other >> 1, node)))
+            _, g, state = options[0]
+            cell, t = state >> 1, state & 1
+            node = (cell, node)
+
+        path = []
+        while node is not None:
+            cell, node = node
+            path.append(divmod(cell, n))
+        path.reverse()
+        coins, stolen = score_path(values, thief_mask, path)
+        found += 1
+        yield path, coins, stolen
@@ -0,0 +1,311 @@
+"""
+Shared map ingestion for every phase.
+
+Two on-disk formats are supported and detected automatically:
+
+Text -- whitespace-separated cells, "!" for thieves, with an optional first
+line holding n (the Phase 1/2 input format) or without it (Phase 3 maps).
+The whole file is tokenized in bulk with NumPy on the raw bytes instead of
+converting cell by cell in Python.
+
+Binary -- a 16-byte header followed by n row records:
+    header:  MAGIC (8 bytes) | n (uint32 LE) | flags (uint32 LE, always 0)
+    row:     n int32 LE cell values | ceil(n / 8) bytes of thief bits
+Thief bits are packed little-endian (bit c % 8 of byte c // 8 is column c)
+and the value stored under a thief is 0. Storing each row's mask next to
+its values keeps the file readable one row at a time from a pipe, while a
+file on disk can be memory-mapped as a strided (n, n) int32 view.
+
+Both loaders return (values, thief_mask): an int32 array of shape (n, n)
+and a bool array of the same shape.
+
+Run as a script to convert between the formats:
+    python -m common.map_io map.txt map.bin
+    python -m common.map_io map.bin map.txt
+"""
+import argparse
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"LLMAP\x00\x01\n"
+HEADER = struct.Struct("<8sII")
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+_SPACE, _NEWLINE, _MINUS, _PLUS, _BANG, _ZERO = b" \n-+!0"
+# Longest digit run that can still fit in an int32 cell.
+_MAX_DIGITS = 10
+
+
+def _row_dtype(n):
+    """Structured dtype of one binary row record."""
+    return np.dtype([("values", "<i4", (n,)), ("thief", "u1", ((n + 7) // 8,))])
+
+
+def _unpack_thief(packed, n):
+    """Unpacks little-endian thief bits of shape (..., ceil(n / 8)) to bools."""
+    return np.unpackbits(packed, axis=-1, count=n, bitorder="little").astype(bool)
+
+
+def _tokenize(data):
+    """
+    Parses every whitespace-separated cell of a text buffer at once.
+    Returns (values, thief, row_lengths) as NumPy arrays, where row_lengths
+    counts the cells of every non-blank line.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    space = buf <= _SPACE
+    solid = ~space
+    index = np.int32 if len(buf) < INT32_MAX else np.int64
+    starts = np.flatnonzero(solid & np.concatenate(([True], space[:-1]))).astype(index)
+    ends = np.flatnonzero(solid & np.concatenate((space[1:], [True]))).astype(index) + 1
+    lengths = ends - starts
+
+    first = buf[starts]
+    thief = (first == _BANG) & (lengths == 1)
+    signed = (first == _MINUS) | (first == _PLUS)
+    digits = np.where(thief, 0, lengths - signed)
+    bad = ~thief & ((digits < 1) | (digits > _MAX_DIGITS))
+
+    # Accumulate numbers one digit column at a time: the loop runs once per
+    # digit of the longest cell, never once per cell.
+    values = np.zeros(len(starts), dtype=np.int64)
+    first_digit = starts + signed
+    for k in range(int(digits.max(initial=0))):
+        live = np.flatnonzero(digits > k)
+        digit = buf[first_digit[live] + k] - _ZERO
+        bad[live] |= digit > 9
+        values[live] = values[live] * 10 + digit
+    if bad.any():
+        token = np.argmax(bad)
+        text = data[starts[token]:ends[token]].decode(errors="replace")
+        raise ValueError(f"Invalid cell value: {text}")
+    values[first == _MINUS] *= -1
+
+    line_ends = np.searchsorted(starts, np.flatnonzero(buf == _NEWLINE))
+    row_lengths = np.diff(line_ends, prepend=0, append=len(starts))
+    return values, thief, row_lengths[row_lengths > 0]
+
+
+def parse_text(data):
+    """
+    Parses a text map (bytes) with or without the leading size line.
+    Returns (values, thief_mask).
+    """
+    values, thief, row_lengths = _tokenize(data)
+    if not len(values):
+        raise ValueError("Map is empty!")
+
+    # A lone number on the first line followed by more rows is the size line.
+    if row_lengths[0] == 1 and len(row_lengths) > 1 and not thief[0]:
+        n = int(values[0])
+        if n <= 0:
+            raise ValueError("Grid size must be positive.")
+        values, thief, row_lengths = values[1:], thief[1:], row_lengths[1:]
+        if len(row_lengths) != n:
+            raise ValueError(f"Expected {n} rows, found {len(row_lengths)}.")
+        short = np.flatnonzero(row_lengths != n)
+        if short.size:
+            raise ValueError(f"Row {short[0]} does not have {n} elements.")
+    else:
+        n = len(row_lengths)
+        if (row_lengths != n).any():
+            raise ValueError("Map is not square!")
+
+    if values.min() < INT32_MIN or values.max() > INT32_MAX:
+        raise ValueError("Cell value does not fit in int32.")
+    values[thief] = 0
+    return values.astype(np.int32).reshape(n, n), thief.reshape(n, n)
+
+
+def parse_binary(data):
+    """Parses an in-memory binary map. Returns (values, thief_mask)."""
+    magic, n, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary map.")
+    rows = np.frombuffer(data, dtype=_row_dtype(n), count=n, offset=HEADER.size)
+    return rows["values"], _unpack_thief(rows["thief"], n)
+
+
+def parse_map(data):
+    """Parses an in-memory map in either format."""
+    if data.startswith(MAGIC):
+        return parse_binary(data)
+    return parse_text(data)
+
+
+def read_map(stream):
+    """Reads a whole map in either format from a binary stream."""
+    return parse_map(stream.read())
+
+
+def load_map(file_path, mmap=True):
+    """
+    Loads a map file in either format. Binary maps are memory-mapped
+    (read-only) unless mmap is False.
+    Returns (values, thief_mask).
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(HEADER.size)
+        if not head.startswith(MAGIC):
+            return parse_text(head + f.read())
+        if not mmap:
+            return parse_binary(head + f.read())
+    _, n, _ = HEADER.unpack(head)
+    rows = _map_rows(file_path, n)
+    return rows["values"], _unpack_thief(rows["thief"], n)
+
+
+def _map_rows(file_path, n):
+    return np.memmap(file_path, dtype=_row_dtype(n), mode="r", offset=HEADER.size, shape=(n,))
+
+
+def open_rows(file_path):
+    """
+    Memory-maps the row records of a binary map without reading any of them.
+    Returns (n, rows); read_block copies rectangular blocks out of rows.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(HEADER.size)
+    if not head.startswith(MAGIC):
+        raise ValueError("Not a binary map.")
+    _, n, _ = HEADER.unpack(head)
+    return n, _map_rows(file_path, n)
+
+
+def read_block(rows, r0, r1, c0, c1):
+    """
+    Reads rows r0:r1, columns c0:c1 of memory-mapped row records.
+    Returns (values, thief_mask) of shape (r1 - r0, c1 - c0); only the
+    pages holding the block are touched.
+    """
+    block = rows[r0:r1]
+    values = np.array(block["values"][:, c0:c1])
+    packed = block["thief"][:, c0 // 8 : (c1 + 7) // 8]
+    offset = c0 % 8
+    thief = np.unpackbits(packed, axis=-1, bitorder="little")[:, offset : offset + c1 - c0]
+    return values, thief.astype(bool)
+
+
+def stream_rows(stream):
+    """
+    Reads a map one row at a time from a binary stream in either format.
+    Returns (n, rows) where rows yields (values_row, thief_row) arrays, so
+    only a single row is held in memory at once.
+    """
+    head = stream.peek(len(MAGIC))[: len(MAGIC)] if hasattr(stream, "peek") else b""
+    if head == MAGIC:
+        _, n, _ = HEADER.unpack(stream.read(HEADER.size))
+        return n, _binary_rows(stream, n)
+
+    first = _next_line(stream)
+    if first is None:
+        raise ValueError("Map is empty!")
+    second = _next_line(stream)
+    values, thief, _ = _tokenize(first)
+    if len(values) == 1 and second is not None and not thief[0]:
+        # Size line followed by the rows.
+        n = int(values[0])
+        if n <= 0:
+            raise ValueError("Grid size must be positive.")
+        pending = [second]
+    else:
+        n = len(values)
+        pending = [first] if second is None else [first, second]
+    return n, _text_rows(stream, n, pending)
+
+
+def _next_line(stream):
+    """Returns the next non-blank line, or None at end of stream."""
+    for line in stream:
+        if line.strip():
+            return line
+    return None
+
+
+def _text_rows(stream, n, pending):
+    for r in range(n):
+        line = pending.pop(0) if pending else _next_line(stream)
+        if line is None:
+            raise ValueError(f"Expected {n} rows, found {r}.")
+        values, thief, _ = _tokenize(line)
+        if len(values) != n:
+            raise ValueError(f"Row {r} does not have {n} elements.")
+        values[thief] = 0
+        yield values, thief
+
+
+def _binary_rows(stream, n):
+    dtype = _row_dtype(n)
+    for r in range(n):
+        record = stream.read(dtype.itemsize)
+        if len(record) != dtype.itemsize:
+            raise ValueError(f"Expected {n} rows, found {r}.")
+        row = np.frombuffer(record, dtype=dtype)[0]
+        yield row["values"], _unpack_thief(row["thief"], n)
+
+
+def to_grid(values, thief_mask):
+    """Converts (values, thief_mask) to the list-of-lists grid with "!" thieves."""
+    grid = values.tolist()
+    for r, c in zip(*np.nonzero(thief_mask)):
+        grid[r][c] = "!"
+    return grid
+
+
+def write_text(file_path, values, thief_mask, size_line=True):
+    """Writes a text map, optionally preceded by the size line."""
+    n = values.shape[0]
+    with open(file_path, "w") as f:
+        if size_line:
+            f.write(f"{n}\n")
+        for row_values, row_thief in zip(values, thief_mask):
+            cells = row_values.astype(str).astype(object)
+            cells[row_thief] = "!"
+            f.write(" ".join(cells))
+            f.write("\n")
+
+
+def write_binary(file_path, values, thief_mask):
+    """Writes a binary map."""
+    n = values.shape[0]
+    rows = np.empty(n, dtype=_row_dtype(n))
+    rows["values"] = np.where(thief_mask, 0, values)
+    rows["thief"] = np.packbits(thief_mask, axis=-1, bitorder="little")
+    with open(file_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n, 0))
+        rows.tofile(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert maps between text and binary format.")
+    parser.add_argument("source", help="map to read (text or binary)")
+    parser.add_argument("target", help="file to write")
+    parser.add_argument(
+        "--to",
+        choices=["text", "binary"],
+        help="output format (default: the opposite of the input format)",
+    )
+    parser.add_argument(
+        "--no-size-line",
+        action="store_true",
+        help="omit the leading n line when writing text (Phase 3 style)",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.source, "rb") as f:
+        source_is_binary = f.read(len(MAGIC)) == MAGIC
+    values, thief_mask = load_map(args.source)
+    target = args.to or ("text" if source_is_binary else "binary")
+    if target == "binary":
+        write_binary(args.target, values, thief_mask)
+    else:
+        write_text(args.target, values, thief_mask, size_line=not args.no_size_line)
+    n = values.shape[0]
+    print(f"Wrote {n}x{n} {target} map to '{args.target}'.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Seeded synthetic map generator.
+
+The same arguments and seed always produce the same map, so benchmark runs
+on different commits see identical inputs.
+
+Layouts (where the thieves go):
+    random          -- every cell is a thief with probability `thieves`
+    diagonal-chain  -- random thieves plus an unbroken chain of thieves
+                       along the main diagonal, (i, i) and (i, i + 1)
+    stripes         -- thieves on every third anti-diagonal, so every path
+                       is robbed again and again and the loss search has to
+                       explore most of the grid
+    checkerboard    -- thieves on every cell with (row + col) even
+
+Value distributions (cells that are not thieves):
+    uniform     -- integers in [low, high]
+    costs       -- only costs, integers in [low, -1]
+    treasures   -- only treasures, integers in [1, high]
+    heavy-tail  -- random sign, Zipf-distributed magnitude capped at
+                   max(|low|, high) * 100
+
+Usage:
+    python -m common.mapgen 1000 --seed 7 --layout stripes -o maps/s1000.bin
+    python -m common.mapgen 50 --thieves 0.3 --values treasures -o m50.txt
+"""
+import argparse
+
+import numpy as np
+
+from common.map_io import write_binary, write_text
+
+LAYOUTS = ("random", "diagonal-chain", "stripes", "checkerboard")
+DISTRIBUTIONS = ("uniform", "costs", "treasures", "heavy-tail")
+
+
+def _cell_values(rng, n, distribution, low, high):
+    if distribution == "uniform":
+        return rng.integers(low, high, size=(n, n), endpoint=True)
+    if distribution == "costs":
+        return rng.integers(low, -1, size=(n, n), endpoint=True)
+    if distribution == "treasures":
+        return rng.integers(1, high, size=(n, n), endpoint=True)
+    if distribution == "heavy-tail":
+        cap = max(abs(low), high) * 100
+        magnitude = np.minimum(rng.zipf(1.5, size=(n, n)), cap)
+        return np.where(rng.random((n, n)) < 0.5, -magnitude, magnitude)
+    raise ValueError(f"Unknown value distribution: {distribution}")
+
+
+def _thief_layout(rng, n, layout, thieves):
+    rows, cols = np.indices((n, n))
+    if layout == "random":
+        return rng.random((n, n)) < thieves
+    if layout == "diagonal-chain":
+        mask = rng.random((n, n)) < thieves
+        mask[(cols == rows) | (cols == rows + 1)] = True
+        return mask
+    if layout == "stripes":
+        return (rows + cols) % 3 == 0
+    if layout == "checkerboard":
+        return (rows + cols) % 2 == 0
+    raise ValueError(f"Unknown layout: {layout}")
+
+
+def generate_map(n, seed=0, thieves=0.2, layout="random", values="uniform", low=-10, high=10):
+    """
+    Generates an n x n map. Returns (values, thief_mask) in the same form
+    as common.map_io.load_map: int32 values (0 under thieves) and a bool mask.
+    """
+    if n <= 0:
+        raise ValueError("Grid size must be positive.")
+    if not low <= -1 or not high >= 1:
+        raise ValueError("Need low <= -1 and high >= 1.")
+    rng = np.random.default_rng(seed)
+    cell_values = _cell_values(rng, n, values, low, high)
+    thief_mask = _thief_layout(rng, n, layout, thieves)
+    cell_values = np.where(thief_mask, 0, cell_values).astype(np.int32)
+    return cell_values, thief_mask
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic map.")
+    parser.add_argument("n", type=int, help="grid size")
+    parser.add_argument("-o", "--output", required=True, help="map file (.bin for binary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--thieves", type=float, default=0.2, help="thief density (default: 0.2)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="random")
+    parser.add_argument("--values", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--low", type=int, default=-10, help="smallest cost (default: -10)")
+    parser.add_argument("--high", type=int, default=10, help="largest treasure (default: 10)")
+    parser.add_argument(
+        "--no-size-line",
+        action="store_true",
+        help="omit the leading n line in text output (Phase 3 style)",
+    )
+    args = parser.parse_args(argv)
+
+    values, thief_mask = generate_map(
+        args.n, args.seed, args.thieves, args.layout, args.values, args.low, args.high
+    )
+    if args.output.endswith(".bin"):
+        write_binary(args.output, values, thief_mask)
+    else:
+        write_text(args.output, values, thief_mask, size_line=not args.no_size_line)
+
+
+if __name__ == "__main__":
+    main()
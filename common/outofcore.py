@@ -0,0 +1,302 @@
+"""
+Out-of-core solver for maps that do not fit in memory.
+
+The in-memory solvers hold the whole grid, and the DP also a (2, n, n)
+choice table; for a 50000 x 50000 map that is far more than RAM. This
+solver reads a binary map through a memory map, one tile at a time, and
+keeps only O(n) costs between tiles:
+
+    sweep      -- the anti-diagonal DP of common.dp_solver, run tile by tile.
+                  A tile takes the costs of the row above it (one frontier
+                  row across the rectangle, per thief state) and of the
+                  column to its left, and hands on its own last row and
+                  column.
+    split      -- Hirschberg's divide and conquer. A forward sweep over the
+                  top half of a rectangle gives the cost of reaching each
+                  cell of its last row; a backward sweep over the bottom
+                  half gives the cost of finishing from each cell of its
+                  first row. The cheapest sum is where the optimal path
+                  steps down between the halves, and each half is solved
+                  again on the smaller rectangle the path can still use.
+    base case  -- rectangles within the block budget are swept in memory
+                  with a choice table and walked back, as in dp_solver.
+
+The two sub-rectangles of a split cover about half of its area, so all
+levels together sweep about twice the map, while memory stays at one tile
+plus a few O(n) rows and the path itself.
+
+The optimal cost is the one common.dp_solver finds; among equally good paths
+another one may be returned. Text maps are parsed into memory first; convert
+large maps to binary with `python -m common.map_io`.
+
+Usage:
+    python -m common.outofcore maps/s50000.bin
+    python -m common.outofcore maps/s50000.bin --objective coins --block-mb 256 --moves
+"""
+import argparse
+from math import isqrt
+
+import numpy as np
+
+from common.dp_solver import (
+    FROM_THIEF,
+    FROM_UP,
+    OBJECTIVES,
+    UNREACHABLE,
+    _step_costs,
+    cells_outcome,
+    reconstruct,
+)
+from common.map_io import MAGIC, load_map, open_rows, read_block
+from common.path_io import encode_path
+from common.stats import SearchStats, timed
+
+DEFAULT_BLOCK_MB = 64
+# Bytes per cell of a tile (int32 value, bool thief flag and two int64
+# step costs), and of a base case, which adds two choice bytes.
+_TILE_CELL_BYTES = 21
+_BASE_CELL_BYTES = 23
+
+
+def _sweep_tile(values, thief_mask, top, left, objective, backward=False, choice=None):
+    """
+    Runs the DP over one (h, w) tile, given the costs of the row above it
+    (top, shape (2, w)) and of the column to its left (left, shape (2, h)).
+    Returns (bottom, right): the costs of its last row and last column.
+
+    Forward, a cost is that of reaching the cell and ending in thief state t.
+    Backward the tile is passed flipped (so "above" is the row below), and a
+    cost is that of entering the cell in state t and finishing. With choice,
+    a forward sweep also records the dp_solver choice bits.
+    """
+    h, w = thief_mask.shape
+    # Flat copies of the tile: cell (r, d - r) of diagonal d sits at
+    # r * (w - 1) + d, so each diagonal is a strided slice, not a gather.
+    cost_free, cost_robbed = (np.ascontiguousarray(costs).ravel() for costs in _step_costs(values, objective))
+    thief = np.ascontiguousarray(thief_mask).ravel()
+    # Two thieves fight: nothing is robbed on a thief cell.
+    cost_robbed[thief] = 0
+    stride = max(w - 1, 1)
+    tile_choice = np.empty((2, h * w), dtype=np.uint8) if choice is not None else None
+
+    bottom = np.empty((2, w), dtype=np.int64)
+    right = np.empty((2, h), dtype=np.int64)
+    # Cost layers of the previous diagonal, indexed by row + 1; prev[:, 0]
+    # is the row above the tile. Only the slots of the previous diagonal and
+    # the two boundary slots are ever read, so the buffers are reused.
+    prev = np.full((2, h + 1), UNREACHABLE, dtype=np.int64)
+    cur = np.empty_like(prev)
+    for d in range(h + w - 1):
+        lo, hi = max(0, d - w + 1), min(d, h - 1)
+        cells = slice(lo * (w - 1) + d, hi * (w - 1) + d + 1, stride)
+        prev[:, 0] = top[:, d] if d < w else UNREACHABLE
+        if d < h:
+            # First column: its left neighbour lies outside the tile.
+            prev[:, d + 1] = left[:, d]
+        up = prev[:, lo : hi + 1]
+        from_left = prev[:, lo + 1 : hi + 2]
+        best = np.minimum(up, from_left)
+        is_thief = thief[cells]
+        out = cur[:, lo + 1 : hi + 2]
+
+        if backward:
+            # best[t]: cheapest finish from the next cell in state t.
+            np.add(best[0], cost_free[cells], out=out[0])
+            np.copyto(out[0], best[1], where=is_thief)
+            np.add(best[0], cost_robbed[cells], out=out[1])
+        else:
+            free = best[0] + cost_free[cells]
+            robbed = best[1] + cost_robbed[cells]
+            np.minimum(free, robbed, out=out[0])
+            np.copyto(out[0], best[1], where=is_thief)
+            out[1] = UNREACHABLE
+            np.copyto(out[1], best[0], where=is_thief)
+            if choice is not None:
+                up0, up1 = up < from_left
+                use_robbed = robbed < free
+                plain_up = np.where(use_robbed, up1, up0)
+                tile_choice[0, cells] = np.where(
+                    is_thief, up1 * FROM_UP | FROM_THIEF, plain_up * FROM_UP | use_robbed * FROM_THIEF
+                )
+                tile_choice[1, cells] = up0 * FROM_UP
+        np.putmask(out, out >= UNREACHABLE // 2, UNREACHABLE)
+        prev, cur = cur, prev
+
+        if d >= h - 1:
+            bottom[:, d - h + 1] = out[:, -1]
+        if d >= w - 1:
+            right[:, d - w + 1] = out[:, 0]
+    if choice is not None:
+        choice[:] = tile_choice.reshape(2, h, w)
+    return bottom, right
+
+
+def _tile_shape(h, w, cells):
+    """Tile of about `cells` cells, as square as the rectangle allows."""
+    rows = min(h, max(1, isqrt(cells)))
+    return rows, min(w, max(1, cells // rows))
+
+
+def _one_state(t):
+    """Cost vector allowing only thief state t."""
+    costs = np.full(2, UNREACHABLE, dtype=np.int64)
+    costs[t] = 0
+    return costs
+
+
+class _Solver:
+    """One solve over a block reader: read(r0, r1, c0, c1) -> (values, thief_mask)."""
+
+    def __init__(self, read, objective, block_bytes, stats):
+        self.read = read
+        self.objective = objective
+        self.tile_cells = max(1, block_bytes // _TILE_CELL_BYTES)
+        self.base_cells = max(1, block_bytes // _BASE_CELL_BYTES)
+        self.stats = stats
+        self.cells, self.states, self.values, self.thief = [], [], [], []
+
+    def _tile(self, values, thief_mask, top, left, **options):
+        if self.stats is not None:
+            self.stats.nodes_popped += 2 * values.size
+        return _sweep_tile(values, thief_mask, top, left, self.objective, **options)
+
+    def forward(self, r0, r1, c0, c1, entry):
+        """
+        Costs (2, c1 - c0) of reaching each cell of row r1 - 1, entering
+        (r0, c0) from a predecessor whose state costs are entry.
+        """
+        frontier = np.full((2, c1 - c0), UNREACHABLE, dtype=np.int64)
+        frontier[:, 0] = entry
+        th, tw = _tile_shape(r1 - r0, c1 - c0, self.tile_cells)
+        for a in range(r0, r1, th):
+            b = min(a + th, r1)
+            left = np.full((2, b - a), UNREACHABLE, dtype=np.int64)
+            for c in range(c0, c1, tw):
+                e = min(c + tw, c1)
+                values, thief_mask = self.read(a, b, c, e)
+                span = slice(c - c0, e - c0)
+                frontier[:, span], left = self._tile(values, thief_mask, frontier[:, span], left)
+        return frontier
+
+    def backward(self, r0, r1, c0, c1, exit_costs):
+        """
+        Costs (2, c1 - c0) of entering each cell of row r0 in state t from
+        above and finishing at (r1 - 1, c1 - 1) in a state allowed by
+        exit_costs.
+        """
+        frontier = np.full((2, c1 - c0), UNREACHABLE, dtype=np.int64)
+        frontier[:, -1] = exit_costs
+        th, tw = _tile_shape(r1 - r0, c1 - c0, self.tile_cells)
+        for b in range(r1, r0, -th):
+            a = max(b - th, r0)
+            left = np.full((2, b - a), UNREACHABLE, dtype=np.int64)
+            for e in range(c1, c0, -tw):
+                c = max(e - tw, c0)
+                values, thief_mask = self.read(a, b, c, e)
+                span = slice(c - c0, e - c0)
+                first_row, left = self._tile(
+                    values[::-1, ::-1], thief_mask[::-1, ::-1], frontier[:, span][:, ::-1], left, backward=True
+                )
+                frontier[:, span] = first_row[:, ::-1]
+        return frontier
+
+    def solve(self, r0, r1, c0, c1, t_in, exit_costs):
+        """
+        Appends the best path from (r0, c0), entered from thief state t_in,
+        to (r1 - 1, c1 - 1) ending in a state allowed by exit_costs.
+        """
+        h, w = r1 - r0, c1 - c0
+        if h == 1 or h * w <= self.base_cells:
+            values, thief_mask = self.read(r0, r1, c0, c1)
+            choice = np.zeros((2, h, w), dtype=np.uint8)
+            top = np.full((2, w), UNREACHABLE, dtype=np.int64)
+            top[:, 0] = _one_state(t_in)
+            left = np.full((2, h), UNREACHABLE, dtype=np.int64)
+            last_row, _ = self._tile(values, thief_mask, top, left, choice=choice)
+            goal_costs = last_row[:, -1] + exit_costs
+            path, states = reconstruct(choice, int(goal_costs[1] < goal_costs[0]))
+            rows, cols = np.array(path).T
+            self.cells.append(np.stack((rows + r0, cols + c0), axis=1))
+            self.states.extend(states)
+            self.values.append(values[rows, cols])
+            self.thief.append(thief_mask[rows, cols])
+            return
+
+        m = r0 + h // 2
+        total = self.forward(r0, m, c0, c1, _one_state(t_in)) + self.backward(m, r1, c0, c1, exit_costs)
+        t, c = np.unravel_index(np.argmin(total), total.shape)
+        # The path steps down from (m - 1, c0 + c) in state t.
+        self.solve(r0, m, c0, c0 + c + 1, t_in, _one_state(t))
+        self.solve(m, r1, c0 + c, c1, t, exit_costs)
+
+
+def solve_blocks(n, read, objective="stolen", block_mb=DEFAULT_BLOCK_MB, stats=None):
+    """
+    Solves an n x n map given as a block reader, read(r0, r1, c0, c1) ->
+    (values, thief_mask) of rows r0:r1 and columns c0:c1, holding about
+    block_mb megabytes of map at a time.
+    Returns (path_coords, final_coins, total_stolen).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    solver = _Solver(read, objective, int(block_mb * 1024 * 1024), stats)
+    with timed(stats, "search"):
+        # The start cell is entered from an empty car: a thief gets in,
+        # anything else is collected.
+        solver.solve(0, n, 0, n, 0, np.zeros(2, dtype=np.int64))
+    cells = np.concatenate(solver.cells)
+    coins, stolen = cells_outcome(np.concatenate(solver.values), np.concatenate(solver.thief), solver.states)
+    return [tuple(cell) for cell in cells.tolist()], coins, stolen
+
+
+def solve_arrays(values, thief_mask, objective="stolen", block_mb=DEFAULT_BLOCK_MB, stats=None):
+    """solve_blocks over in-memory (or memory-mapped) (values, thief_mask) arrays."""
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+
+    def read(r0, r1, c0, c1):
+        return values[r0:r1, c0:c1], thief_mask[r0:r1, c0:c1]
+
+    return solve_blocks(values.shape[0], read, objective, block_mb, stats)
+
+
+def solve_file(file_path, objective="stolen", block_mb=DEFAULT_BLOCK_MB, stats=None):
+    """
+    Solves a map file, reading binary maps block by block from a memory map.
+    Returns (path_coords, final_coins, total_stolen).
+    """
+    with open(file_path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if not binary:
+        with timed(stats, "parse"):
+            values, thief_mask = load_map(file_path)
+        return solve_arrays(values, thief_mask, objective, block_mb, stats)
+    n, rows = open_rows(file_path)
+    return solve_blocks(n, lambda r0, r1, c0, c1: read_block(rows, r0, r1, c0, c1), objective, block_mb, stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a map larger than memory with O(n) working memory.")
+    parser.add_argument("map_file", help="map file (binary for out-of-core reads; text is loaded whole)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="stolen", help="default: stolen")
+    parser.add_argument(
+        "--block-mb",
+        type=float,
+        default=DEFAULT_BLOCK_MB,
+        help=f"map data held in memory at a time (default: {DEFAULT_BLOCK_MB})",
+    )
+    parser.add_argument("--moves", action="store_true", help="also print the path as D/R moves")
+    parser.add_argument("--stats", action="store_true", help="print counters and timings as JSON on stderr")
+    args = parser.parse_args(argv)
+
+    stats = SearchStats() if args.stats else None
+    path, coins, stolen = solve_file(args.map_file, args.objective, args.block_mb, stats)
+    print(f"Final Coins: {coins}")
+    print(f"Total Stolen: {stolen}")
+    if args.moves:
+        print(encode_path(path))
+    if stats is not None:
+        stats.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Multi-core tiled wavefront version of the exact DP.
+
+The grid is cut into square tiles. Tile (i, j) only needs the last row of
+tile (i - 1, j) and the last column of tile (i, j - 1), so tiles run in
+wavefront order: each one is dispatched to a process pool as soon as both
+neighbours are done, and every anti-diagonal of tiles runs in parallel.
+
+The map and the (2, n, n) choice table live in multiprocessing.shared_memory,
+which the workers attach to once. Tasks and results carry only the boundary
+rows and columns of a tile; each worker sweeps its tile with the same
+per-diagonal updates as common.dp_solver.sweep (via common.outofcore) and
+writes the choice bits into the shared table. The parent then walks the path
+back exactly like dp_solver, so results are identical to the serial solver.
+
+Usage:
+    python -m common.parallel maps/s10000.bin --objective coins --workers 32
+"""
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from common.dp_solver import OBJECTIVES, UNREACHABLE, path_outcome, reconstruct
+from common.map_io import load_map
+from common.path_io import encode_path
+from common.outofcore import _sweep_tile
+from common.stats import SearchStats, timed
+
+# Below this tile size the per-diagonal NumPy overhead dominates.
+MIN_TILE = 256
+# A tile of side s costs about s * (DIAGONAL_CELLS + s) cells' worth of
+# work: one batch of NumPy calls per anti-diagonal, then the cells
+# (measured with common.outofcore._sweep_tile).
+DIAGONAL_CELLS = 1200
+
+# Worker state set by _attach: (shared blocks, values, thief_mask, choice, objective).
+_shared = None
+
+
+def _attach(names, n, objective):
+    """Pool initializer: maps the shared map and choice table."""
+    global _shared
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    values = np.ndarray((n, n), dtype=np.int32, buffer=blocks[0].buf)
+    thief_mask = np.ndarray((n, n), dtype=bool, buffer=blocks[1].buf)
+    choice = np.ndarray((2, n, n), dtype=np.uint8, buffer=blocks[2].buf)
+    _shared = (blocks, values, thief_mask, choice, objective)
+
+
+def _run_tile(r0, r1, c0, c1, top, left):
+    """Sweeps one tile; returns its last row and last column of costs."""
+    _, values, thief_mask, choice, objective = _shared
+    return _sweep_tile(
+        values[r0:r1, c0:c1],
+        thief_mask[r0:r1, c0:c1],
+        top,
+        left,
+        objective,
+        choice=choice[:, r0:r1, c0:c1],
+    )
+
+
+def default_tile(n, workers):
+    """
+    Tile side with the shortest estimated run on this many workers. With k
+    tiles per side, anti-diagonal d of tiles takes ceil(tiles on d / workers)
+    rounds; too few tiles leave workers idle, too many pay the per-diagonal
+    overhead again. One worker gets a single tile.
+    """
+    best_cost, best_tile = None, n
+    for k in range(1, 4 * workers + 1):
+        tile = -(-n // k)
+        if k > 1 and tile < MIN_TILE:
+            break
+        rounds = sum(-(-min(d + 1, 2 * k - 1 - d) // workers) for d in range(2 * k - 1))
+        cost = rounds * tile * (DIAGONAL_CELLS + tile)
+        if best_cost is None or cost < best_cost:
+            best_cost, best_tile = cost, tile
+    return best_tile
+
+
+def solve_parallel(values, thief_mask, objective="stolen", workers=None, tile=None, stats=None):
+    """
+    Solves the given objective exactly on a pool of worker processes.
+    Returns (path_coords, final_coins, total_stolen), the same as
+    common.dp_solver.solve.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    n = values.shape[0]
+    workers = workers or os.cpu_count()
+    tile = tile or default_tile(n, workers)
+    bounds = [(a, min(a + tile, n)) for a in range(0, n, tile)]
+    k = len(bounds)
+
+    sizes = (n * n * 4, n * n, 2 * n * n)
+    blocks = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+    choice = None
+    try:
+        np.ndarray((n, n), dtype=np.int32, buffer=blocks[0].buf)[:] = values
+        np.ndarray((n, n), dtype=bool, buffer=blocks[1].buf)[:] = thief_mask
+        choice = np.ndarray((2, n, n), dtype=np.uint8, buffer=blocks[2].buf)
+
+        with timed(stats, "search"), ProcessPoolExecutor(
+            workers, initializer=_attach, initargs=([b.name for b in blocks], n, objective)
+        ) as pool:
+            # Costs handed between tiles: last rows by (i, j) for the tile
+            # below, last columns for the tile to the right.
+            bottoms, rights = {}, {}
+            pending = {}
+
+            def submit(i, j):
+                (r0, r1), (c0, c1) = bounds[i], bounds[j]
+                if i:
+                    top = bottoms.pop((i - 1, j))
+                else:
+                    top = np.full((2, c1 - c0), UNREACHABLE, dtype=np.int64)
+                    if j == 0:
+                        # The start cell is entered from an empty car.
+                        top[0, 0] = 0
+                if j:
+                    left = rights.pop((i, j - 1))
+                else:
+                    left = np.full((2, r1 - r0), UNREACHABLE, dtype=np.int64)
+                pending[pool.submit(_run_tile, r0, r1, c0, c1, top, left)] = (i, j)
+
+            submit(0, 0)
+            peak = 1
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, j = pending.pop(future)
+                    bottoms[i, j], rights[i, j] = future.result()
+                    # A tile is ready once its upper and left neighbours are.
+                    if i + 1 < k and (j == 0 or (i + 1, j - 1) in rights):
+                        submit(i + 1, j)
+                    if j + 1 < k and (i == 0 or (i - 1, j + 1) in bottoms):
+                        submit(i, j + 1)
+                peak = max(peak, len(pending))
+            goal_costs = bottoms[k - 1, k - 1][:, -1]
+
+        if stats is not None:
+            stats.nodes_popped = 2 * n * n
+            stats.peak_open_set = peak
+        goal_thief = int(goal_costs[1] < goal_costs[0])
+        if goal_costs[goal_thief] >= UNREACHABLE:
+            return None, 0, 0
+        with timed(stats, "outcome"):
+            path, states = reconstruct(choice, goal_thief)
+            coins, stolen = path_outcome(values, thief_mask, path, states)
+        return path, coins, stolen
+    finally:
+        # The view must go before its buffer can be released.
+        choice = None
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a map with the tiled wavefront DP on several cores.")
+    parser.add_argument("map_file", help="map file (text or binary)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="stolen", help="default: stolen")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--tile", type=int, help="tile side in cells (default: from n and workers)")
+    parser.add_argument("--moves", action="store_true", help="also print the path as D/R moves")
+    parser.add_argument("--stats", action="store_true", help="print counters and timings as JSON on stderr")
+    args = parser.parse_args(argv)
+
+    stats = SearchStats() if args.stats else None
+    with timed(stats, "parse"):
+        values, thief_mask = load_map(args.map_file)
+    path, coins, stolen = solve_parallel(values, thief_mask, args.objective, args.workers, args.tile, stats)
+    print(f"Final Coins: {coins}")
+    print(f"Total Stolen: {stolen}")
+    if args.moves:
+        print(encode_path(path))
+    if stats is not None:
+        stats.report()
+
+
+if __name__ == "__main__":
+    main()
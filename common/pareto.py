@@ -0,0 +1,371 @@
+"""
+Pareto frontier of final coins (maximized) against total stolen (minimized).
+
+Objectives 2 and 3 each pick one end of the trade-off. This solver finds
+every non-dominated (coins, stolen) outcome, with a path for each, in one
+forward sweep over the anti-diagonals of the Down/Right DAG.
+
+Every (cell, has_thief) state carries a set of labels, one per partial
+path, holding (coins, stolen) so far. Within a state only non-dominated
+labels are kept. On top of that, three things keep the sets small:
+
+    completion tables -- a reverse DP per weight in WEIGHTS gives, for every
+                         state, the path to the goal that is best for
+                         wc * coins - ws * stolen, together with the coins
+                         and stolen it adds
+    incumbents        -- every label plus each of its weighted completions
+                         is a finished path, so the frontier of those points
+                         is a set of achievable outcomes (kept as a staircase)
+    bounds            -- a label is dropped when no outcome still reachable
+                         from it can beat the incumbents: its completions
+                         bound the best possible coins, the least possible
+                         stolen and the best score under every weight, and
+                         none of the gaps in the staircase fits those bounds
+
+A label whose completion is an incumbent does not need to survive, since the
+incumbent keeps its path. When the sweep ends, the incumbents are exactly the
+frontier.
+
+Usage:
+    python -m common.pareto Phase-3/map2.txt
+    python -m common.pareto maps/s1000.bin --moves --stats
+"""
+import argparse
+
+import numpy as np
+
+from common.dp_solver import UNREACHABLE, _diagonal
+from common.map_io import load_map
+from common.path_io import encode_path
+from common.stats import SearchStats, timed
+
+# (coins weight, stolen weight) of the completion tables. The first and last
+# must stay (1, 0) and (0, 1): they give the exact best future coins and least
+# future stolen used by the bounds.
+WEIGHTS = ((1, 0), (4, 1), (2, 1), (1, 1), (1, 2), (1, 4), (0, 1))
+
+# Stands in for an unbounded coordinate of a staircase gap.
+_OPEN = 1 << 40
+
+
+def _frontier(group, coins, stolen):
+    """
+    Indices of the non-dominated (coins, stolen) points within each group,
+    ordered by group, then stolen. Of equal points the first one is kept.
+    """
+    order = np.lexsort((-coins, stolen, group))
+    coins = coins[order]
+    offset = coins.min()
+    span = int(coins.max() - offset) + 1
+    # Shift each group above the previous one so a single running maximum
+    # never carries over between groups.
+    key = group[order].astype(np.int64) * span + (coins - offset)
+    keep = np.empty(len(key), dtype=bool)
+    keep[0] = True
+    keep[1:] = key[1:] > np.maximum.accumulate(key)[:-1]
+    return order[keep]
+
+
+def _completion_tables(values, thief_mask, wc, ws):
+    """
+    Reverse DP maximizing wc * coins - ws * stolen from every state to the
+    goal (the state's own cell already applied). Returns (coins, stolen,
+    down): the coins and stolen the best completion adds, and whether it
+    starts with a Down move, each of shape (n, n, 2).
+    """
+    n = values.shape[0]
+    dtype = np.int32 if np.abs(values).sum(dtype=np.int64) < 2**31 else np.int64
+    coins = np.zeros((n, n, 2), dtype=dtype)
+    stolen = np.zeros((n, n, 2), dtype=dtype)
+    down = np.zeros((n, n, 2), dtype=bool)
+    gain_free = np.where(thief_mask, 0, values)
+    loss_robbed = np.where(thief_mask, 0, np.abs(values))
+
+    # Entering each cell of the later diagonal per incoming thief state:
+    # (score to minimize, coins, stolen), indexed by row.
+    nxt = None
+    for d in range(2 * n - 2, -1, -1):
+        rows, cols = _diagonal(d, n)
+        if nxt is not None:
+            for t in (0, 1):
+                score, c_in, s_in = nxt[t]
+                go_down = score[rows + 1] < score[rows]
+                pick = rows + go_down
+                coins[rows, cols, t] = c_in[pick]
+                stolen[rows, cols, t] = s_in[pick]
+                down[rows, cols, t] = go_down
+
+        is_thief = thief_mask[rows, cols]
+        # An empty car collects the cell, or picks up the thief standing on it.
+        after = is_thief.astype(np.intp)
+        c0 = gain_free[rows, cols] + coins[rows, cols, after]
+        s0 = stolen[rows, cols, after].astype(np.int64)
+        # A thief in the car robs the cell (or fights) and leaves.
+        c1 = coins[rows, cols, 0].astype(np.int64)
+        s1 = loss_robbed[rows, cols] + stolen[rows, cols, 0]
+        nxt = []
+        for c_in, s_in in ((c0, s0), (c1, s1)):
+            layer = np.full((3, n + 1), 0, dtype=np.int64)
+            layer[0] = UNREACHABLE
+            layer[0, rows] = ws * s_in - wc * c_in
+            layer[1, rows] = c_in
+            layer[2, rows] = s_in
+            nxt.append(layer)
+    return coins, stolen, down
+
+
+def _sparse_max(f):
+    """Sparse table for O(1) range maxima over f."""
+    levels = [f]
+    width = 1
+    while 2 * width <= len(f):
+        prev = levels[-1]
+        levels.append(np.maximum(prev[:-width], prev[width:]))
+        width *= 2
+    return levels
+
+
+def _range_max(levels, lo, hi):
+    """max(f[lo:hi]) per query; requires hi > lo."""
+    level = np.log2(hi - lo).astype(np.intp)
+    top = np.empty(len(lo), dtype=np.int64)
+    for k in np.unique(level):
+        m = level == k
+        table = levels[k]
+        top[m] = np.maximum(table[lo[m]], table[hi[m] - (1 << k)])
+    return top
+
+
+class _Incumbents:
+    """
+    Staircase of achievable (coins, stolen) points, sorted by stolen with
+    coins strictly increasing, and where each point's path comes from:
+    (diagonal, label index, weight index).
+    """
+
+    def __init__(self):
+        self.coins = np.empty(0, dtype=np.int64)
+        self.stolen = np.empty(0, dtype=np.int64)
+        self.origin = np.empty((0, 3), dtype=np.int64)
+
+    def covers(self, coins, stolen):
+        """True where some incumbent has at least coins with at most stolen."""
+        if not len(self.coins):
+            return np.zeros(len(coins), dtype=bool)
+        i = np.searchsorted(self.stolen, stolen, side="right") - 1
+        best = np.where(i >= 0, self.coins[np.maximum(i, 0)], -_OPEN)
+        return best >= coins
+
+    def add(self, coins, stolen, origin):
+        """Merges new candidate points into the staircase."""
+        new = ~self.covers(coins, stolen)
+        if not new.any():
+            return False
+        coins = np.concatenate((self.coins, coins[new]))
+        stolen = np.concatenate((self.stolen, stolen[new]))
+        origin = np.concatenate((self.origin, origin[new]))
+        keep = _frontier(np.zeros(len(coins), dtype=np.int64), coins, stolen)
+        self.coins, self.stolen, self.origin = coins[keep], stolen[keep], origin[keep]
+        return True
+
+    def gaps(self):
+        """
+        Corners (a, b) of the regions not covered by the staircase: a better
+        outcome needs coins >= a[j] and stolen <= b[j] for some j. Both are
+        increasing in j.
+        """
+        a = np.concatenate(([-_OPEN], self.coins + 1))
+        b = np.concatenate((self.stolen - 1, [_OPEN]))
+        return a, b
+
+
+def pareto_frontier(values, thief_mask, stats=None):
+    """
+    Finds every non-dominated (final coins, total stolen) outcome.
+    Returns a list of (path_coords, final_coins, total_stolen), ordered by
+    total stolen (and so by final coins), both increasing.
+    stats (a common.stats.SearchStats) counts labels: pushed / popped are
+    labels generated, stale_pops those dominated or bounded out, peak_open_set
+    the most labels alive on one diagonal and peak_visited the labels kept
+    for path recovery.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    thief_mask = np.asarray(thief_mask, dtype=bool)
+
+    with timed(stats, "heuristic"):
+        tables = [_completion_tables(values, thief_mask, wc, ws) for wc, ws in WEIGHTS]
+    with timed(stats, "search"):
+        incumbents, history = _sweep(values, thief_mask, tables, stats)
+    with timed(stats, "outcome"):
+        frontier = []
+        for (d, label, k), coins, stolen in zip(
+            incumbents.origin.tolist(), incumbents.coins.tolist(), incumbents.stolen.tolist()
+        ):
+            path = _prefix(history, d, label) + _completion(tables[k][2], thief_mask, history, d, label)
+            frontier.append((path, coins, stolen))
+    return frontier
+
+
+def _sweep(values, thief_mask, tables, stats):
+    """
+    Forward label sweep. Returns the incumbents and, per diagonal, the
+    (row, thief, parent index) arrays of the labels kept for path recovery.
+    """
+    n = values.shape[0]
+    counting = stats is not None
+    robbed_loss = np.abs(values)
+    best_coins, least_stolen = tables[0][0], tables[-1][1]
+
+    start_thief = int(thief_mask[0, 0])
+    row = np.zeros(1, dtype=np.intp)
+    thief = np.array([start_thief], dtype=np.intp)
+    coins = np.array([0 if start_thief else values[0, 0]], dtype=np.int64)
+    stolen = np.zeros(1, dtype=np.int64)
+    parent = np.full(1, -1, dtype=np.int64)
+    history = []
+    incumbents = _Incumbents()
+
+    for d in range(2 * n - 1):
+        if d:
+            # Expand the surviving labels of diagonal d - 1: Down keeps the
+            # column, Right keeps the row.
+            row = row[alive]
+            col = d - 1 - row
+            nr = np.concatenate((row + 1, row))
+            nc = np.concatenate((col, col + 1))
+            src = np.concatenate((alive, alive))
+            ok = (nr < n) & (nc < n)
+            nr, nc, src = nr[ok], nc[ok], src[ok]
+            t, c, s = thief[src], coins[src], stolen[src]
+            is_thief = thief_mask[nr, nc]
+            plain = ~is_thief
+            c = c + np.where((t == 0) & plain, values[nr, nc], 0)
+            s = s + np.where((t == 1) & plain, robbed_loss[nr, nc], 0)
+            nt = ((t == 0) & is_thief).astype(np.intp)
+            if counting:
+                stats.nodes_pushed += len(nr)
+                stats.nodes_popped += len(nr)
+            keep = _frontier(nr * 2 + nt, c, s)
+            row, thief, coins, stolen, parent = nr[keep], nt[keep], c[keep], s[keep], src[keep]
+            if counting:
+                stats.stale_pops += len(nr) - len(keep)
+        col = d - row
+        # Compact copies: these are kept for every diagonal until the end.
+        history.append((row.astype(np.int32), thief.astype(np.uint8), parent.astype(np.int32)))
+        if counting:
+            stats.peak_visited += len(row)
+
+        # Every label plus each completion is a finished path.
+        futures = [(tc[row, col, thief], ts[row, col, thief]) for tc, ts, _ in tables]
+        labels = np.arange(len(row))
+        incumbents.add(
+            np.concatenate([coins + fc for fc, _ in futures]),
+            np.concatenate([stolen + fs for _, fs in futures]),
+            np.concatenate(
+                [np.stack((np.full(len(row), d), labels, np.full(len(row), k)), axis=1) for k in range(len(futures))]
+            ),
+        )
+        if d == 2 * n - 2:
+            break
+
+        alive = _bounded(
+            incumbents,
+            coins,
+            stolen,
+            futures,
+            coins + best_coins[row, col, thief],
+            stolen + least_stolen[row, col, thief],
+        )
+        alive = np.flatnonzero(alive)
+        if counting:
+            stats.stale_pops += len(row) - len(alive)
+            stats.peak_open_set = max(stats.peak_open_set, len(alive))
+        if not len(alive):
+            break
+    return incumbents, history
+
+
+def _bounded(incumbents, coins, stolen, futures, coins_max, stolen_min):
+    """
+    True for labels that may still reach an outcome outside the incumbents'
+    staircase. An outcome needs coins <= coins_max, stolen >= stolen_min and,
+    for every weight, a score no better than the label's best completion.
+    Each weight is checked against the best gap in range separately, which
+    is weaker than checking one gap against all weights but keeps every
+    label that could matter.
+    """
+    a, b = incumbents.gaps()
+    # Gaps j0 <= j < j1 fit the coins and stolen bounds.
+    j1 = np.searchsorted(a, coins_max, side="right")
+    j0 = np.searchsorted(b, stolen_min, side="left")
+    alive = j0 < j1
+    if not alive.any():
+        return alive
+    idx = np.flatnonzero(alive)
+    lo, hi = j0[idx], j1[idx]
+    for (wc, ws), (fc, fs) in zip(WEIGHTS, futures):
+        # Corner (a, b) is reachable only if the completion scores no
+        # better: wc * a - ws * b <= wc * coins' - ws * stolen'.
+        best = wc * (coins[idx] + fc[idx]) - ws * (stolen[idx] + fs[idx])
+        levels = _sparse_max(ws * b - wc * a)
+        ok = _range_max(levels, lo, hi) >= -best
+        idx, lo, hi = idx[ok], lo[ok], hi[ok]
+    alive[:] = False
+    alive[idx] = True
+    return alive
+
+
+def _prefix(history, d, label):
+    """Cells of the partial path behind a label, from the start."""
+    path = []
+    while label >= 0:
+        row, _, parent = history[d]
+        r = int(row[label])
+        path.append((r, d - r))
+        label = int(parent[label])
+        d -= 1
+    path.reverse()
+    return path
+
+
+def _completion(down, thief_mask, history, d, label):
+    """Cells after a label's cell along the completion in `down`."""
+    n = down.shape[0]
+    row, thief, _ = history[d]
+    r = int(row[label])
+    c = d - r
+    t = int(thief[label])
+    path = []
+    while r < n - 1 or c < n - 1:
+        if down[r, c, t]:
+            r += 1
+        else:
+            c += 1
+        t = 0 if t else int(thief_mask[r, c])
+        path.append((r, c))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coins vs. stolen Pareto frontier of a map.")
+    parser.add_argument("map_file", help="map file (text or binary)")
+    parser.add_argument("--moves", action="store_true", help="also print each path as D/R moves")
+    parser.add_argument("--stats", action="store_true", help="print label counters and timings as JSON on stderr")
+    args = parser.parse_args(argv)
+
+    stats = SearchStats() if args.stats else None
+    with timed(stats, "parse"):
+        values, thief_mask = load_map(args.map_file)
+    frontier = pareto_frontier(values, thief_mask, stats=stats)
+    print(f"{'coins':>10} {'stolen':>10}")
+    for path, coins, stolen in frontier:
+        line = f"{coins:>10} {stolen:>10}"
+        if args.moves:
+            line += f"  {encode_path(path)}"
+        print(line)
+    if stats is not None:
+        stats.report()
+
+
+if __name__ == "__main__":
+    main()
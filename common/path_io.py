@@ -0,0 +1,163 @@
+"""
+Path output: the step-by-step text report, or a compact encoding of the
+moves.
+
+A path from (0, 0) to (n-1, n-1) is 2n - 2 Down/Right moves. Listed one
+step per line it takes megabytes of text for a 10000x10000 map; encoded it
+takes a few KB:
+
+    text    -- "1. Down (5)" per step, as the phases always printed
+    packed  -- "packed:<moves>:<base64>": the moves as bits, 1 for Down,
+               little-endian within each byte (as in common.cache)
+    rle     -- "rle:D3R1D2...": runs of equal moves; Phase 1's route is
+               just "rle:D<n-1>R<n-1>"
+
+encode_path gives the plain D/R string of a path, as common.batch records
+it; parse_moves reads back that or either encoding. PathWriter
+writes a path in any of them, with lines joined into large blocks instead
+of one print per step; it also takes a path piece by piece, so a streamed
+path is never held as text.
+
+Entry points take --output (default text).
+"""
+import base64
+import re
+import sys
+
+import numpy as np
+
+FORMATS = ("text", "packed", "rle")
+
+# Characters of text output gathered before each write.
+BLOCK_CHARS = 1 << 16
+
+_RUN = re.compile(r"([DR])(\d+)")
+
+
+def path_moves(path):
+    """Move bits (True for Down) of a path given as (row, col) coordinates."""
+    if len(path) < 2:
+        return np.zeros(0, dtype=bool)
+    return np.diff(np.asarray(path)[:, 0]) > 0
+
+
+def pack_moves(downs):
+    """The "packed:" encoding of move bits."""
+    downs = np.asarray(downs, dtype=bool)
+    data = base64.b64encode(np.packbits(downs, bitorder="little").tobytes()).decode()
+    return f"packed:{downs.size}:{data}"
+
+
+def rle_moves(downs):
+    """The "rle:" encoding of move bits."""
+    downs = np.asarray(downs, dtype=bool)
+    if not downs.size:
+        return "rle:"
+    starts = np.flatnonzero(np.concatenate(([True], downs[1:] != downs[:-1])))
+    lengths = np.diff(np.append(starts, downs.size))
+    return "rle:" + "".join(
+        f"{'D' if down else 'R'}{length}" for down, length in zip(downs[starts].tolist(), lengths.tolist())
+    )
+
+
+def encode_path(path):
+    """A (row, col) path as a plain string of D (Down) / R (Right) moves."""
+    return np.where(path_moves(path), ord("D"), ord("R")).astype(np.uint8).tobytes().decode()
+
+
+def encode_moves(downs, output):
+    """Move bits in the "packed" or "rle" encoding."""
+    if output == "packed":
+        return pack_moves(downs)
+    if output == "rle":
+        return rle_moves(downs)
+    raise ValueError(f"Not a compact output format: {output}")
+
+
+def parse_moves(text):
+    """Move bits of a "packed:" or "rle:" encoding, or of a plain D/R string."""
+    text = text.strip()
+    if text.startswith("packed:"):
+        count, data = text[len("packed:") :].split(":", 1)
+        raw = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+        if raw.size * 8 < int(count):
+            raise ValueError(f"Packed moves too short for {count} moves.")
+        return np.unpackbits(raw, count=int(count), bitorder="little").astype(bool)
+    if text.startswith("rle:"):
+        runs = text[len("rle:") :]
+        if _RUN.sub("", runs):
+            raise ValueError(f"Bad run-length moves: {runs[:40]!r}")
+        pairs = _RUN.findall(runs)
+        return np.repeat([move == "D" for move, _ in pairs], [int(length) for _, length in pairs]).astype(bool)
+    moves = np.frombuffer(text.encode(), dtype=np.uint8)
+    if not np.isin(moves, (ord("D"), ord("R"))).all():
+        raise ValueError(f"Moves must be D or R: {text[:40]!r}")
+    return moves == ord("D")
+
+
+class PathWriter:
+    """
+    Writes the moves of one path to out (default sys.stdout) as they are
+    added: numbered "Down (value)" lines for "text", or a single
+    "Moves: <encoding>" line at close() otherwise.
+    """
+
+    def __init__(self, output="text", out=None):
+        if output not in FORMATS:
+            raise ValueError(f"Unknown output format: {output}")
+        self.output = output
+        self.out = out or sys.stdout
+        self.steps = 0
+        self._lines = []
+        self._chars = 0
+        self._downs = []
+
+    def add(self, downs, cells):
+        """
+        Adds moves: their bits and the values of the cells they enter
+        ("!" for thieves; only needed for "text").
+        """
+        if self.output != "text":
+            self._downs.append(np.asarray(downs, dtype=bool))
+            self.steps += len(self._downs[-1])
+            return
+        step = self.steps
+        lines = [
+            f"{step + i}. {'Down' if down else 'Right'} ({cell})\n"
+            for i, (down, cell) in enumerate(zip(np.asarray(downs, dtype=bool).tolist(), cells), 1)
+        ]
+        self.steps += len(lines)
+        self._lines += lines
+        self._chars += sum(map(len, lines))
+        if self._chars >= BLOCK_CHARS:
+            self.flush()
+
+    def add_path(self, path, grid):
+        """Adds every move of a (row, col) path over grid[r][c] ("!" for thieves)."""
+        self.add(path_moves(path), [grid[r][c] for r, c in path[1:]] if self.output == "text" else ())
+
+    def flush(self):
+        if self._lines:
+            self.out.write("".join(self._lines))
+            self._lines = []
+            self._chars = 0
+
+    def close(self):
+        """Writes whatever is left; the writer takes no more moves."""
+        if self.output == "text":
+            self.flush()
+        else:
+            downs = np.concatenate(self._downs) if self._downs else np.zeros(0, dtype=bool)
+            self.out.write(f"Moves: {encode_moves(downs, self.output)}\n")
+            self._downs = []
+
+
+def add_arguments(parser):
+    """Adds the --output flag to an entry point's parser."""
+    parser.add_argument(
+        "--output",
+        choices=FORMATS,
+        default="text",
+        help="print the path step by step (text), or its moves as one packed "
+        "or run-length encoded line (default: text)",
+    )
@@ -0,0 +1,184 @@
+"""
+The thief/coin rules, shared by every solver and report.
+
+apply_cell is one step of the rules on a grid cell ("!" for thieves). The
+rest scores whole paths with NumPy. A path from (0, 0) to (n-1, n-1) is its
+2n - 2 moves as bits, True for Down and False for Right, and k paths are
+the rows of a (k, 2n - 2) bool array, all scored at once.
+
+The only sequential part of the rules is the thief in the car:
+
+    with_thief[i] = thief[i] and not with_thief[i - 1]
+
+so along a run of consecutive thief cells the car alternates between
+picking a thief up and a fight. with_thief[i] follows from the distance to
+the last plain cell before i, which a running maximum finds for every cell
+of every path without a loop over the steps.
+
+Usage:
+    python -m common.rules maps/m100.bin --moves results.txt   # one path per line (see below)
+    python -m common.rules maps/m100.bin --sample 100000 --seed 7
+
+Paths are given as D/R strings or in the packed / run-length encodings of
+common.path_io.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from common.map_io import load_map
+from common.path_io import parse_moves
+
+# Cells gathered per chunk by evaluate_paths (a few int64 arrays of this size).
+CHUNK_CELLS = 1 << 22
+
+
+def apply_cell(with_thief, cell_value):
+    """
+    Applies the thief/coin rules for entering a cell.
+    Returns (coins_delta, stolen_delta, with_thief_after).
+    """
+    if with_thief:
+        if cell_value == "!":
+            # Thief fight! Thief leaves.
+            return 0, 0, False
+        # Thief steals the treasure or the cost (as a positive amount) and leaves.
+        return 0, abs(cell_value), False
+    if cell_value == "!":
+        # Pick up a new thief
+        return 0, 0, True
+    # Add treasure or apply cost
+    return cell_value, 0, False
+
+
+def thief_states(cell_thief):
+    """Whether a thief rides on after each cell of a path (along the last axis)."""
+    cell_thief = np.asarray(cell_thief, dtype=bool)
+    steps = np.arange(cell_thief.shape[-1], dtype=np.int32)
+    # Index of the last plain cell at or before each step, -1 if none.
+    last_plain = np.maximum.accumulate(np.where(cell_thief, -1, steps), axis=-1)
+    return cell_thief & ((steps - last_plain) & 1).astype(bool)
+
+
+def states_outcome(cell_values, cell_thief, states):
+    """
+    Final coins and total stolen from the cells of paths and the thief
+    state after each cell. Arrays run along the last axis; the results have
+    the shape of the leading axes.
+    """
+    cell_values = np.asarray(cell_values)
+    plain = ~np.asarray(cell_thief, dtype=bool)
+    states = np.asarray(states, dtype=bool)
+    robbed = np.zeros_like(states)
+    robbed[..., 1:] = states[..., :-1]
+    coins = np.where(plain & ~robbed, cell_values, 0).sum(axis=-1, dtype=np.int64)
+    # abs in int64: -2**31 in an int32 map has no int32 absolute value.
+    losses = np.abs(cell_values.astype(np.int64, copy=False))
+    stolen = np.where(plain & robbed, losses, 0).sum(axis=-1, dtype=np.int64)
+    return coins, stolen
+
+
+def score_cells(cell_values, cell_thief):
+    """Final coins and total stolen from the cells of paths, in order."""
+    return states_outcome(cell_values, cell_thief, thief_states(cell_thief))
+
+
+def score_path(values, thief_mask, path):
+    """Final coins and total stolen of any Down/Right path from (0, 0)."""
+    rows, cols = np.array(path).T
+    coins, stolen = score_cells(values[rows, cols], np.asarray(thief_mask, dtype=bool)[rows, cols])
+    return int(coins), int(stolen)
+
+
+def moves_to_bits(paths):
+    """
+    (k, 2n - 2) move bits of k paths of the same length, each given as a
+    string (see common.path_io.parse_moves) or as a list of (row, col)
+    coordinates.
+    """
+    bits = []
+    for path in paths:
+        if isinstance(path, str):
+            bits.append(parse_moves(path))
+        else:
+            bits.append(np.diff(np.array(path)[:, 0]) > 0)
+    if len({len(b) for b in bits}) > 1:
+        raise ValueError("Paths have different lengths.")
+    return np.array(bits, dtype=bool).reshape(len(bits), -1)
+
+
+def path_cells(downs, n):
+    """Flat indices r * n + c, shape (k, 2n - 1), of the cells of each path."""
+    downs = np.asarray(downs, dtype=bool)
+    rows = np.zeros((downs.shape[0], downs.shape[1] + 1), dtype=np.int64)
+    np.cumsum(downs, axis=1, out=rows[:, 1:])
+    # Cell i of a path is (r, i - r).
+    rows *= n - 1
+    rows += np.arange(downs.shape[1] + 1)
+    return rows
+
+
+def random_paths(n, k, rng=None):
+    """k uniformly random Down/Right paths across an n x n grid, as move bits."""
+    rng = np.random.default_rng(rng)
+    # A random permutation of n - 1 Downs and n - 1 Rights per path.
+    return rng.random((k, 2 * n - 2)).argsort(axis=1) < n - 1
+
+
+def evaluate_paths(values, thief_mask, downs):
+    """
+    Final coins and total stolen of every path, as two int64 arrays of
+    length k. downs holds the move bits of k paths, shape (k, 2n - 2);
+    paths are gathered and scored in chunks of about CHUNK_CELLS cells.
+    """
+    n = values.shape[0]
+    downs = np.asarray(downs, dtype=bool)
+    if downs.ndim != 2 or downs.shape[1] != 2 * n - 2:
+        raise ValueError(f"Expected paths of {2 * n - 2} moves, got shape {downs.shape}")
+    wrong = np.flatnonzero(downs.sum(axis=1) != n - 1)
+    if wrong.size:
+        raise ValueError(f"Path {wrong[0]} does not end at ({n - 1}, {n - 1})")
+    flat_values = np.ascontiguousarray(values).ravel()
+    flat_thief = np.ascontiguousarray(thief_mask, dtype=bool).ravel()
+    k = downs.shape[0]
+    coins = np.empty(k, dtype=np.int64)
+    stolen = np.empty(k, dtype=np.int64)
+    step = max(1, CHUNK_CELLS // (2 * n - 1))
+    for start in range(0, k, step):
+        cells = path_cells(downs[start : start + step], n)
+        coins[start : start + step], stolen[start : start + step] = score_cells(
+            flat_values.take(cells), flat_thief.take(cells)
+        )
+    return coins, stolen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many Down/Right paths on a map at once.")
+    parser.add_argument("map_file", help="map file (text or binary)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--moves", help="file with one path per line, as D/R moves or encoded ('-' for stdin)")
+    group.add_argument("--sample", type=int, metavar="K", help="score K uniformly random paths")
+    parser.add_argument("--seed", type=int, help="random seed for --sample")
+    args = parser.parse_args(argv)
+
+    values, thief_mask = load_map(args.map_file)
+    if args.moves is not None:
+        with (sys.stdin if args.moves == "-" else open(args.moves)) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        coins, stolen = evaluate_paths(values, thief_mask, moves_to_bits(lines))
+        for c, s in zip(coins.tolist(), stolen.tolist()):
+            print(f"{c} {s}")
+        return
+
+    coins, stolen = evaluate_paths(values, thief_mask, random_paths(values.shape[0], args.sample, args.seed))
+    print(f"Random paths: {args.sample}")
+    for name, scores in (("Final Coins", coins), ("Total Stolen", stolen)):
+        print(
+            f"{name}: min {scores.min()}, mean {scores.mean():.1f}, "
+            f"median {np.median(scores):g}, max {scores.max()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Long-lived query server for repeated route queries against loaded maps.
+
+A map is loaded once and exact cost-to-go tables (common.heuristics, kind
+"exact") are built for the thief-aware loss ("stolen") and coin ("coins")
+objectives. Those tables give the optimal cost from every (cell, has_thief)
+state to the goal, so a query from any start cell is answered by walking
+Down/Right along the table: O(path length), no search.
+
+Tables towards the bottom-right exit are built when the map is loaded;
+tables towards other exit cells are built on their first query and kept.
+Several maps stay resident; when their tables and arrays exceed the memory
+cap, the least recently used tables towards other exits are dropped first
+(those of the least recently used map before any other), then the least
+recently used maps.
+
+Cells of a resident map can be changed in place (a thief moves, a treasure
+is collected). Since moves only go Down and Right, a change can only affect
+the tables up and to the left of the cell, and only that region is repaired
+(common.heuristics.repair_table).
+
+The protocol is one JSON object per line in each direction. Requests:
+
+    {"op": "load", "map": "maps/a.bin"}
+    {"op": "query", "map": "maps/a.bin", "start": [3, 4],
+     "goal": [99, 99], "objective": "stolen"}
+    {"op": "update", "map": "maps/a.bin", "cells": [[3, 4, "!"], [5, 5, 7]]}
+    {"op": "unload", "map": "maps/a.bin"}
+    {"op": "status"}
+
+"goal" defaults to the bottom-right cell, "start" to (0, 0) and
+"objective" to "stolen". A query loads its map if needed. The start cell
+follows the usual start rules (its thief rides along, or its value is
+collected). Replies echo an optional "id" and carry either the result:
+
+    {"id": 7, "moves": "DDRR...", "coins": 12, "stolen": 3}
+
+or {"id": 7, "error": "..."}. A map file that changes on disk is reloaded,
+which also discards updates made through the server.
+
+Usage:
+    python -m common.server                           # JSON lines on stdin / stdout
+    python -m common.server --socket /tmp/lost-land.sock --max-memory-mb 2048
+    python -m common.server --preload maps/a.bin maps/b.bin
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from common.dp_solver import OBJECTIVES
+from common.heuristics import as_lookup, build_table, repair_table
+from common.map_io import load_map
+
+DEFAULT_MAX_MEMORY_MB = 1024
+
+
+class ResidentMap:
+    """A loaded map and its cost-to-go tables, keyed by (goal, objective)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+        values, thief_mask = load_map(path, mmap=False)
+        self.values = np.ascontiguousarray(values, dtype=np.int64)
+        self.thief_mask = np.ascontiguousarray(thief_mask, dtype=bool)
+        self.n = self.values.shape[0]
+        # In LRU order; the bottom-right tables are never dropped.
+        self.tables = OrderedDict()
+        # Flat lookups for the walk: plain Python ints, like the A* solvers.
+        self._values = as_lookup(self.values)
+        self._thief = memoryview(self.thief_mask.view(np.uint8).ravel())
+        for objective in OBJECTIVES:
+            self.table((self.n - 1, self.n - 1), objective)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.thief_mask.nbytes + sum(t.nbytes for t, _ in self.tables.values())
+
+    def table(self, goal, objective):
+        """(table, flat lookup) of exact costs-to-go towards goal."""
+        key = (goal, objective)
+        if key not in self.tables:
+            table = build_table(self.values, self.thief_mask, objective, "exact", goal)
+            self.tables[key] = (table, as_lookup(table))
+        self.tables.move_to_end(key)
+        return self.tables[key]
+
+    def drop_table(self):
+        """
+        Drops the least recently used table towards an exit other than the
+        bottom-right one; returns False when there is none.
+        """
+        exit_cell = (self.n - 1, self.n - 1)
+        for key in self.tables:
+            if key[0] != exit_cell:
+                del self.tables[key]
+                return True
+        return False
+
+    def set_cell(self, r, c, value):
+        """Sets one cell to a coin value or "!" (thief); see update."""
+        return self.update([(r, c, value)])
+
+    def update(self, cells):
+        """
+        Applies (row, col, value) changes, value being an int or "!", and
+        repairs every table. Returns the number of table cells recomputed.
+        """
+        cells = [tuple(cell) for cell in cells]
+        # Validate everything first so a bad cell leaves the map untouched.
+        for r, c, value in cells:
+            if not (0 <= r < self.n and 0 <= c < self.n):
+                raise ValueError(f"Cell ({r}, {c}) is outside the {self.n}x{self.n} map.")
+            if value != "!" and (not isinstance(value, int) or isinstance(value, bool)):
+                raise ValueError(f"Invalid cell value: {value}")
+        for r, c, value in cells:
+            is_thief = value == "!"
+            self.values[r, c] = 0 if is_thief else value
+            self.thief_mask[r, c] = is_thief
+        changed = [(r, c) for r, c, _ in cells]
+        return sum(
+            repair_table(table, self.values, self.thief_mask, objective, changed)
+            for (_, objective), (table, _) in self.tables.items()
+        )
+
+    def route(self, start, goal, objective):
+        """
+        Optimal route from start to goal for the objective, read off the
+        cost-to-go table. Returns (moves, coins, stolen).
+        """
+        n = self.n
+        sr, sc = start
+        gr, gc = goal
+        if not (0 <= sr < n and 0 <= sc < n and 0 <= gr < n and 0 <= gc < n):
+            raise ValueError(f"Cells must lie inside the {n}x{n} map.")
+        if sr > gr or sc > gc:
+            raise ValueError("Goal is not reachable from start (moves are Down/Right only).")
+        _, cost_to_go = self.table(goal, objective)
+        width = gc + 1
+        values, thief = self._values, self._thief
+        count_coins = objective == "coins"
+
+        # Start cell: a thief rides along, anything else is collected.
+        r, c = sr, sc
+        t = thief[r * n + c]
+        coins = 0 if t else values[r * n + c]
+        stolen = 0
+        moves = []
+        while r < gr or c < gc:
+            best = None
+            for move, nr, nc in (("D", r + 1, c), ("R", r, c + 1)):
+                if nr > gr or nc > gc:
+                    continue
+                cell = nr * n + nc
+                v = values[cell]
+                if t:
+                    # Robbed (or a fight on a thief cell); the thief leaves.
+                    nt, gain, loss = 0, 0, 0 if thief[cell] else abs(v)
+                elif thief[cell]:
+                    nt, gain, loss = 1, 0, 0
+                else:
+                    nt, gain, loss = 0, v, 0
+                step = -gain if count_coins else loss
+                total = step + cost_to_go[(nr * width + nc) * 2 + nt]
+                if best is None or total < best[0]:
+                    best = (total, move, nr, nc, nt, gain, loss)
+            _, move, r, c, t, gain, loss = best
+            moves.append(move)
+            coins += gain
+            stolen += loss
+        return "".join(moves), coins, stolen
+
+
+class MapStore:
+    """Resident maps in LRU order, bounded by max_bytes of arrays and tables."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.maps = OrderedDict()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, path):
+        key = os.path.realpath(path)
+        entry = self.maps.get(key)
+        if entry is not None and entry.mtime == os.stat(key).st_mtime_ns:
+            self.hits += 1
+            self.maps.move_to_end(key)
+            return entry
+        entry = ResidentMap(key)
+        self.loads += 1
+        self.maps[key] = entry
+        self.maps.move_to_end(key)
+        self.trim()
+        return entry
+
+    def unload(self, path):
+        return self.maps.pop(os.path.realpath(path), None) is not None
+
+    def trim(self):
+        """
+        Drops least recently used goal tables, then least recently used maps,
+        until under the cap (keeps the newest map and its exit tables).
+        """
+        while self.nbytes > self.max_bytes:
+            if not any(entry.drop_table() for entry in self.maps.values()):
+                if len(self.maps) == 1:
+                    break
+                self.maps.popitem(last=False)
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self.maps.values())
+
+    def status(self):
+        return {
+            "maps": [
+                {"map": key, "n": entry.n, "bytes": entry.nbytes, "tables": len(entry.tables)}
+                for key, entry in self.maps.items()
+            ],
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+def handle(store, request):
+    """Answers one request dict; never raises."""
+    reply = {"id": request["id"]} if isinstance(request, dict) and "id" in request else {}
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object.")
+        op = request.get("op", "query")
+        if op == "status":
+            reply.update(store.status())
+        elif op == "update":
+            entry = store.get(request["map"])
+            reply["repaired"] = entry.update(request["cells"])
+        elif op == "unload":
+            reply["unloaded"] = store.unload(request["map"])
+        elif op == "load":
+            entry = store.get(request["map"])
+            reply["n"] = entry.n
+        elif op == "query":
+            objective = request.get("objective", "stolen")
+            if objective not in OBJECTIVES:
+                raise ValueError(f"Unknown objective: {objective}")
+            entry = store.get(request["map"])
+            start = tuple(request.get("start", (0, 0)))
+            goal = tuple(request.get("goal", (entry.n - 1, entry.n - 1)))
+            moves, coins, stolen = entry.route(start, goal, objective)
+            # A new goal adds tables; keep the store under its cap.
+            store.trim()
+            reply.update(moves=moves, coins=coins, stolen=stolen)
+        else:
+            raise ValueError(f"Unknown op: {op}")
+    except KeyError as e:
+        reply["error"] = f"Missing field: {e.args[0]}"
+    except Exception as e:
+        reply["error"] = f"{type(e).__name__}: {e}"
+    return reply
+
+
+def handle_line(store, line):
+    """One JSON request line in, one JSON reply line out."""
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return json.dumps({"error": f"Invalid JSON: {e}"})
+    return json.dumps(handle(store, request))
+
+
+def serve_stdio(store, stdin=None, stdout=None):
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if line.strip():
+            stdout.write(handle_line(store, line) + "\n")
+            stdout.flush()
+
+
+async def serve_socket(store, path):
+    """Serves clients on a Unix socket; requests are answered one at a time."""
+
+    async def client(reader, writer):
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    writer.write((handle_line(store, line) + "\n").encode())
+                    await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(client, path=path, limit=1 << 20)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer route queries against resident maps.")
+    parser.add_argument("--socket", help="serve on this Unix socket instead of stdin / stdout")
+    parser.add_argument(
+        "--max-memory-mb",
+        type=int,
+        default=DEFAULT_MAX_MEMORY_MB,
+        help=f"cap on resident maps and tables (default: {DEFAULT_MAX_MEMORY_MB})",
+    )
+    parser.add_argument("--preload", nargs="*", default=[], help="maps to load at startup")
+    args = parser.parse_args(argv)
+
+    store = MapStore(args.max_memory_mb * 1024 * 1024)
+    for path in args.preload:
+        store.get(path)
+    if args.socket:
+        try:
+            asyncio.run(serve_socket(store, args.socket))
+        except KeyboardInterrupt:
+            pass
+    else:
+        serve_stdio(store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Opt-in search instrumentation.
+
+Solvers take an optional `stats` argument. When it is None (the default)
+they skip every counter update behind a single local check, so an
+uninstrumented run does no extra work per node. When it is a SearchStats,
+they record:
+
+    nodes_pushed / nodes_popped  -- open-set traffic
+    stale_pops                   -- popped entries already superseded by a
+                                    cheaper path to the same state
+    nodes_expanded               -- popped minus stale
+    peak_open_set                -- largest open-set (heap / queue) size
+    peak_visited                 -- largest number of states with a known cost
+    seconds                      -- wall time per phase: parse, heuristic,
+                                    search, outcome (path simulation / output)
+    peak_traced_bytes            -- tracemalloc peak, only with trace_memory
+
+The entry points expose this as `--stats` (JSON on stderr) and
+`--trace-memory` (adds tracemalloc, which slows everything down). Tracing
+starts with the SearchStats and stops once report() has written the peak.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class SearchStats:
+    __slots__ = (
+        "nodes_pushed",
+        "nodes_popped",
+        "stale_pops",
+        "peak_open_set",
+        "peak_visited",
+        "seconds",
+        "trace_memory",
+        "_started_tracing",
+    )
+
+    def __init__(self, trace_memory=False):
+        self.nodes_pushed = 0
+        self.nodes_popped = 0
+        self.stale_pops = 0
+        self.peak_open_set = 0
+        self.peak_visited = 0
+        self.seconds = {}
+        self.trace_memory = trace_memory
+        # Only the instance that started tracemalloc stops it again.
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def timer(self, phase):
+        """Adds the wall time of the block to seconds[phase]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - start
+
+    def as_dict(self):
+        report = {
+            "nodes_pushed": self.nodes_pushed,
+            "nodes_popped": self.nodes_popped,
+            "stale_pops": self.stale_pops,
+            "nodes_expanded": self.nodes_popped - self.stale_pops,
+            "peak_open_set": self.peak_open_set,
+            "peak_visited": self.peak_visited,
+            "seconds": {phase: round(t, 6) for phase, t in self.seconds.items()},
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            report["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        return report
+
+    def report(self, file=None):
+        """Writes the stats as one JSON line (stderr by default)."""
+        print(json.dumps(self.as_dict()), file=file or sys.stderr)
+        self.close()
+
+    def close(self):
+        """Stops tracemalloc if this instance started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def timed(stats, phase):
+    """stats.timer(phase), or a no-op context when stats is None."""
+    return stats.timer(phase) if stats is not None else nullcontext()
+
+
+def add_arguments(parser):
+    """Adds the --stats / --trace-memory flags to an entry point's parser."""
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print search counters and phase timings as JSON on stderr",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="with --stats, also report the tracemalloc peak (slow)",
+    )
+
+
+def from_arguments(args):
+    """SearchStats for the parsed --stats flags, or None when disabled."""
+    if not args.stats:
+        return None
+    return SearchStats(trace_memory=args.trace_memory)
@@ -0,0 +1,34 @@
+"""Reference answers for the solver tests: every Down/Right path, scored."""
+import itertools
+
+import numpy as np
+
+from common.mapgen import generate_map
+from common.rules import evaluate_paths
+
+
+def all_paths(n):
+    """Move bits of every Down/Right path across an n x n grid."""
+    moves = 2 * n - 2
+    downs = [np.isin(np.arange(moves), rows) for rows in itertools.combinations(range(moves), n - 1)]
+    return np.array(downs, dtype=bool).reshape(len(downs), moves)
+
+
+def score_all(values, thief_mask):
+    """(downs, coins, stolen) of every path of the map."""
+    downs = all_paths(values.shape[0])
+    coins, stolen = evaluate_paths(values, thief_mask, downs)
+    return downs, coins, stolen
+
+
+def best(values, thief_mask, objective):
+    """Optimal value of the objective: the most coins or the least stolen."""
+    _, coins, stolen = score_all(values, thief_mask)
+    return int(coins.max()) if objective == "coins" else int(stolen.min())
+
+
+def small_maps(count=30, sizes=(1, 2, 3, 4, 5, 6, 7)):
+    """Small random maps (values, thief_mask), thieves dense enough to matter."""
+    for seed in range(count):
+        n = sizes[seed % len(sizes)]
+        yield generate_map(n, seed=seed, thieves=0.5)
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.anytime import anytime_search, solve_anytime
+from common.dp_solver import solve
+from common.mapgen import generate_map
+from common.rules import score_path
+from tests.brute_force import best, small_maps
+
+
+@pytest.mark.parametrize("heuristic", ["zero", "relaxed", "exact"])
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_unbounded_search_is_optimal(objective, heuristic):
+    for values, thief_mask in small_maps():
+        result = solve_anytime(values, thief_mask, objective, heuristic=heuristic, weight=2.0)
+        assert result.optimal
+        assert score_path(values, thief_mask, result.path) == (result.coins, result.stolen)
+        assert (result.coins if objective == "coins" else result.stolen) == best(values, thief_mask, objective)
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_gaps_bound_the_optimum(objective):
+    values, thief_mask = generate_map(40, seed=7, thieves=0.3)
+    _, coins, stolen = solve(values, thief_mask, objective)
+    optimum = coins if objective == "coins" else stolen
+    results = list(anytime_search(values, thief_mask, objective, weight=3.0, node_limit=500))
+    assert results
+    for result in results:
+        assert score_path(values, thief_mask, result.path) == (result.coins, result.stolen)
+        if objective == "coins":
+            assert result.coins <= optimum <= result.coins + result.gap
+        else:
+            assert result.stolen - result.gap <= optimum <= result.stolen
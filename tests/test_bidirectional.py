@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Phase-3"))
+
+from a_star_solver import solve_scenario3_astar
+from bidirectional_solver import solve_scenario3_bidirectional
+from common.mapgen import generate_map
+from common.rules import score_path
+from map_loader import GameMap
+from tests.brute_force import best, small_maps
+
+
+def game_map(values, thief_mask):
+    return GameMap(values, np.packbits(thief_mask, axis=1, bitorder="little"))
+
+
+def test_bidirectional_matches_brute_force():
+    for values, thief_mask in small_maps():
+        n = values.shape[0]
+        path, coins, stolen = solve_scenario3_bidirectional(game_map(values, thief_mask), n)
+        assert path[0] == (0, 0) and path[-1] == (n - 1, n - 1)
+        assert score_path(values, thief_mask, path) == (coins, stolen)
+        assert stolen == best(values, thief_mask, "stolen")
+
+
+def test_bidirectional_matches_astar():
+    for seed in range(4):
+        values, thief_mask = generate_map(30, seed=seed, thieves=0.4)
+        game = game_map(values, thief_mask)
+        path, coins, stolen = solve_scenario3_bidirectional(game, 30)
+        assert score_path(values, thief_mask, path) == (coins, stolen)
+        for queue in ("bucket", "heap"):
+            assert solve_scenario3_astar(game, 30, "zero", queue=queue)[2] == stolen
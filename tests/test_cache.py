@@ -0,0 +1,64 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.cache import ResultCache, bytes_alias, file_alias, grid_digest, solve_cached
+from common.dp_solver import solve
+from common.map_io import load_map, write_binary, write_text
+from common.mapgen import generate_map
+from common.rules import score_path
+from tests.brute_force import best, small_maps
+
+
+def test_hits_return_the_solved_result(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    # Tiny random maps repeat, and a repeated grid is a hit.
+    solved = set()
+    for i, (values, thief_mask) in enumerate(small_maps()):
+        write_text(tmp_path / f"{i}.txt", values, thief_mask)
+        write_binary(tmp_path / f"{i}.bin", values, thief_mask)
+        for objective in ("coins", "stolen"):
+
+            def dp(values, thief_mask):
+                return solve(values, thief_mask, objective)[0]
+
+            text = tmp_path / f"{i}.txt"
+            entry, hit = solve_cached(cache, file_alias(text), objective, "dp", lambda: load_map(text), dp)
+            assert hit == ((grid_digest(values, thief_mask), objective) in solved)
+            solved.add((grid_digest(values, thief_mask), objective))
+            assert entry.path[-1] == (values.shape[0] - 1, values.shape[0] - 1)
+            assert score_path(values, thief_mask, entry.path) == (entry.coins, entry.stolen)
+            assert (entry.coins if objective == "coins" else entry.stolen) == best(values, thief_mask, objective)
+            assert entry.cell_values == [values[r, c] for r, c in entry.path]
+            assert entry.cell_thief == [bool(thief_mask[r, c]) for r, c in entry.path]
+
+            def unreachable():
+                raise AssertionError("a hit must not load or solve the map")
+
+            # Same file again: answered through its alias.
+            assert solve_cached(cache, file_alias(text), objective, "dp", unreachable, unreachable) == (entry, True)
+            # The binary conversion has a new alias but the same grid digest.
+            binary = tmp_path / f"{i}.bin"
+            assert solve_cached(cache, file_alias(binary), objective, "dp", lambda: load_map(binary), unreachable) == (
+                entry,
+                True,
+            )
+            # Other solvers keep their own entries.
+            assert cache.get(grid_digest(values, thief_mask), objective, "astar") is None
+
+
+def test_eviction_keeps_the_cache_under_its_cap(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=4096)
+    for seed in range(200):
+        values, thief_mask = generate_map(12, seed=seed)
+        path, coins, stolen = solve(values, thief_mask, "stolen")
+        digest = grid_digest(values, thief_mask)
+        cache.link(bytes_alias(values.tobytes()), digest)
+        assert cache.put(digest, "stolen", "dp", values, thief_mask, path, coins, stolen).path == path
+    cache.evict()
+    size = sum(entry.stat().st_size for entry in os.scandir(tmp_path / "cache"))
+    assert 0 < size <= 4096
+    # The most recent result survives.
+    assert cache.get(digest, "stolen", "dp").path == path
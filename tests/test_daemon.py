@@ -0,0 +1,30 @@
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.daemon import WARMUP_MAP, Daemon
+from common.map_io import parse_map, write_binary
+
+
+def test_phase1_stream_reads_binary_map(tmp_path):
+    values, thief_mask = parse_map(WARMUP_MAP)
+    write_binary(tmp_path / "map.bin", values, thief_mask)
+    daemon = Daemon()
+    text = daemon.run("1", ["--no-cache"], WARMUP_MAP)
+    # The default solver streams stdin and tells the formats apart by peeking.
+    binary = daemon.run("1", ["--no-cache"], (tmp_path / "map.bin").read_bytes())
+    assert binary[0] == 0, binary[2].decode()
+    assert binary == text
+
+
+def test_runs_leave_tracemalloc_stopped():
+    daemon = Daemon()
+    ok = daemon.run("2", ["--no-cache", "--stats", "--trace-memory"], WARMUP_MAP)
+    assert ok[0] == 0, ok[2].decode()
+    assert b"peak_traced_bytes" in ok[2]
+    # A run that fails after starting tracemalloc never reaches report().
+    failed = daemon.run("2", ["--no-cache", "--stats", "--trace-memory"], b"not a map\n")
+    assert failed[0] != 0
+    assert not tracemalloc.is_tracing()
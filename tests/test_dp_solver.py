@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.dp_solver import solve
+from common.rules import score_path
+from tests.brute_force import best, small_maps
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_solve_matches_brute_force(objective):
+    for values, thief_mask in small_maps():
+        path, coins, stolen = solve(values, thief_mask, objective)
+        n = values.shape[0]
+        assert path[0] == (0, 0) and path[-1] == (n - 1, n - 1)
+        assert score_path(values, thief_mask, path) == (coins, stolen)
+        assert (coins if objective == "coins" else stolen) == best(values, thief_mask, objective)
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.heuristics import build_table, repair_table
+from tests.brute_force import best, small_maps
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_exact_table_matches_brute_force(objective):
+    for values, thief_mask in small_maps():
+        table = build_table(values, thief_mask, objective, "exact")
+        # Cost-to-go from the start state, plus the start cell itself.
+        t = int(thief_mask[0, 0])
+        if objective == "coins":
+            assert int(values[0, 0]) - table[0, 0, t] == best(values, thief_mask, objective)
+        else:
+            assert table[0, 0, t] == best(values, thief_mask, objective)
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_repair_matches_rebuild(objective):
+    rng = np.random.default_rng(1)
+    for values, thief_mask in small_maps():
+        values, thief_mask = values.astype(np.int64), thief_mask.copy()
+        n = values.shape[0]
+        goal = tuple(rng.integers(0, n, size=2).tolist())
+        table = build_table(values, thief_mask, objective, "exact", goal)
+        for _ in range(5):
+            cells = [tuple(cell) for cell in rng.integers(0, n, size=(int(rng.integers(1, 4)), 2)).tolist()]
+            for r, c in cells:
+                thief_mask[r, c] = rng.random() < 0.4
+                values[r, c] = 0 if thief_mask[r, c] else rng.integers(-10, 11)
+            repair_table(table, values, thief_mask, objective, cells)
+            assert np.array_equal(table, build_table(values, thief_mask, objective, "exact", goal))
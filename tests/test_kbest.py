@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.kbest import k_best_paths
+from common.rules import score_path
+from tests.brute_force import score_all, small_maps
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_k_best_matches_brute_force(objective):
+    for values, thief_mask in small_maps():
+        _, coins, stolen = score_all(values, thief_mask)
+        expected = np.sort(-coins if objective == "coins" else stolen)
+        # Ask for more paths than exist: every path comes out exactly once.
+        found = list(k_best_paths(values, thief_mask, objective, k=len(expected) + 5))
+        assert len({tuple(path) for path, _, _ in found}) == len(found) == len(expected)
+        for path, path_coins, path_stolen in found:
+            assert score_path(values, thief_mask, path) == (path_coins, path_stolen)
+        costs = [-c if objective == "coins" else s for _, c, s in found]
+        assert costs == expected.tolist()
@@ -0,0 +1,40 @@
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Phase-3"))
+
+from common.dp_solver import solve
+from common.map_io import load_map, parse_map, stream_rows, write_binary, write_text
+from map_loader import load_map as load_game_map
+from tests.brute_force import best, small_maps
+
+
+def test_text_and_binary_maps_load_the_same(tmp_path):
+    for i, (values, thief_mask) in enumerate(small_maps()):
+        write_text(tmp_path / f"{i}.txt", values, thief_mask)
+        write_binary(tmp_path / f"{i}.bin", values, thief_mask)
+        for name in (f"{i}.txt", f"{i}.bin"):
+            for loaded in (load_map(tmp_path / name), parse_map((tmp_path / name).read_bytes())):
+                assert np.array_equal(loaded[0], values)
+                assert np.array_equal(loaded[1], thief_mask)
+            game_map, n = load_game_map(tmp_path / name)
+            assert np.array_equal(game_map.values, values)
+            assert np.array_equal(game_map.thief_mask(), thief_mask)
+            n, rows = stream_rows(io.BufferedReader(io.BytesIO((tmp_path / name).read_bytes())))
+            streamed = list(rows)
+            assert n == values.shape[0]
+            assert np.array_equal([row for row, _ in streamed], values)
+            assert np.array_equal([thief for _, thief in streamed], thief_mask)
+
+
+def test_binary_map_solves_like_the_original(tmp_path):
+    for i, (values, thief_mask) in enumerate(small_maps()):
+        write_binary(tmp_path / f"{i}.bin", values, thief_mask)
+        loaded = load_map(tmp_path / f"{i}.bin")
+        for objective in ("coins", "stolen"):
+            _, coins, stolen = solve(*loaded, objective)
+            assert (coins if objective == "coins" else stolen) == best(values, thief_mask, objective)
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.dp_solver import solve
+from common.map_io import write_binary
+from common.mapgen import generate_map
+from common.outofcore import solve_arrays, solve_file
+from common.rules import score_path
+from tests.brute_force import best, small_maps
+
+# A few cells per block, so even small maps are split many times.
+TINY_BLOCK_MB = 200 / (1024 * 1024)
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_split_solve_matches_brute_force(objective, tmp_path):
+    for i, (values, thief_mask) in enumerate(small_maps()):
+        write_binary(tmp_path / f"{i}.bin", values, thief_mask)
+        for solved in (
+            solve_arrays(values, thief_mask, objective, TINY_BLOCK_MB),
+            solve_file(tmp_path / f"{i}.bin", objective, TINY_BLOCK_MB),
+        ):
+            path, coins, stolen = solved
+            assert score_path(values, thief_mask, path) == (coins, stolen)
+            assert (coins if objective == "coins" else stolen) == best(values, thief_mask, objective)
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_split_solve_matches_dp(objective):
+    values, thief_mask = generate_map(60, seed=5, thieves=0.3)
+    path, coins, stolen = solve_arrays(values, thief_mask, objective, TINY_BLOCK_MB)
+    _, dp_coins, dp_stolen = solve(values, thief_mask, objective)
+    assert score_path(values, thief_mask, path) == (coins, stolen)
+    assert (coins, stolen)[objective == "stolen"] == (dp_coins, dp_stolen)[objective == "stolen"]
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.dp_solver import solve
+from common.mapgen import generate_map
+from common.parallel import solve_parallel
+from tests.brute_force import best, small_maps
+
+
+@pytest.mark.parametrize("objective", ["coins", "stolen"])
+def test_tiled_solve_matches_brute_force(objective):
+    # Each call starts a pool, so only the larger maps, cut into 3 x 3 cell tiles.
+    for values, thief_mask in small_maps(count=14, sizes=(5, 6, 7)):
+        path, coins, stolen = solve_parallel(values, thief_mask, objective, workers=2, tile=3)
+        assert (path, coins, stolen) == solve(values, thief_mask, objective)
+        assert (coins if objective == "coins" else stolen) == best(values, thief_mask, objective)
+
+
+def test_uneven_tiles_match_dp():
+    values, thief_mask = generate_map(50, seed=6, thieves=0.3)
+    for objective in ("coins", "stolen"):
+        assert solve_parallel(values, thief_mask, objective, workers=2, tile=7) == solve(
+            values, thief_mask, objective
+        )
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.pareto import pareto_frontier
+from common.rules import score_path
+from tests.brute_force import score_all, small_maps
+
+
+def non_dominated(coins, stolen):
+    """Distinct (coins, stolen) points no other point beats, by stolen."""
+    points = set(zip(coins.tolist(), stolen.tolist()))
+    return sorted(
+        (c, s) for c, s in points if not any(oc >= c and os <= s and (oc, os) != (c, s) for oc, os in points)
+    )
+
+
+def test_frontier_matches_brute_force():
+    # Larger maps have longer frontiers.
+    maps = list(small_maps()) + list(small_maps(count=20, sizes=(7, 8)))
+    for values, thief_mask in maps:
+        _, coins, stolen = score_all(values, thief_mask)
+        frontier = pareto_frontier(values, thief_mask)
+        for path, path_coins, path_stolen in frontier:
+            assert score_path(values, thief_mask, path) == (path_coins, path_stolen)
+        points = [(c, s) for _, c, s in frontier]
+        assert points == sorted(points, key=lambda point: point[1])
+        assert sorted(points) == non_dominated(coins, stolen)
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.map_io import parse_map
+from common.rules import score_cells, score_path
+
+INT32_MIN = -(2**31)
+
+
+def test_thief_steals_int32_min():
+    # The thief picked up at (0, 1) robs the INT32_MIN cost at (1, 1).
+    values, thief_mask = parse_map(f"2\n5 !\n7 {INT32_MIN}\n".encode())
+    assert values.dtype == np.int32
+    assert score_path(values, thief_mask, [(0, 0), (0, 1), (1, 1)]) == (5, 2**31)
+    # Without a thief the cost is paid.
+    assert score_path(values, thief_mask, [(0, 0), (1, 0), (1, 1)]) == (12 + INT32_MIN, 0)
+
+
+def test_score_cells_int32_batch():
+    cell_values = np.array([[0, 0, INT32_MIN], [0, 0, INT32_MIN]], dtype=np.int32)
+    cell_thief = np.array([[False, True, False], [False, False, False]])
+    coins, stolen = score_cells(cell_values, cell_thief)
+    assert coins.tolist() == [0, INT32_MIN]
+    assert stolen.tolist() == [2**31, 0]
@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.map_io import write_binary
+from common.mapgen import generate_map
+from common.rules import score_path
+from common.server import MapStore, handle
+from tests.brute_force import best
+
+
+def route_cells(start, moves):
+    """(row, col) cells of a route given as a move string."""
+    r, c = start
+    cells = [(r, c)]
+    for move in moves:
+        r, c = (r + 1, c) if move == "D" else (r, c + 1)
+        cells.append((r, c))
+    return cells
+
+
+def test_routes_match_brute_force(tmp_path):
+    n = 7
+    values, thief_mask = generate_map(n, seed=3, thieves=0.5)
+    write_binary(tmp_path / "a.bin", values, thief_mask)
+    store = MapStore(1 << 30)
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        # Square sub-grids, so the brute force sees an ordinary map.
+        size = int(rng.integers(1, n + 1))
+        sr, sc = rng.integers(0, n - size + 1, size=2).tolist()
+        start, goal = (sr, sc), (sr + size - 1, sc + size - 1)
+        sub = values[sr : goal[0] + 1, sc : goal[1] + 1], thief_mask[sr : goal[0] + 1, sc : goal[1] + 1]
+        for objective in ("coins", "stolen"):
+            reply = handle(
+                store, {"map": str(tmp_path / "a.bin"), "start": start, "goal": goal, "objective": objective}
+            )
+            assert "error" not in reply, reply
+            assert score_path(values, thief_mask, route_cells(start, reply["moves"])) == (
+                reply["coins"],
+                reply["stolen"],
+            )
+            assert reply[objective] == best(*sub, objective)
+
+
+def test_goal_tables_stay_under_the_cap(tmp_path):
+    n = 40
+    write_binary(tmp_path / "a.bin", *generate_map(n, seed=1))
+    store = MapStore(0)
+    store.get(tmp_path / "a.bin")
+    # Room for the map and its exit tables, plus two goal tables.
+    entry = next(iter(store.maps.values()))
+    table_bytes = entry.tables[(n - 1, n - 1), "stolen"][0].nbytes
+    store.max_bytes = entry.nbytes + 2 * table_bytes
+    for goal in range(10, 30):
+        reply = handle(store, {"map": str(tmp_path / "a.bin"), "goal": [goal, goal]})
+        assert "error" not in reply
+        assert store.nbytes <= store.max_bytes
+    # The most recent goal is kept, the exit tables always.
+    assert list(entry.tables)[-1] == ((29, 29), "stolen")
+    assert ((n - 1, n - 1), "coins") in entry.tables
+
+
+def test_routes_after_updates_match_brute_force(tmp_path):
+    n = 6
+    values, thief_mask = generate_map(n, seed=4, thieves=0.5)
+    values = values.astype(np.int64)
+    write_binary(tmp_path / "a.bin", values, thief_mask)
+    store = MapStore(1 << 30)
+    path = str(tmp_path / "a.bin")
+    rng = np.random.default_rng(2)
+    for _ in range(10):
+        cells = []
+        for r, c in rng.integers(0, n, size=(2, 2)).tolist():
+            value = "!" if rng.random() < 0.4 else int(rng.integers(-10, 11))
+            values[r, c] = 0 if value == "!" else value
+            thief_mask[r, c] = value == "!"
+            cells.append([r, c, value])
+        assert "error" not in handle(store, {"op": "update", "map": path, "cells": cells})
+        for objective in ("coins", "stolen"):
+            reply = handle(store, {"map": path, "objective": objective})
+            assert reply[objective] == best(values, thief_mask, objective)